@@ -9,6 +9,8 @@ AI Usage: [Document any AI assistance used]
 This module handles character creation, loading, and saving.
 """
 
+import collections.abc
+import itertools
 import os
 from custom_exceptions import (
     InvalidCharacterClassError,
@@ -17,6 +19,162 @@ from custom_exceptions import (
     InvalidSaveDataError,
     CharacterDeadError
 )
+import inventory_system
+
+# ============================================================================
+# INDEXED LISTS
+# ============================================================================
+
+class IndexedList(collections.abc.MutableSequence):
+    """
+    Ordered list of values kept in dictionaries
+    
+    Used for quest lists: `in`, count() and remove() are O(1) instead of
+    scanning. Values sit in an insertion-ordered dict under running
+    numbers, and each value keeps the numbers it is stored under, so
+    removing a value never shifts the others. It behaves like a list for
+    iteration, len, ==, saving with ','.join and validation. Reading or
+    replacing by position walks the entries (O(n)), as does insert()
+    before the end. version goes up on every change, so indexes built
+    from the list can tell they are stale.
+    """
+    
+    def __init__(self, values=()):
+        """Create the list from any iterable of values"""
+        self._reset(values)
+    
+    @property
+    def counts(self):
+        """{value: number of copies}"""
+        return {value: len(numbers) for value, numbers in self.numbers.items()}
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __iter__(self):
+        return iter(self.entries.values())
+    
+    def __reversed__(self):
+        return reversed(self.entries.values())
+    
+    def __contains__(self, value):
+        return value in self.numbers
+    
+    def __eq__(self, other):
+        if isinstance(other, (list, IndexedList)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"IndexedList({list(self)!r})"
+    
+    def count(self, value):
+        """Return how many times value is in the list"""
+        return len(self.numbers.get(value, ()))
+    
+    def append(self, value):
+        number = self.next_number
+        self.next_number += 1
+        self.entries[number] = value
+        self.numbers.setdefault(value, {})[number] = None
+        self.version += 1
+    
+    def extend(self, values):
+        for value in list(values):
+            self.append(value)
+    
+    def insert(self, index, value):
+        if index >= len(self):
+            self.append(value)
+            return
+        values = list(self)
+        values.insert(index, value)
+        self._reset(values)
+    
+    def remove(self, value):
+        numbers = self.numbers.get(value)
+        if numbers is None:
+            raise ValueError(f"{value!r} is not in list")
+        self._discard(next(iter(numbers)))
+    
+    def pop(self, index=-1):
+        return self._discard(self._number_at(index))
+    
+    def clear(self):
+        self._reset(())
+    
+    def reverse(self):
+        self._reset(reversed(list(self)))
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return IndexedList(list(self)[index])
+        return self.entries[self._number_at(index)]
+    
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            values = list(self)
+            values[index] = value
+            self._reset(values)
+            return
+        number = self._number_at(index)
+        self._forget(number)
+        self.entries[number] = value
+        numbers = self.numbers.setdefault(value, {})
+        numbers[number] = None
+        if len(numbers) > 1:
+            # Keep each value's numbers in list order, so remove() takes the first copy
+            self.numbers[value] = dict.fromkeys(sorted(numbers))
+        self.version += 1
+    
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            values = list(self)
+            del values[index]
+            self._reset(values)
+        else:
+            self._discard(self._number_at(index))
+    
+    def copy(self):
+        return IndexedList(self)
+    
+    def __reduce__(self):
+        return (IndexedList, (list(self),))
+    
+    def _number_at(self, index):
+        """Return the entry number at a list position (O(1) at either end)"""
+        size = len(self.entries)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("list index out of range")
+        if index == size - 1:
+            return next(reversed(self.entries))
+        return next(itertools.islice(self.entries, index, None))
+    
+    def _discard(self, number):
+        """Remove the entry stored under number and return its value"""
+        self._forget(number)
+        self.version += 1
+        return self.entries.pop(number)
+    
+    def _forget(self, number):
+        """Drop number from the numbers of the value stored under it"""
+        numbers = self.numbers[self.entries[number]]
+        del numbers[number]
+        if not numbers:
+            del self.numbers[self.entries[number]]
+    
+    def _reset(self, values):
+        """Renumber the list from scratch"""
+        self.entries = dict(enumerate(values))
+        self.numbers = {}
+        for number, value in self.entries.items():
+            self.numbers.setdefault(value, {})[number] = None
+        self.next_number = len(self.entries)
+        self.version = getattr(self, 'version', 0) + 1
 
 # ============================================================================
 # CHARACTER MANAGEMENT FUNCTIONS
@@ -59,9 +217,11 @@ def create_character(name, character_class):
         'magic': stats['magic'],
         'experience': 0,
         'gold': 100,
-        'inventory': [],
-        'active_quests': [],
-        'completed_quests': [],
+        'inventory': inventory_system.Inventory(),
+        'active_quests': IndexedList(),
+        'completed_quests': IndexedList(),
+        'quest_rewards': {'total_xp': 0, 'total_gold': 0, 'count': 0},
+        'quest_progress': {},
         'equipped_weapon': None,
         'equipped_armor': None
     }
@@ -84,9 +244,11 @@ def save_character(character, save_directory="data/save_games"):
     MAGIC: 5
     EXPERIENCE: 0
     GOLD: 100
-    INVENTORY: item1,item2,item3
+    INVENTORY: item1*3,item2 (item_id*count for more than one copy)
     ACTIVE_QUESTS: quest1,quest2
     COMPLETED_QUESTS: quest1,quest2
+    QUEST_REWARDS: total_xp,total_gold,count (if tracked)
+    QUEST_PROGRESS: quest1=2,quest2=1/0 (objective counts, if tracked)
     
     Returns: True if successful
     Raises: PermissionError, IOError (let them propagate or handle)
@@ -107,9 +269,16 @@ def save_character(character, save_directory="data/save_games"):
             f.write(f"MAGIC: {character['magic']}\n")
             f.write(f"EXPERIENCE: {character['experience']}\n")
             f.write(f"GOLD: {character['gold']}\n")
-            f.write(f"INVENTORY: {','.join(character['inventory'])}\n")
+            f.write(f"INVENTORY: {inventory_system.format_inventory(character['inventory'])}\n")
             f.write(f"ACTIVE_QUESTS: {','.join(character['active_quests'])}\n")
             f.write(f"COMPLETED_QUESTS: {','.join(character['completed_quests'])}\n")
+            if 'quest_rewards' in character:
+                rewards = character['quest_rewards']
+                f.write(f"QUEST_REWARDS: {rewards['total_xp']},{rewards['total_gold']},{rewards['count']}\n")
+            if 'quest_progress' in character:
+                progress = ','.join(f"{quest_id}={'/'.join(map(str, counts))}"
+                                    for quest_id, counts in character['quest_progress'].items())
+                f.write(f"QUEST_PROGRESS: {progress}\n")
         return True
     except (IOError, OSError) as e:
         raise
@@ -151,11 +320,19 @@ def load_character(character_name, save_directory="data/save_games"):
             if key in ['LEVEL', 'HEALTH', 'MAX_HEALTH', 'STRENGTH', 'MAGIC', 'EXPERIENCE', 'GOLD']:
                 character[key.lower()] = int(value)
             elif key == 'INVENTORY':
-                character[key.lower()] = value.split(',') if value else []
+                character[key.lower()] = inventory_system.parse_inventory(value)
             elif key == 'ACTIVE_QUESTS':
-                character[key.lower()] = value.split(',') if value else []
+                character[key.lower()] = IndexedList(value.split(',') if value else [])
             elif key == 'COMPLETED_QUESTS':
-                character[key.lower()] = value.split(',') if value else []
+                character[key.lower()] = IndexedList(value.split(',') if value else [])
+            elif key == 'QUEST_REWARDS':
+                total_xp, total_gold, count = [int(part) for part in value.split(',')]
+                character['quest_rewards'] = {'total_xp': total_xp, 'total_gold': total_gold, 'count': count}
+            elif key == 'QUEST_PROGRESS':
+                character['quest_progress'] = {}
+                for entry in (value.split(',') if value else []):
+                    quest_id, counts = entry.split('=')
+                    character['quest_progress'][quest_id] = [int(count) for count in counts.split('/')]
             else:
                 character[key.lower()] = value
         
@@ -309,11 +486,11 @@ def validate_character_data(character):
         if not isinstance(character[field], int):
             raise InvalidSaveDataError(f"{field} must be integer")
     
-    if not isinstance(character['inventory'], list):
+    if not isinstance(character['inventory'], (list, inventory_system.Inventory)):
         raise InvalidSaveDataError("inventory must be list")
-    if not isinstance(character['active_quests'], list):
+    if not isinstance(character['active_quests'], (list, IndexedList)):
         raise InvalidSaveDataError("active_quests must be list")
-    if not isinstance(character['completed_quests'], list):
+    if not isinstance(character['completed_quests'], (list, IndexedList)):
         raise InvalidSaveDataError("completed_quests must be list")
     
     return True
@@ -9,85 +9,645 @@ AI Usage: [Document any AI assistance used]
 Handles combat mechanics
 """
 
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import heapq
+import json
+import math
+import os
 import random
+import struct
+import time
+import types
 from custom_exceptions import (
     InvalidTargetError,
     CombatNotActiveError,
     CharacterDeadError,
-    AbilityOnCooldownError
+    AbilityOnCooldownError,
+    MissingDataFileError,
+    CorruptedDataError
 )
+import character_manager
+import game_data
+import quest_handler
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Chance that a run attempt succeeds
+ESCAPE_CHANCE = 0.5
 
 # ============================================================================
 # ENEMY DEFINITIONS
 # ============================================================================
 
+# Enemy data file, resolved next to this module so imports work from any directory
+ENEMY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'enemies.txt')
+
+# Built-in enemies used when the enemy data file is missing
+DEFAULT_ENEMY_DATA = {
+    'goblin': {'enemy_id': 'goblin', 'name': 'Goblin', 'health': 50, 'strength': 8,
+               'magic': 2, 'xp_reward': 25, 'gold_reward': 10,
+               'min_level': 1, 'max_level': 2, 'spawn_weight': 1},
+    'orc': {'enemy_id': 'orc', 'name': 'Orc', 'health': 80, 'strength': 12,
+            'magic': 5, 'xp_reward': 50, 'gold_reward': 25,
+            'min_level': 3, 'max_level': 5, 'spawn_weight': 1},
+    'dragon': {'enemy_id': 'dragon', 'name': 'Dragon', 'health': 200, 'strength': 25,
+               'magic': 15, 'xp_reward': 200, 'gold_reward': 100,
+               'min_level': 6, 'max_level': None, 'spawn_weight': 1}
+}
+
+# Read-only enemy templates {enemy_id: template}, built once at import
+ENEMY_TEMPLATES = {}
+
+# Level -> eligible enemy spawn tables, rebuilt lazily after registry changes
+_spawn_index = {
+    'stale': True,
+    'level_lookup': [],
+    'segments': [],
+    'tables': {}
+}
+
+def load_enemy_registry(filename=None):
+    """
+    Rebuild the enemy template registry from an enemy data file
+    
+    Args:
+        filename: Enemy data file (default: ENEMY_FILE). If the default
+                  file is missing the built-in enemies are used instead.
+    
+    Returns: The ENEMY_TEMPLATES dictionary
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+    if filename is None:
+        try:
+            enemy_data = game_data.load_enemies(ENEMY_FILE)
+        except MissingDataFileError:
+            enemy_data = DEFAULT_ENEMY_DATA
+    else:
+        enemy_data = game_data.load_enemies(filename)
+    
+    ENEMY_TEMPLATES.clear()
+    _spawn_index['stale'] = True
+    for enemy in enemy_data.values():
+        register_enemy(enemy)
+    
+    return ENEMY_TEMPLATES
+
+def register_enemy(enemy_data):
+    """
+    Add or replace a single enemy template
+    
+    Args:
+        enemy_data: Dictionary with enemy_id, name, health, strength, magic,
+                    xp_reward and gold_reward
+    
+    Returns: The stored read-only template
+    Raises: InvalidDataFormatError if enemy data is invalid
+    """
+    game_data.validate_enemy_data(enemy_data)
+    
+    template = dict(enemy_data)
+    template['enemy_id'] = template['enemy_id'].lower()
+    template['max_health'] = template['health']
+    template.setdefault('min_level', 1)
+    template.setdefault('max_level', None)
+    template.setdefault('spawn_weight', 1)
+    
+    ENEMY_TEMPLATES[template['enemy_id']] = types.MappingProxyType(template)
+    _spawn_index['stale'] = True
+    return ENEMY_TEMPLATES[template['enemy_id']]
+
+def get_enemy_types():
+    """
+    Get all registered enemy types
+    
+    Returns: List of enemy ids
+    """
+    return list(ENEMY_TEMPLATES)
+
 def create_enemy(enemy_type):
     """
     Create an enemy based on type
     
-    Example enemy types and stats:
+    Enemy types come from the enemy registry (data/enemies.txt):
     - goblin: health=50, strength=8, magic=2, xp_reward=25, gold_reward=10
     - orc: health=80, strength=12, magic=5, xp_reward=50, gold_reward=25
     - dragon: health=200, strength=25, magic=15, xp_reward=200, gold_reward=100
     
-    Returns: Enemy dictionary
+    Returns: Enemy dictionary (a fresh copy of the template)
     Raises: InvalidTargetError if enemy_type not recognized
     """
-    valid_types = ['goblin', 'orc', 'dragon']
+    template = ENEMY_TEMPLATES.get(enemy_type.lower())
     
-    if enemy_type.lower() not in valid_types:
+    if template is None:
         raise InvalidTargetError(f"Invalid enemy type: {enemy_type}")
     
-    enemy_type = enemy_type.lower()
-    
-    enemies = {
-        'goblin': {
-            'name': 'Goblin',
-            'health': 50,
-            'max_health': 50,
-            'strength': 8,
-            'magic': 2,
-            'xp_reward': 25,
-            'gold_reward': 10
-        },
-        'orc': {
-            'name': 'Orc',
-            'health': 80,
-            'max_health': 80,
-            'strength': 12,
-            'magic': 5,
-            'xp_reward': 50,
-            'gold_reward': 25
-        },
-        'dragon': {
-            'name': 'Dragon',
-            'health': 200,
-            'max_health': 200,
-            'strength': 25,
-            'magic': 15,
-            'xp_reward': 200,
-            'gold_reward': 100
-        }
-    }
-    
-    return enemies[enemy_type].copy()
+    return dict(template)
+
+load_enemy_registry()
 
-def get_random_enemy_for_level(character_level):
+def get_random_enemy_for_level(character_level, rng=None):
     """
     Get an appropriate enemy for character's level
     
+    Each enemy spawns between its min_level and max_level, chosen with
+    probability proportional to its spawn_weight:
     Level 1-2: Goblins
     Level 3-5: Orcs
     Level 6+: Dragons
     
+    Args:
+        character_level: Level of the character
+        rng: Optional random stream (BattleRNG or random.Random)
+    
     Returns: Enemy dictionary
+    Raises: InvalidTargetError if no enemies are registered
     """
-    if character_level <= 2:
-        return create_enemy('goblin')
-    elif character_level <= 5:
-        return create_enemy('orc')
-    else:
-        return create_enemy('dragon')
+    if rng is None:
+        rng = random
+    
+    enemy_ids, probabilities, aliases = _get_spawn_table(character_level)
+    
+    # Alias method: one uniform column pick plus one biased coin flip
+    column = rng.randrange(len(enemy_ids))
+    if rng.random() >= probabilities[column]:
+        column = aliases[column]
+    
+    return create_enemy(enemy_ids[column])
+
+def get_eligible_enemies(character_level):
+    """
+    Get the enemy types that can spawn at a level with their spawn chances
+    
+    Returns: Dictionary {enemy_id: probability}
+    Raises: InvalidTargetError if no enemies are registered
+    """
+    enemy_ids, probabilities, aliases = _get_spawn_table(character_level)
+    
+    chances = {enemy_id: 0.0 for enemy_id in enemy_ids}
+    share = 1.0 / len(enemy_ids)
+    for column, enemy_id in enumerate(enemy_ids):
+        chances[enemy_id] += share * probabilities[column]
+        chances[enemy_ids[aliases[column]]] += share * (1.0 - probabilities[column])
+    
+    return chances
+
+def rebuild_spawn_index():
+    """
+    Rebuild the level -> spawn table index from the enemy registry
+    
+    Level bands split the level axis into segments with a fixed set of
+    eligible enemies. Alias tables are only recomputed for segments whose
+    enemies or weights changed since the last rebuild. Levels with no
+    eligible enemies reuse the nearest lower segment (or the first one).
+    
+    Raises: InvalidTargetError if no enemies can spawn at any level
+    """
+    starts = {}
+    ends = {}
+    for template in ENEMY_TEMPLATES.values():
+        if template['spawn_weight'] <= 0:
+            continue
+        start = max(1, template['min_level'])
+        starts.setdefault(start, []).append(template)
+        if template['max_level'] is not None:
+            ends.setdefault(template['max_level'] + 1, []).append(template)
+    
+    boundaries = sorted(set([1]) | set(starts) | set(ends))
+    active = {}
+    old_tables = _spawn_index['tables']
+    tables = {}
+    segments = []
+    
+    for boundary in boundaries:
+        for template in ends.get(boundary, []):
+            active.pop(template['enemy_id'], None)
+        for template in starts.get(boundary, []):
+            active[template['enemy_id']] = template['spawn_weight']
+        
+        members = tuple(active.items())
+        if not members:
+            segments.append(None)
+            continue
+        if members not in tables:
+            tables[members] = old_tables.get(members) or _build_spawn_table(members)
+        segments.append(tables[members])
+    
+    filled = [segment for segment in segments if segment is not None]
+    if not filled:
+        raise InvalidTargetError("No enemies available to spawn")
+    
+    previous = filled[0]
+    for position, segment in enumerate(segments):
+        if segment is None:
+            segments[position] = previous
+        else:
+            previous = segment
+    
+    level_lookup = []
+    for position in range(len(boundaries) - 1):
+        level_lookup.extend([position] * (boundaries[position + 1] - boundaries[position]))
+    
+    _spawn_index['level_lookup'] = [0] + level_lookup
+    _spawn_index['segments'] = segments
+    _spawn_index['tables'] = tables
+    _spawn_index['stale'] = False
+
+def build_alias_table(weights):
+    """
+    Build Vose alias table columns for weighted O(1) sampling
+    
+    Args:
+        weights: List of positive weights
+    
+    Returns: Tuple (probabilities, aliases), both lists of len(weights)
+    """
+    count = len(weights)
+    total = sum(weights)
+    scaled = [weight * count / total for weight in weights]
+    probabilities = [1.0] * count
+    aliases = list(range(count))
+    
+    small = [i for i in range(count) if scaled[i] < 1.0]
+    large = [i for i in range(count) if scaled[i] >= 1.0]
+    
+    while small and large:
+        low = small.pop()
+        high = large.pop()
+        probabilities[low] = scaled[low]
+        aliases[low] = high
+        scaled[high] = scaled[high] + scaled[low] - 1.0
+        if scaled[high] < 1.0:
+            small.append(high)
+        else:
+            large.append(high)
+    
+    return probabilities, aliases
+
+def _build_spawn_table(members):
+    """Build (enemy_ids, probabilities, aliases) from (enemy_id, weight) pairs"""
+    enemy_ids = [enemy_id for enemy_id, weight in members]
+    probabilities, aliases = build_alias_table([weight for enemy_id, weight in members])
+    return (enemy_ids, probabilities, aliases)
+
+def _get_spawn_table(character_level):
+    """Look up the spawn table for a level, rebuilding the index if stale"""
+    if _spawn_index['stale']:
+        rebuild_spawn_index()
+    
+    level_lookup = _spawn_index['level_lookup']
+    if character_level < len(level_lookup):
+        return _spawn_index['segments'][level_lookup[max(character_level, 0)]]
+    return _spawn_index['segments'][-1]
+
+# ============================================================================
+# RANDOM NUMBER STREAMS
+# ============================================================================
+
+# Number of values drawn at once by NumPy-backed streams
+RNG_BATCH_SIZE = 256
+
+class BattleRNG:
+    """
+    Seedable random number stream owned by a single battle
+    
+    Every stream records its seed so an incident can be replayed exactly
+    by creating a new stream with the same seed. Child streams from spawn()
+    are derived deterministically from the parent seed, so parallel
+    simulations get independent streams without sharing global state.
+    """
+    
+    def __init__(self, seed=None, use_numpy=False):
+        """
+        Create a stream
+        
+        Args:
+            seed: Integer seed (default: fresh random seed, still recorded)
+            use_numpy: Draw batches from a NumPy Generator if NumPy is installed
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.use_numpy = use_numpy and np is not None
+        self.children_spawned = 0
+        self._batch = []
+        
+        if self.use_numpy:
+            self._generator = np.random.default_rng(seed)
+        else:
+            self._generator = random.Random(seed)
+    
+    def random(self):
+        """Return the next float in [0.0, 1.0)"""
+        if not self.use_numpy:
+            return self._generator.random()
+        if not self._batch:
+            self._batch = self._generator.random(RNG_BATCH_SIZE).tolist()
+            self._batch.reverse()
+        return self._batch.pop()
+    
+    def randrange(self, stop):
+        """Return a random integer in [0, stop)"""
+        return min(int(self.random() * stop), stop - 1)
+    
+    def random_batch(self, count):
+        """
+        Draw count floats at once
+        
+        Returns: NumPy array for NumPy-backed streams, otherwise a list
+        """
+        if self.use_numpy:
+            return self._generator.random(count)
+        return [self._generator.random() for _ in range(count)]
+    
+    def spawn(self, count=1):
+        """
+        Derive independent child streams
+        
+        Returns: List of count BattleRNG objects
+        """
+        children = []
+        for _ in range(count):
+            children.append(BattleRNG(derive_seed(self.seed, self.children_spawned),
+                                      self.use_numpy))
+            self.children_spawned += 1
+        return children
+
+def derive_seed(seed, stream_index):
+    """
+    Derive a 64-bit seed for stream number stream_index of a parent seed
+    
+    Uses a hash so the result is identical across runs and platforms.
+    
+    Returns: Integer seed
+    """
+    digest = hashlib.sha256(f"{seed}:{stream_index}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+# ============================================================================
+# BATTLE EVENT LOG
+# ============================================================================
+
+# Events kept per battle; older events are dropped first
+DEFAULT_LOG_CAPACITY = 256
+
+# Codes used in binary exports (position in the tuple is the code)
+EVENT_ACTORS = ('player', 'enemy')
+EVENT_ACTIONS = ('attack', 'special', 'heal', 'escape', 'escape_failed', 'damage_over_time',
+                 'guard')
+
+# Binary log layout: header (magic, version, event count) then fixed-size records
+BINARY_LOG_MAGIC = b'QCBL'
+BINARY_LOG_HEADER = struct.Struct('<4sBI')
+BINARY_LOG_RECORD = struct.Struct('<IBBii')
+
+class BattleLog:
+    """
+    Bounded ring buffer of structured combat events
+    
+    Each event is a tuple (turn, actor, action, damage, remaining_health).
+    remaining_health is the target's health after the action; for heals
+    the target is the actor and damage is the negative amount healed.
+    For damage over time the actor is the combatant taking the damage.
+    Recording an event is a single deque append, so no strings are
+    formatted during battle.
+    """
+    
+    def __init__(self, capacity=DEFAULT_LOG_CAPACITY):
+        """Create an empty log holding at most capacity events"""
+        self.events = collections.deque(maxlen=capacity)
+        self.recorded = 0
+    
+    def record(self, turn, actor, action, damage, remaining_health):
+        """Add an event, dropping the oldest one if the buffer is full"""
+        self.events.append((turn, actor, action, damage, remaining_health))
+        self.recorded += 1
+    
+    def dropped(self):
+        """Return how many events were overwritten by newer ones"""
+        return self.recorded - len(self.events)
+    
+    def to_dicts(self):
+        """
+        Get the buffered events as dictionaries
+        
+        Returns: List of {'turn', 'actor', 'action', 'damage', 'remaining_health'}
+        """
+        return [_event_to_dict(event) for event in self.events]
+    
+    def export_json_lines(self, filename):
+        """
+        Write one JSON object per event to filename
+        
+        Returns: Number of events written
+        """
+        with open(filename, 'w') as f:
+            for event in self.events:
+                f.write(json.dumps(_event_to_dict(event)) + '\n')
+        return len(self.events)
+    
+    def export_binary(self, filename):
+        """
+        Write events in the compact binary log format
+        
+        Returns: Number of events written
+        """
+        with open(filename, 'wb') as f:
+            f.write(BINARY_LOG_HEADER.pack(BINARY_LOG_MAGIC, 1, len(self.events)))
+            for turn, actor, action, damage, remaining_health in self.events:
+                f.write(BINARY_LOG_RECORD.pack(turn, EVENT_ACTORS.index(actor),
+                                               EVENT_ACTIONS.index(action),
+                                               damage, remaining_health))
+        return len(self.events)
+
+def load_binary_log(filename):
+    """
+    Read a binary battle log written by BattleLog.export_binary
+    
+    Returns: List of event dictionaries
+    Raises: CorruptedDataError if the file is not a valid battle log
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    
+    try:
+        magic, version, count = BINARY_LOG_HEADER.unpack_from(data, 0)
+        if magic != BINARY_LOG_MAGIC or version != 1:
+            raise CorruptedDataError(f"Not a battle log: {filename}")
+        
+        events = []
+        offset = BINARY_LOG_HEADER.size
+        for _ in range(count):
+            turn, actor, action, damage, remaining_health = BINARY_LOG_RECORD.unpack_from(data, offset)
+            offset += BINARY_LOG_RECORD.size
+            events.append(_event_to_dict((turn, EVENT_ACTORS[actor], EVENT_ACTIONS[action],
+                                          damage, remaining_health)))
+    except (struct.error, IndexError):
+        raise CorruptedDataError(f"Truncated or invalid battle log: {filename}")
+    
+    return events
+
+def _event_to_dict(event):
+    """Convert an event tuple to a dictionary"""
+    turn, actor, action, damage, remaining_health = event
+    return {'turn': turn, 'actor': actor, 'action': action,
+            'damage': damage, 'remaining_health': remaining_health}
+
+# ============================================================================
+# COOLDOWNS AND TIMED EFFECTS
+# ============================================================================
+
+class EffectTracker:
+    """
+    Ability cooldowns and timed effects (damage over time, shields) for one battle
+    
+    Effects are filed in a timer wheel keyed by the turn they expire on.
+    Damage over time is kept as a running total per target and shields
+    are pooled per target, so ending a turn only touches the effects
+    expiring that turn, however many are active. Cooldowns store the
+    turn an ability is ready again and cost nothing per turn. All state
+    lives in the tracker; the combatant dictionaries only ever see
+    their health change.
+    """
+    
+    def __init__(self):
+        """Create an empty tracker at turn 0"""
+        self.turn = 0
+        self.keys = {}
+        self.targets = {}
+        self.cooldowns = {}
+        self.damage_over_time = {}
+        self.damage_over_time_ends = {}
+        self.shields = {}
+        self.shield_strength = {}
+        self.timers = {}
+    
+    def register(self, key, combatant):
+        """Register a character or enemy dictionary under a key"""
+        self.keys[id(combatant)] = key
+        self.targets[key] = combatant
+    
+    def key_of(self, combatant):
+        """Return the key a combatant was registered under (None if unknown)"""
+        return self.keys.get(id(combatant))
+    
+    def cooldown_remaining(self, owner, ability):
+        """Return how many more turns until owner can use ability again"""
+        return max(0, self.cooldowns.get((owner, ability), 0) - self.turn)
+    
+    def check_cooldown(self, owner, ability):
+        """
+        Make sure an ability is ready
+        
+        Raises: AbilityOnCooldownError if the ability was used too recently
+        """
+        remaining = self.cooldown_remaining(owner, ability)
+        if remaining > 0:
+            raise AbilityOnCooldownError(f"{ability} ability is on cooldown for {remaining} more turn(s)")
+    
+    def start_cooldown(self, owner, ability, turns):
+        """Block ability for the next turns turns"""
+        if turns > 0:
+            self.cooldowns[(owner, ability)] = self.turn + turns + 1
+    
+    def add_damage_over_time(self, target, damage, turns):
+        """Deal damage to target at the end of this and the next turns-1 turns"""
+        self.damage_over_time[target] = self.damage_over_time.get(target, 0) + damage
+        ends = self._schedule(turns, target, 'damage_over_time', damage)
+        self.damage_over_time_ends[target] = max(ends, self.damage_over_time_ends.get(target, 0))
+    
+    def damage_over_time_remaining(self, target):
+        """Return how many more end-of-turn ticks target will take"""
+        return max(0, self.damage_over_time_ends.get(target, 0) - self.turn)
+    
+    def add_shield(self, target, amount, turns):
+        """Absorb up to amount damage to target for turns turns"""
+        self.shields[target] = self.shields.get(target, 0) + amount
+        self.shield_strength[target] = self.shield_strength.get(target, 0) + amount
+        self._schedule(turns, target, 'shield', amount)
+    
+    def shield(self, target):
+        """Return how much damage target's shields can still absorb"""
+        return self.shields.get(target, 0)
+    
+    def apply_damage(self, combatant, damage):
+        """
+        Apply damage to a registered combatant, letting its shield absorb it first
+        
+        Returns: Health actually lost
+        """
+        key = self.keys.get(id(combatant))
+        shield = self.shields.get(key, 0)
+        if shield > 0:
+            absorbed = min(shield, damage)
+            self.shields[key] = shield - absorbed
+            damage -= absorbed
+        return apply_damage_to(combatant, damage)
+    
+    def advance_turn(self):
+        """
+        Apply damage over time, end the turn and expire finished effects
+        
+        Damage over time is not absorbed by shields. When a shield expires,
+        the pooled shield is capped at the combined strength of the shields
+        that are still active.
+        
+        Returns: List of (target, health_lost) for damage over time this turn
+        """
+        ticks = []
+        for target, damage in self.damage_over_time.items():
+            ticks.append((target, apply_damage_to(self.targets[target], damage)))
+        
+        self.turn += 1
+        
+        for target, kind, amount in self.timers.pop(self.turn, []):
+            if kind == 'damage_over_time':
+                self.damage_over_time[target] -= amount
+                if self.damage_over_time[target] == 0:
+                    del self.damage_over_time[target]
+                    del self.damage_over_time_ends[target]
+            else:
+                self.shield_strength[target] -= amount
+                self.shields[target] = min(self.shields[target], self.shield_strength[target])
+        
+        return ticks
+    
+    def clear(self):
+        """Remove every cooldown and effect"""
+        self.cooldowns = {}
+        self.damage_over_time = {}
+        self.damage_over_time_ends = {}
+        self.shields = {}
+        self.shield_strength = {}
+        self.timers = {}
+    
+    def _schedule(self, turns, target, kind, amount):
+        """
+        File an effect under the turn it expires on
+        
+        Returns: The turn the effect expires on
+        """
+        ends = self.turn + max(1, turns)
+        self.timers.setdefault(ends, []).append((target, kind, amount))
+        return ends
+
+def apply_damage_to(target, damage):
+    """
+    Apply damage to a character or enemy
+    
+    Reduces health, prevents negative health
+    
+    Returns: Health actually lost
+    """
+    health = target['health']
+    target['health'] = max(0, health - damage)
+    return health - target['health']
 
 # ============================================================================
 # COMBAT SYSTEM
@@ -100,19 +660,56 @@ class SimpleBattle:
     Manages combat between character and enemy
     """
     
-    def __init__(self, character, enemy):
-        """Initialize battle with character and enemy"""
+    def __init__(self, character, enemy, rng=None, seed=None, verbose=True,
+                 log_capacity=DEFAULT_LOG_CAPACITY, enemy_ai=None):
+        """
+        Initialize battle with character and enemy
+        
+        Args:
+            rng: Random stream for this battle (default: new BattleRNG)
+            seed: Seed for the new BattleRNG when rng is not given
+            verbose: Print battle messages (turn off for headless battles)
+            log_capacity: Number of structured events kept in self.events
+            enemy_ai: Object whose choose_action(battle) returns an action
+                      from ENEMY_ACTIONS (default: always attack)
+        """
         self.character = character
         self.enemy = enemy
         self.combat_active = False
         self.turn_counter = 0
+        self.result = None
+        self.verbose = verbose
+        self.events = BattleLog(log_capacity)
+        self.enemy_ai = enemy_ai
+        self.effects = EffectTracker()
+        self.effects.register('player', character)
+        self.effects.register('enemy', enemy)
+        if rng is None:
+            rng = BattleRNG(seed)
+        self.rng = rng
     
     def start_battle(self):
         """
         Start the combat loop
         
         Returns: Dictionary with battle results:
-                {'winner': 'player'|'enemy', 'xp_gained': int, 'gold_gained': int}
+                {'winner': 'player'|'enemy'|'escaped', 'xp_gained': int, 'gold_gained': int}
+        
+        Raises: CharacterDeadError if character is already dead
+        """
+        self.begin()
+        
+        while self.combat_active:
+            self.player_turn()
+            self.finish_turn()
+        
+        return self.result
+    
+    def begin(self):
+        """
+        Mark the battle as started without running the combat loop
+        
+        Used by start_battle and by schedulers that drive turns themselves.
         
         Raises: CharacterDeadError if character is already dead
         """
@@ -121,23 +718,59 @@ class SimpleBattle:
         
         self.combat_active = True
         self.turn_counter = 0
+        self.result = None
+    
+    def take_turn(self, choice):
+        """
+        Play one full turn with the given player action, without prompting
         
-        while self.combat_active:
-            self.player_turn()
-            if not self.combat_active:
-                break
-            self.enemy_turn()
-            
-            winner = self.check_battle_end()
-            if winner:
-                self.combat_active = False
-                if winner == 'player':
-                    rewards = get_victory_rewards(self.enemy)
-                    return {'winner': 'player', 'xp_gained': rewards['xp'], 'gold_gained': rewards['gold']}
-                else:
-                    return {'winner': 'enemy', 'xp_gained': 0, 'gold_gained': 0}
+        Args:
+            choice: '1' attack, '2' special ability, '3' run
         
-        return {'winner': 'escaped', 'xp_gained': 0, 'gold_gained': 0}
+        Returns: Battle result dictionary if the battle ended, otherwise None
+        Raises:
+            CombatNotActiveError if called outside of battle
+            AbilityOnCooldownError if the special ability is not ready
+        """
+        self.perform_action(choice)
+        return self.finish_turn()
+    
+    def finish_turn(self):
+        """
+        Let the enemy act (unless the player escaped) and check for a winner
+        
+        Returns: Battle result dictionary if the battle ended, otherwise None
+        """
+        if not self.combat_active:
+            self.turn_counter += 1
+            self.effects.clear()
+            self.result = {'winner': 'escaped', 'xp_gained': 0, 'gold_gained': 0}
+            return self.result
+        
+        self.enemy_turn()
+        
+        for target, damage in self.effects.advance_turn():
+            if damage == 0:
+                continue
+            combatant = self.effects.targets[target]
+            self.events.record(self.turn_counter + 1, target, 'damage_over_time', damage, combatant['health'])
+            if self.verbose:
+                display_battle_log("{name} takes {damage} damage over time!",
+                                   name=combatant['name'], damage=damage)
+        
+        self.turn_counter += 1
+        
+        winner = self.check_battle_end()
+        if winner:
+            self.combat_active = False
+            self.effects.clear()
+            if winner == 'player':
+                rewards = get_victory_rewards(self.enemy)
+                self.result = {'winner': 'player', 'xp_gained': rewards['xp'], 'gold_gained': rewards['gold']}
+            else:
+                self.result = {'winner': 'enemy', 'xp_gained': 0, 'gold_gained': 0}
+        
+        return self.result
     
     def player_turn(self):
         """
@@ -158,41 +791,92 @@ class SimpleBattle:
         print("2. Special Ability")
         print("3. Run")
         
-        choice = input("Choose action (1-3): ").strip()
+        while True:
+            choice = input("Choose action (1-3): ").strip()
+            
+            if choice not in ['1', '2', '3']:
+                print("Invalid choice, attacking instead...")
+            
+            try:
+                self.perform_action(choice)
+                return
+            except AbilityOnCooldownError as e:
+                print(f"{e}, choose another action.")
+    
+    def perform_action(self, choice):
+        """
+        Carry out the player's chosen action
+        
+        Args:
+            choice: '1' attack, '2' special ability, '3' run
+                    (anything else is treated as an attack)
         
-        if choice == '1':
-            damage = self.calculate_damage(self.character, self.enemy)
-            self.apply_damage(self.enemy, damage)
-            display_battle_log(f"{self.character['name']} attacks for {damage} damage!")
-        elif choice == '2':
-            result = use_special_ability(self.character, self.enemy)
-            display_battle_log(result)
+        Raises:
+            CombatNotActiveError if called outside of battle
+            AbilityOnCooldownError if the special ability is not ready
+        """
+        if not self.combat_active:
+            raise CombatNotActiveError("Combat is not active")
+        
+        turn = self.turn_counter + 1
+        
+        if choice == '2':
+            outcome = resolve_special_ability(self.character, self.enemy, self.rng, self.effects, 'player')
+            if outcome['damage'] is not None or outcome['healed'] is None:
+                self.events.record(turn, 'player', 'special', outcome['damage'] or 0,
+                                   self.enemy['health'])
+            if outcome['healed'] is not None:
+                self.events.record(turn, 'player', 'heal', -outcome['healed'],
+                                   self.character['health'])
+            if self.verbose:
+                display_battle_log(outcome['template'], **outcome['values'])
         elif choice == '3':
             if self.attempt_escape():
-                display_battle_log("Escaped successfully!")
+                self.events.record(turn, 'player', 'escape', 0, self.character['health'])
+                if self.verbose:
+                    display_battle_log("Escaped successfully!")
                 self.combat_active = False
             else:
-                display_battle_log("Failed to escape!")
+                self.events.record(turn, 'player', 'escape_failed', 0, self.character['health'])
+                if self.verbose:
+                    display_battle_log("Failed to escape!")
         else:
-            print("Invalid choice, attacking instead...")
             damage = self.calculate_damage(self.character, self.enemy)
             self.apply_damage(self.enemy, damage)
-            display_battle_log(f"{self.character['name']} attacks for {damage} damage!")
+            self.events.record(turn, 'player', 'attack', damage, self.enemy['health'])
+            if self.verbose:
+                display_battle_log("{name} attacks for {damage} damage!",
+                                   name=self.character['name'], damage=damage)
     
     def enemy_turn(self):
         """
-        Handle enemy's turn - simple AI
+        Handle enemy's turn
         
-        Enemy always attacks
+        Enemy attacks unless its AI chooses to guard, which shields it
+        (up to its strength) from the player's next action. An enemy
+        cannot guard two turns in a row.
         
         Raises: CombatNotActiveError if called outside of battle
         """
         if not self.combat_active:
             raise CombatNotActiveError("Combat is not active")
         
+        if (self.enemy_ai is not None and self.effects.cooldown_remaining('enemy', 'guard') == 0
+                and self.enemy_ai.choose_action(self) == 'guard'):
+            self.effects.add_shield('enemy', self.enemy['strength'], ENEMY_GUARD_TURNS)
+            self.effects.start_cooldown('enemy', 'guard', ENEMY_GUARD_COOLDOWN)
+            self.events.record(self.turn_counter + 1, 'enemy', 'guard', self.enemy['strength'],
+                               self.enemy['health'])
+            if self.verbose:
+                display_battle_log("{name} raises its guard!", name=self.enemy['name'])
+            return
+        
         damage = self.calculate_damage(self.enemy, self.character)
         self.apply_damage(self.character, damage)
-        display_battle_log(f"{self.enemy['name']} attacks for {damage} damage!")
+        self.events.record(self.turn_counter + 1, 'enemy', 'attack', damage, self.character['health'])
+        if self.verbose:
+            display_battle_log("{name} attacks for {damage} damage!",
+                               name=self.enemy['name'], damage=damage)
     
     def calculate_damage(self, attacker, defender):
         """
@@ -203,16 +887,17 @@ class SimpleBattle:
         
         Returns: Integer damage amount
         """
-        damage = attacker['strength'] - (defender['strength'] // 4)
-        return max(1, damage)
+        return calculate_attack_damage(attacker, defender)
     
     def apply_damage(self, target, damage):
         """
         Apply damage to a character or enemy
         
-        Reduces health, prevents negative health
+        Reduces health, prevents negative health. Shields absorb damage first.
+        
+        Returns: Health actually lost
         """
-        target['health'] = max(0, target['health'] - damage)
+        return self.effects.apply_damage(target, damage)
     
     def check_battle_end(self):
         """
@@ -234,83 +919,267 @@ class SimpleBattle:
         
         Returns: True if escaped, False if failed
         """
-        return random.random() < 0.5
+        return self.rng.random() < ESCAPE_CHANCE
 
 # ============================================================================
 # SPECIAL ABILITIES
 # ============================================================================
 
-def use_special_ability(character, enemy):
+# Ability data file, resolved next to this module like ENEMY_FILE
+ABILITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'abilities.txt')
+
+# Built-in abilities used when the ability data file is missing
+DEFAULT_ABILITY_DATA = {
+    'Warrior': {'class': 'Warrior', 'name': 'Power Strike', 'stat': 'strength',
+                'multiplier': 2, 'defense_divisor': 4, 'hit_chance': 1.0, 'heal': 0,
+                'cooldown': 1, 'message': "Warrior uses Power Strike for {damage} damage!"},
+    'Mage': {'class': 'Mage', 'name': 'Fireball', 'stat': 'magic',
+             'multiplier': 2, 'defense_divisor': 0, 'hit_chance': 1.0, 'heal': 0,
+             'cooldown': 1, 'message': "Mage casts Fireball for {damage} damage!",
+             'dot_damage': 5, 'dot_turns': 2},
+    'Rogue': {'class': 'Rogue', 'name': 'Critical Strike', 'stat': 'strength',
+              'multiplier': 3, 'defense_divisor': 4, 'hit_chance': 0.5, 'heal': 0,
+              'cooldown': 0, 'message': "Rogue lands Critical Strike for {damage} damage!",
+              'miss_message': "Rogue's attack missed!"},
+    'Cleric': {'class': 'Cleric', 'name': 'Heal', 'stat': 'NONE',
+               'multiplier': 0, 'defense_divisor': 0, 'hit_chance': 1.0, 'heal': 30,
+               'cooldown': 2, 'message': "Cleric heals for {healed} health!"}
+}
+
+# Read-only ability data {class: ability} and compiled handlers {class: function}
+ABILITY_TEMPLATES = {}
+ABILITY_HANDLERS = {}
+
+def load_ability_registry(filename=None):
     """
-    Use character's class-specific special ability
+    Rebuild the special ability registry from an ability data file
     
-    Example abilities by class:
-    - Warrior: Power Strike (2x strength damage)
-    - Mage: Fireball (2x magic damage)
-    - Rogue: Critical Strike (3x strength damage, 50% chance)
-    - Cleric: Heal (restore 30 health)
+    Args:
+        filename: Ability data file (default: ABILITY_FILE). If the default
+                  file is missing the built-in abilities are used instead.
     
-    Returns: String describing what happened
-    Raises: AbilityOnCooldownError if ability was used recently
+    Returns: The ABILITY_TEMPLATES dictionary
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
     """
-    character_class = character['class']
-    
-    if character_class == 'Warrior':
-        return warrior_power_strike(character, enemy)
-    elif character_class == 'Mage':
-        return mage_fireball(character, enemy)
-    elif character_class == 'Rogue':
-        return rogue_critical_strike(character, enemy)
-    elif character_class == 'Cleric':
-        return cleric_heal(character)
-    else:
-        return "Unknown ability!"
-
-def warrior_power_strike(character, enemy):
-    """Warrior special ability"""
-    damage = character['strength'] * 2 - (enemy['strength'] // 4)
-    damage = max(1, damage)
-    enemy['health'] = max(0, enemy['health'] - damage)
-    return f"Warrior uses Power Strike for {damage} damage!"
-
-def mage_fireball(character, enemy):
-    """Mage special ability"""
-    damage = character['magic'] * 2
-    damage = max(1, damage)
-    enemy['health'] = max(0, enemy['health'] - damage)
-    return f"Mage casts Fireball for {damage} damage!"
-
-def rogue_critical_strike(character, enemy):
-    """Rogue special ability"""
-    if random.random() < 0.5:
-        damage = character['strength'] * 3 - (enemy['strength'] // 4)
-        damage = max(1, damage)
-        enemy['health'] = max(0, enemy['health'] - damage)
-        return f"Rogue lands Critical Strike for {damage} damage!"
+    if filename is None:
+        try:
+            ability_data = game_data.load_abilities(ABILITY_FILE)
+        except MissingDataFileError:
+            ability_data = DEFAULT_ABILITY_DATA
     else:
-        return "Rogue's attack missed!"
-
-def cleric_heal(character):
-    """Cleric special ability"""
-    healed = min(30, character['max_health'] - character['health'])
-    character['health'] = min(character['health'] + 30, character['max_health'])
-    return f"Cleric heals for {healed} health!"
-
-# ============================================================================
-# COMBAT UTILITIES
-# ============================================================================
+        ability_data = game_data.load_abilities(filename)
+    
+    ABILITY_TEMPLATES.clear()
+    ABILITY_HANDLERS.clear()
+    for ability in ability_data.values():
+        register_ability(ability)
+    
+    return ABILITY_TEMPLATES
 
-def can_character_fight(character):
+def register_ability(ability_data):
     """
-    Check if character is in condition to fight
+    Add or replace the special ability of one character class
     
-    Returns: True if health > 0 and not in battle
+    Args:
+        ability_data: Dictionary in the data/abilities.txt format
+    
+    Returns: The stored read-only ability data
+    Raises: InvalidDataFormatError if ability data is invalid
     """
-    return character['health'] > 0
+    game_data.validate_ability_data(ability_data)
+    
+    template = dict(ability_data)
+    template.setdefault('miss_message', f"{template['name']} missed!")
+    
+    ABILITY_TEMPLATES[template['class']] = types.MappingProxyType(template)
+    ABILITY_HANDLERS[template['class']] = compile_ability(template)
+    return ABILITY_TEMPLATES[template['class']]
 
-def get_victory_rewards(enemy):
+def compile_ability(ability):
     """
-    Calculate rewards for defeating enemy
+    Turn ability data into a function(character, enemy, rng, effects) -> outcome
+    
+    All lookups into the ability data happen here, once, so using the
+    ability only touches the character and enemy. When an EffectTracker is
+    passed as effects, damage goes through its shields and a hit starts the
+    ability's damage over time on the enemy. The outcome is the dictionary
+    described in resolve_special_ability; its message is left unformatted
+    so headless battles never build strings.
+    """
+    stat = ability['stat']
+    multiplier = ability['multiplier']
+    defense_divisor = ability['defense_divisor']
+    hit_chance = ability['hit_chance']
+    heal = ability['heal']
+    message = ability['message']
+    miss_message = ability['miss_message']
+    dot_damage = ability.get('dot_damage', 0)
+    dot_turns = ability.get('dot_turns', 0)
+    missed_damage = 0 if multiplier > 0 else None
+    missed_heal = 0 if heal > 0 else None
+    
+    def use(character, enemy, rng=None, effects=None):
+        if hit_chance < 1.0:
+            if rng is None:
+                rng = random
+            if rng.random() >= hit_chance:
+                return {'template': miss_message, 'values': {'name': character['name']},
+                        'damage': missed_damage, 'healed': missed_heal}
+        
+        damage = None
+        if multiplier > 0:
+            damage = _ability_damage(character, enemy, stat, multiplier, defense_divisor)
+            if effects is None:
+                apply_damage_to(enemy, damage)
+            else:
+                effects.apply_damage(enemy, damage)
+                if dot_damage > 0:
+                    effects.add_damage_over_time(effects.key_of(enemy), dot_damage, dot_turns)
+        
+        healed = None
+        if heal > 0:
+            healed = heal_amount(character, heal)
+        
+        return {'template': message,
+                'values': {'name': character['name'], 'damage': damage or 0, 'healed': healed or 0},
+                'damage': damage, 'healed': healed}
+    
+    return use
+
+def use_special_ability(character, enemy, rng=None, effects=None, owner=None):
+    """
+    Use character's class-specific special ability
+    
+    See resolve_special_ability for the arguments.
+    
+    Returns: String describing what happened
+    Raises: AbilityOnCooldownError if ability was used recently
+    """
+    return describe_outcome(resolve_special_ability(character, enemy, rng, effects, owner))
+
+def resolve_special_ability(character, enemy, rng=None, effects=None, owner=None):
+    """
+    Use character's class-specific special ability and report its effect
+    
+    Abilities come from the ability registry (data/abilities.txt):
+    - Warrior: Power Strike (2x strength damage)
+    - Mage: Fireball (2x magic damage, then 5 damage at the end of 2 turns)
+    - Rogue: Critical Strike (3x strength damage, 50% chance)
+    - Cleric: Heal (restore 30 health)
+    
+    rng is the random stream used by chance-based abilities
+    (default: the global random module)
+    
+    Cooldowns, shields and damage over time are applied when an
+    EffectTracker is passed as effects; owner is the key the cooldown is stored under (default: the
+    character's name).
+    
+    Returns: Dictionary with:
+            'template', 'values': Message describing what happened, formatted
+                                  with describe_outcome only when displayed
+            'damage': Damage dealt to enemy (None if the ability deals no damage)
+            'healed': Health restored to character (None if the ability does not heal)
+    Raises: AbilityOnCooldownError if ability was used recently
+    """
+    character_class = character['class']
+    handler = ABILITY_HANDLERS.get(character_class)
+    if handler is None:
+        return {'template': "Unknown ability!", 'values': {}, 'damage': None, 'healed': None}
+    
+    if owner is None:
+        owner = character['name']
+    
+    if effects is None:
+        result = handler(character, enemy, rng)
+    else:
+        effects.check_cooldown(owner, character_class)
+        result = handler(character, enemy, rng, effects)
+        effects.start_cooldown(owner, character_class, ABILITY_TEMPLATES[character_class]['cooldown'])
+    
+    return result
+
+def describe_outcome(outcome):
+    """Format the message of an ability outcome"""
+    return outcome['template'].format(**outcome['values'])
+
+def heal_amount(character, amount):
+    """
+    Restore up to amount health without exceeding max_health
+    
+    Returns: Health actually restored
+    """
+    healed = max(0, min(amount, character['max_health'] - character['health']))
+    character['health'] += healed
+    return healed
+
+def warrior_power_strike(character, enemy):
+    """Warrior special ability"""
+    return describe_outcome(ABILITY_HANDLERS['Warrior'](character, enemy))
+
+def mage_fireball(character, enemy):
+    """Mage special ability"""
+    return describe_outcome(ABILITY_HANDLERS['Mage'](character, enemy))
+
+def rogue_critical_strike(character, enemy, rng=None):
+    """Rogue special ability"""
+    return describe_outcome(ABILITY_HANDLERS['Rogue'](character, enemy, rng))
+
+def cleric_heal(character):
+    """Cleric special ability"""
+    return describe_outcome(ABILITY_HANDLERS['Cleric'](character, None))
+
+def _ability_damage(character, enemy, stat, multiplier, defense_divisor):
+    """Damage from a stat-scaled ability (0 for abilities that deal no damage)"""
+    if multiplier <= 0:
+        return 0
+    damage = character[stat] * multiplier
+    if defense_divisor > 0:
+        damage -= enemy['strength'] // defense_divisor
+    return max(1, damage)
+
+def _ability_profile(character_class):
+    """
+    Hashable summary of a class's ability for simulation and prediction
+    
+    Returns: Tuple (stat, multiplier, defense_divisor, hit_chance, heal, cooldown,
+                    dot_damage, dot_turns)
+    """
+    ability = ABILITY_TEMPLATES.get(character_class)
+    if ability is None:
+        return (None, 0, 0, 1.0, 0, 0, 0, 0)
+    return (ability['stat'], ability['multiplier'], ability['defense_divisor'],
+            ability['hit_chance'], ability['heal'], ability['cooldown'],
+            ability.get('dot_damage', 0), ability.get('dot_turns', 0))
+
+load_ability_registry()
+
+# ============================================================================
+# COMBAT UTILITIES
+# ============================================================================
+
+def can_character_fight(character):
+    """
+    Check if character is in condition to fight
+    
+    Returns: True if health > 0 and not in battle
+    """
+    return character['health'] > 0
+
+def calculate_attack_damage(attacker, defender):
+    """
+    Calculate basic attack damage
+    
+    Damage formula: attacker['strength'] - (defender['strength'] // 4)
+    Minimum damage: 1
+    
+    Returns: Integer damage amount
+    """
+    damage = attacker['strength'] - (defender['strength'] // 4)
+    return max(1, damage)
+
+def get_victory_rewards(enemy):
+    """
+    Calculate rewards for defeating enemy
     
     Returns: Dictionary with 'xp' and 'gold'
     """
@@ -328,12 +1197,1325 @@ def display_combat_stats(character, enemy):
     print(f"\n{character['name']}: HP={character['health']}/{character['max_health']}")
     print(f"{enemy['name']}: HP={enemy['health']}/{enemy['max_health']}")
 
-def display_battle_log(message):
+def display_battle_log(message, **values):
     """
     Display a formatted battle message
+    
+    message may be a template filled in from values, so callers only pay
+    for formatting when something is actually displayed.
     """
+    if values:
+        message = message.format(**values)
     print(f">>> {message}")
 
+# ============================================================================
+# ENEMY AI
+# ============================================================================
+
+# Actions an enemy AI can choose from
+ENEMY_ACTIONS = ['attack', 'guard']
+
+# Guard shields last through the player's next action, and an enemy
+# cannot guard two turns in a row (so battles always make progress)
+ENEMY_GUARD_TURNS = 2
+ENEMY_GUARD_COOLDOWN = 1
+
+# Default search limits for ExpectimaxAI
+DEFAULT_SEARCH_DEPTH = 6
+DEFAULT_SEARCH_BUDGET = 0.005
+
+# Stored positions before the transposition table is cleared
+TRANSPOSITION_TABLE_SIZE = 100000
+
+class _SearchTimeout(Exception):
+    """Raised inside ExpectimaxAI when the per-turn time budget runs out"""
+    pass
+
+class ExpectimaxAI:
+    """
+    Enemy AI that searches a few turns ahead before choosing an action
+    
+    The search uses the same damage formulas as the battle. The player is
+    assumed to follow the simulator's 'special' policy, and hit chances
+    become chance nodes. Positions past the search horizon are scored
+    exactly by the battle predictor as if the enemy attacked from then on,
+    so the AI never does worse than always attacking against that player.
+    A position is the tuple (player_health, enemy_health, cooldown,
+    guarded, burning, depth), where burning counts the damage over time
+    ticks the enemy still takes; searched values are kept in a transposition table
+    that survives between turns of the same matchup. The search deepens
+    one turn at a time until max_depth or the time budget is reached. It
+    then returns the choice from the deepest search that finished.
+    """
+    
+    def __init__(self, max_depth=DEFAULT_SEARCH_DEPTH, time_budget=DEFAULT_SEARCH_BUDGET):
+        """
+        Create the AI
+        
+        Args:
+            max_depth: Most enemy turns to look ahead
+            time_budget: Seconds allowed per decision (None for no limit)
+        """
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.table = {}
+        self.matchup = None
+        self.deadline = None
+        self.depth_reached = 0
+    
+    def choose_action(self, battle):
+        """
+        Pick the enemy's action for this turn
+        
+        Returns: 'attack' or 'guard'
+        """
+        character = battle.character
+        enemy = battle.enemy
+        matchup = self._describe_matchup(character, enemy)
+        if matchup != self.matchup or len(self.table) > TRANSPOSITION_TABLE_SIZE:
+            self.matchup = matchup
+            self.table = {}
+        
+        cooldown = max(0, battle.effects.cooldown_remaining('player', character['class']) - 1)
+        guarded = battle.effects.cooldown_remaining('enemy', 'guard') > 0
+        burning = battle.effects.damage_over_time_remaining('enemy')
+        state = (character['health'], enemy['health'], cooldown, guarded, burning)
+        
+        self.deadline = None
+        if self.time_budget is not None:
+            self.deadline = time.perf_counter() + self.time_budget
+        
+        best = 'attack'
+        self.depth_reached = 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best = self._best_action(state, depth)[1]
+            except _SearchTimeout:
+                break
+            self.depth_reached = depth
+        return best
+    
+    def _describe_matchup(self, character, enemy):
+        """
+        Precompute everything the search needs that stays fixed in a battle
+        
+        Classes without an ability are modelled with a 'special' that is
+        just a basic attack, so every player turn follows the same rules.
+        """
+        profile = _ability_profile(character['class'])
+        attack_damage = calculate_attack_damage(character, enemy)
+        if profile[0] is None:
+            profile = (None, 1, 0, 1.0, 0, 0, 0, 0)
+            special_damage = attack_damage
+        else:
+            special_damage = _ability_damage(character, enemy, *profile[:3])
+        return (profile, attack_damage, calculate_attack_damage(enemy, character),
+                special_damage, enemy['strength'], character['max_health'])
+    
+    def _best_action(self, state, depth):
+        """Return (value, action) for the enemy's best move from state"""
+        best_value = None
+        best_action = 'attack'
+        for action in ENEMY_ACTIONS:
+            if action == 'guard' and state[3]:
+                continue
+            value = self._action_value(state, action, depth)
+            if best_value is None or value > best_value:
+                best_value = value
+                best_action = action
+        return best_value, best_action
+    
+    def _value(self, state, depth):
+        """Value of a position where the enemy is about to act"""
+        player_health, enemy_health, cooldown, guarded, burning = state
+        if enemy_health <= 0:
+            return -1.0 - self._health_left(player_health)
+        
+        key = (player_health, enemy_health, cooldown, guarded, burning, depth)
+        value = self.table.get(key)
+        if value is None:
+            if depth == 0:
+                value = self._attack_only_value(player_health, enemy_health, cooldown, burning)
+            else:
+                value = self._best_action(state, depth)[0]
+            self.table[key] = value
+        return value
+    
+    def _health_left(self, player_health):
+        """Small tie-breaker favouring positions where the player is more hurt"""
+        return 0.01 * max(0, player_health) / self.matchup[5]
+    
+    def _attack_only_value(self, player_health, enemy_health, cooldown, burning):
+        """
+        Exact value of a position past the search horizon if the enemy
+        attacks from then on (loss probability minus win probability for
+        the player), computed with the battle predictor
+        """
+        profile, attack_damage, enemy_damage, special_damage, _, player_max = self.matchup
+        player_health -= enemy_damage
+        if burning > 0:
+            enemy_health -= profile[6]
+            burning -= 1
+            if enemy_health <= 0:
+                return -1.0 - self._health_left(player_health)
+        if player_health <= 0:
+            return 1.0
+        win, loss = _predict_special(profile, player_health, player_max, enemy_health,
+                                     attack_damage, special_damage, enemy_damage,
+                                     DEFAULT_MAX_TURNS, cooldown, burning)[:2]
+        return loss - win - self._health_left(player_health)
+    
+    def _action_value(self, state, action, depth):
+        """Expected value of the enemy taking action, then the player replying"""
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise _SearchTimeout()
+        
+        profile, attack_damage, enemy_damage, special_damage, guard, player_max = self.matchup
+        _, _, _, hit_chance, heal, ability_cooldown, dot_damage, dot_turns = profile
+        player_health, enemy_health, cooldown, _, burning = state
+        guarded = action == 'guard'
+        
+        shield = 0
+        if guarded:
+            shield = guard
+        else:
+            player_health -= enemy_damage
+        
+        if burning > 0:
+            enemy_health -= dot_damage
+            burning -= 1
+            if enemy_health <= 0:
+                return -1.0 - self._health_left(player_health)
+        if player_health <= 0:
+            return 1.0
+        
+        if cooldown == 0:
+            healed = min(heal, player_max - player_health)
+            hit = (player_health + healed, enemy_health - max(0, special_damage - shield),
+                   ability_cooldown, guarded, dot_turns if dot_damage > 0 else burning)
+            outcomes = [(hit_chance, hit)]
+            if hit_chance < 1.0:
+                outcomes.append((1.0 - hit_chance, (player_health, enemy_health, ability_cooldown,
+                                                    guarded, burning)))
+        else:
+            outcomes = [(1.0, (player_health, enemy_health - max(0, attack_damage - shield),
+                               cooldown - 1, guarded, burning))]
+        
+        return sum(chance * self._value(outcome, depth - 1) for chance, outcome in outcomes)
+
+# ============================================================================
+# BATTLE SCHEDULING
+# ============================================================================
+
+# Seconds a player has to choose an action before the default is used
+DEFAULT_TURN_TIMEOUT = 30.0
+
+class BattleScheduler:
+    """
+    Drive many SimpleBattle instances on a single asyncio event loop
+    
+    Each battle runs as a lightweight task that waits for the player's
+    action, plays one turn and yields back to the loop, so thousands of
+    battles can share one thread. Actions come either from submit_action
+    (e.g. a network handler) or from an async action source per battle.
+    """
+    
+    def __init__(self, turn_timeout=DEFAULT_TURN_TIMEOUT, default_action='1'):
+        """
+        Create a scheduler
+        
+        Args:
+            turn_timeout: Seconds to wait for an action (None waits forever)
+            default_action: Action taken when a turn times out ('1' attacks)
+        """
+        self.turn_timeout = turn_timeout
+        self.default_action = default_action
+        self.sessions = {}
+        self.next_battle_id = 1
+    
+    def start(self, battle, action_source=None):
+        """
+        Schedule a battle on the running event loop
+        
+        Args:
+            battle: SimpleBattle to drive (usually created with verbose=False)
+            action_source: Optional async function(battle) returning the next
+                           action. If not given, actions are read from
+                           submit_action.
+        
+        Returns: Integer battle id
+        Raises: CharacterDeadError if character is already dead
+        """
+        battle.begin()
+        
+        battle_id = self.next_battle_id
+        self.next_battle_id += 1
+        
+        actions = asyncio.Queue()
+        if action_source is None:
+            action_source = lambda battle: actions.get()
+        
+        task = asyncio.get_running_loop().create_task(self._drive(battle, action_source))
+        self.sessions[battle_id] = {'battle': battle, 'actions': actions, 'task': task}
+        return battle_id
+    
+    def submit_action(self, battle_id, action):
+        """
+        Queue the player's next action for a battle
+        
+        Raises:
+            InvalidTargetError if battle_id is unknown
+            CombatNotActiveError if the battle already ended
+        """
+        session = self.sessions.get(battle_id)
+        if session is None:
+            raise InvalidTargetError(f"Unknown battle: {battle_id}")
+        if not session['battle'].combat_active:
+            raise CombatNotActiveError("Combat is not active")
+        session['actions'].put_nowait(action)
+    
+    async def wait(self, battle_id):
+        """
+        Wait for a battle to finish and forget it
+        
+        Returns: Battle result dictionary
+        Raises: InvalidTargetError if battle_id is unknown
+        """
+        session = self.sessions.get(battle_id)
+        if session is None:
+            raise InvalidTargetError(f"Unknown battle: {battle_id}")
+        try:
+            return await session['task']
+        finally:
+            self.sessions.pop(battle_id, None)
+    
+    async def wait_all(self):
+        """
+        Wait for every scheduled battle to finish
+        
+        Returns: Dictionary {battle_id: result}
+        """
+        battle_ids = list(self.sessions)
+        results = await asyncio.gather(*(self.wait(battle_id) for battle_id in battle_ids))
+        return dict(zip(battle_ids, results))
+    
+    def active_count(self):
+        """Return the number of battles still in progress"""
+        count = 0
+        for session in self.sessions.values():
+            if not session['task'].done():
+                count += 1
+        return count
+    
+    async def _drive(self, battle, action_source):
+        """Play turns until the battle ends"""
+        while battle.combat_active:
+            try:
+                action = await asyncio.wait_for(action_source(battle), self.turn_timeout)
+            except asyncio.TimeoutError:
+                action = self.default_action
+            try:
+                battle.take_turn(action)
+            except AbilityOnCooldownError:
+                battle.take_turn('1')
+        return battle.result
+
+# ============================================================================
+# PARTY BATTLES
+# ============================================================================
+
+# Targeting rules understood by PartyBattle
+TARGETING_RULES = ['lowest_health', 'highest_threat']
+
+# Rounds before a party battle ends as a timeout
+DEFAULT_MAX_ROUNDS = 100
+
+class TargetIndex:
+    """
+    Priority index of living combatants with lazy updates
+    
+    Updating a score pushes a new heap entry instead of searching for the
+    old one; outdated entries are skipped when the best target is read.
+    Both operations are O(log n), so picking a target stays cheap as the
+    number of combatants grows.
+    """
+    
+    def __init__(self):
+        """Create an empty index"""
+        self.heap = []
+        self.scores = {}
+        self.pushes = 0
+    
+    def update(self, key, score):
+        """Set the score of key (lower scores come first)"""
+        self.scores[key] = score
+        heapq.heappush(self.heap, (score, self.pushes, key))
+        self.pushes += 1
+        if len(self.heap) > 4 * len(self.scores) + 16:
+            self._compact()
+    
+    def remove(self, key):
+        """Remove key from the index"""
+        self.scores.pop(key, None)
+    
+    def best(self):
+        """Return the key with the lowest score, or None if the index is empty"""
+        while self.heap:
+            score, pushed, key = self.heap[0]
+            if self.scores.get(key) == score:
+                return key
+            heapq.heappop(self.heap)
+        return None
+    
+    def _compact(self):
+        """Drop outdated entries so the heap stays proportional to its size"""
+        self.heap = [(score, pushed, key) for score, pushed, key in self.heap
+                     if self.scores.get(key) == score]
+        heapq.heapify(self.heap)
+
+class PartyBattle:
+    """
+    Headless combat between a party of characters and a group of enemies
+    
+    Every round, living combatants act in initiative order taken from a
+    priority queue. Party members use their special ability when it is
+    ready and attack otherwise (healers only heal once they are hurt);
+    enemies always attack. Targets are chosen
+    from per-side TargetIndex objects that are updated only when health or
+    threat changes, so a turn costs O(log n) for n combatants.
+    """
+    
+    def __init__(self, party, enemies, rng=None, seed=None, verbose=False,
+                 party_targeting='lowest_health', enemy_targeting='highest_threat',
+                 max_rounds=DEFAULT_MAX_ROUNDS):
+        """
+        Set up a party battle
+        
+        Args:
+            party: List of character dictionaries
+            enemies: List of enemy dictionaries
+            rng: Random stream (default: new BattleRNG)
+            seed: Seed for the new BattleRNG when rng is not given
+            verbose: Print battle messages
+            party_targeting: Rule party members use to pick enemies
+            enemy_targeting: Rule enemies use to pick party members
+            max_rounds: Round limit before the battle ends as a timeout
+        
+        Raises: InvalidTargetError if a side is empty or a rule is unknown
+        """
+        if not party or not enemies:
+            raise InvalidTargetError("Both sides need at least one combatant")
+        for rule in [party_targeting, enemy_targeting]:
+            if rule not in TARGETING_RULES:
+                raise InvalidTargetError(f"Unknown targeting rule: {rule}")
+        
+        if rng is None:
+            rng = BattleRNG(seed)
+        self.rng = rng
+        self.verbose = verbose
+        self.max_rounds = max_rounds
+        self.targeting = {'party': party_targeting, 'enemies': enemy_targeting}
+        self.combat_active = False
+        self.round_counter = 0
+        self.result = None
+        
+        self.combatants = {}
+        self.sides = {}
+        self.initiative = {}
+        self.threat = {}
+        self.alive = {'party': 0, 'enemies': 0}
+        self.health_index = {'party': TargetIndex(), 'enemies': TargetIndex()}
+        self.threat_index = {'party': TargetIndex(), 'enemies': TargetIndex()}
+        self.effects = EffectTracker()
+        
+        for side, members in [('party', party), ('enemies', enemies)]:
+            for position, combatant in enumerate(members):
+                self._add_combatant(f"{side}:{position}", side, combatant)
+    
+    def start_battle(self):
+        """
+        Run rounds until one side is defeated
+        
+        Returns: Dictionary with battle results:
+                {'winner': 'player'|'enemy'|'timeout', 'xp_gained': int,
+                 'gold_gained': int, 'rounds': int}
+        Raises: CharacterDeadError if every party member is already dead
+        """
+        self.begin()
+        while self.combat_active:
+            self.play_round()
+        return self.result
+    
+    def begin(self):
+        """
+        Mark the battle as started
+        
+        Raises: CharacterDeadError if every party member is already dead
+        """
+        if self.alive['party'] == 0:
+            raise CharacterDeadError("Every party member is dead")
+        self.combat_active = True
+        self.round_counter = 0
+        self.result = None
+    
+    def play_round(self):
+        """
+        Let every living combatant act once, highest initiative first
+        
+        Returns: Battle result dictionary if the battle ended, otherwise None
+        Raises: CombatNotActiveError if called outside of battle
+        """
+        if not self.combat_active:
+            raise CombatNotActiveError("Combat is not active")
+        
+        turn_order = [(-self.initiative[key], position, key)
+                      for position, key in enumerate(self.combatants)
+                      if self.is_alive(key)]
+        heapq.heapify(turn_order)
+        
+        while turn_order and self.combat_active:
+            key = heapq.heappop(turn_order)[2]
+            if self.is_alive(key):
+                self._act(key)
+        
+        if self.combat_active:
+            for key, damage in self.effects.advance_turn():
+                if damage == 0:
+                    continue
+                if self.verbose:
+                    display_battle_log("{name} takes {damage} damage over time!",
+                                       name=self.combatants[key]['name'], damage=damage)
+                self._health_changed(key)
+        
+        self.round_counter += 1
+        self._check_battle_end()
+        return self.result
+    
+    def is_alive(self, key):
+        """Return True if the combatant with this key can still act"""
+        return key in self.health_index[self.sides[key]].scores
+    
+    def choose_target(self, side):
+        """
+        Pick a living target on side using that side's attackers' rule
+        
+        Returns: Combatant key, or None if side has no living combatants
+        """
+        attacker_side = 'enemies' if side == 'party' else 'party'
+        if self.targeting[attacker_side] == 'lowest_health':
+            return self.health_index[side].best()
+        return self.threat_index[side].best()
+    
+    def _add_combatant(self, key, side, combatant):
+        """Register a combatant in every index"""
+        self.combatants[key] = combatant
+        self.sides[key] = side
+        self.initiative[key] = combatant['strength'] + self.rng.randrange(6)
+        self.threat[key] = 0
+        self.effects.register(key, combatant)
+        if combatant['health'] > 0:
+            self.alive[side] += 1
+            self.health_index[side].update(key, combatant['health'])
+            self.threat_index[side].update(key, 0)
+    
+    def _act(self, key):
+        """Perform one combatant's action against the best target"""
+        side = self.sides[key]
+        target_key = self.choose_target('enemies' if side == 'party' else 'party')
+        attacker = self.combatants[key]
+        target = self.combatants[target_key]
+        
+        target_health = target['health']
+        outcome = None
+        
+        if side == 'party' and self._wants_special(attacker):
+            try:
+                outcome = resolve_special_ability(attacker, target, self.rng, self.effects, key)
+            except AbilityOnCooldownError:
+                outcome = None
+        
+        if outcome is None:
+            damage = calculate_attack_damage(attacker, target)
+            self.effects.apply_damage(target, damage)
+            healed = 0
+            if self.verbose:
+                display_battle_log("{name} attacks {target} for {damage} damage!",
+                                   name=attacker['name'], target=target['name'], damage=damage)
+        else:
+            healed = outcome['healed'] or 0
+            if self.verbose:
+                display_battle_log(outcome['template'], **outcome['values'])
+        
+        dealt = target_health - target['health']
+        if dealt + healed > 0:
+            self.threat[key] += dealt + healed
+            self.threat_index[side].update(key, -self.threat[key])
+        
+        self._health_changed(target_key)
+        if healed:
+            self._health_changed(key)
+        self._check_battle_end()
+    
+    def _wants_special(self, character):
+        """Return True if the character's ability is worth using right now"""
+        ability = ABILITY_TEMPLATES.get(character['class'])
+        if ability is None:
+            return False
+        if ability['heal'] > 0 and ability['multiplier'] == 0:
+            return character['health'] < character['max_health']
+        return True
+    
+    def _health_changed(self, key):
+        """Refresh a combatant's health index entry or mark it defeated"""
+        side = self.sides[key]
+        combatant = self.combatants[key]
+        if not self.is_alive(key):
+            return
+        if combatant['health'] <= 0:
+            self.health_index[side].remove(key)
+            self.threat_index[side].remove(key)
+            self.alive[side] -= 1
+            if self.verbose:
+                display_battle_log("{name} is defeated!", name=combatant['name'])
+        else:
+            self.health_index[side].update(key, combatant['health'])
+    
+    def _check_battle_end(self):
+        """Set the result once a side is wiped out or the round limit is hit"""
+        if not self.combat_active:
+            return
+        
+        if self.alive['enemies'] == 0:
+            xp = 0
+            gold = 0
+            for key, side in self.sides.items():
+                if side == 'enemies':
+                    rewards = get_victory_rewards(self.combatants[key])
+                    xp += rewards['xp']
+                    gold += rewards['gold']
+            self.result = {'winner': 'player', 'xp_gained': xp, 'gold_gained': gold}
+        elif self.alive['party'] == 0:
+            self.result = {'winner': 'enemy', 'xp_gained': 0, 'gold_gained': 0}
+        elif self.round_counter >= self.max_rounds:
+            self.result = {'winner': 'timeout', 'xp_gained': 0, 'gold_gained': 0}
+        else:
+            return
+        
+        self.result['rounds'] = self.round_counter
+        self.combat_active = False
+        self.effects.clear()
+
+# ============================================================================
+# BATTLE SIMULATION
+# ============================================================================
+
+# Player policies understood by the simulator
+SIMULATION_POLICIES = ['attack', 'special', 'escape']
+
+# Battles still running after this many turns are counted as timeouts
+DEFAULT_MAX_TURNS = 100
+
+def simulate_battles(character, enemy, policy='attack', n_battles=1000,
+                     max_turns=DEFAULT_MAX_TURNS, seed=None):
+    """
+    Simulate many headless battles between one character and one enemy
+    
+    Args:
+        character: Character dictionary (not modified)
+        enemy: Enemy dictionary (not modified)
+        policy: 'attack', 'special' or 'escape' - the action taken every turn
+                ('special' attacks while the ability is on cooldown)
+        n_battles: Number of battles to simulate
+        max_turns: Turn limit before a battle counts as a timeout
+        seed: Optional seed for reproducible results
+    
+    Returns: Statistics dictionary (see simulate_matchups)
+    Raises: ValueError if policy is not recognized
+    """
+    return simulate_matchups([(character, enemy)], policy, n_battles, max_turns, seed)[0]
+
+def simulate_matchups(matchups, policy='attack', n_battles=1000,
+                      max_turns=DEFAULT_MAX_TURNS, seed=None):
+    """
+    Simulate n_battles for every (character, enemy) pair in matchups
+    
+    Uses NumPy arrays to run every battle of every matchup in lock-step
+    when NumPy is installed, otherwise falls back to a plain Python loop.
+    
+    Battles follow SimpleBattle rules: the player acts, then the enemy
+    attacks (even if it was just defeated), then the battle end is checked.
+    
+    Returns: List of statistics dictionaries, one per matchup:
+            {'battles', 'wins', 'losses', 'escapes', 'timeouts',
+             'win_rate', 'average_turns', 'turn_counts',
+             'expected_xp', 'expected_gold'}
+            turn_counts maps battle length in turns to number of battles
+    Raises: ValueError if policy is not recognized
+    """
+    if policy not in SIMULATION_POLICIES:
+        raise ValueError(f"Unknown simulation policy: {policy}")
+    
+    if np is not None:
+        results = _simulate_vectorized(matchups, policy, n_battles, max_turns, seed)
+    else:
+        results = _simulate_sequential(matchups, policy, n_battles, max_turns, seed)
+    
+    statistics = []
+    for (character, enemy), (outcomes, turn_counts) in zip(matchups, results):
+        statistics.append(_battle_statistics(enemy, n_battles, outcomes, turn_counts))
+    return statistics
+
+def simulate_balance_grid(levels, character_classes=None, enemy_types=None,
+                          policy='attack', n_battles=1000,
+                          max_turns=DEFAULT_MAX_TURNS, seed=None):
+    """
+    Sweep simulated battles across levels, classes and enemy types
+    
+    Characters are built with create_character and levelled up through
+    gain_experience so they follow the real progression curve.
+    
+    Args:
+        levels: Iterable of character levels
+        character_classes: List of class names (default: all four classes)
+        enemy_types: List of enemy types (default: every registered enemy)
+    
+    Returns: Dictionary {(level, character_class, enemy_type): statistics}
+    """
+    if character_classes is None:
+        character_classes = ['Warrior', 'Mage', 'Rogue', 'Cleric']
+    if enemy_types is None:
+        enemy_types = get_enemy_types()
+    
+    keys = []
+    matchups = []
+    for level in levels:
+        for character_class in character_classes:
+            character = build_character_at_level(character_class, level)
+            for enemy_type in enemy_types:
+                keys.append((level, character_class, enemy_type))
+                matchups.append((character, create_enemy(enemy_type)))
+    
+    statistics = simulate_matchups(matchups, policy, n_battles, max_turns, seed)
+    return dict(zip(keys, statistics))
+
+def build_character_at_level(character_class, level, name=None):
+    """
+    Create a character of the given class and level it up to level
+    
+    Returns: Character dictionary
+    Raises: InvalidCharacterClassError if class is not valid
+    """
+    if name is None:
+        name = f"{character_class}{level}"
+    character = character_manager.create_character(name, character_class)
+    while character['level'] < level:
+        character_manager.gain_experience(character, character['level'] * 100)
+    return character
+
+def _battle_statistics(enemy, n_battles, outcomes, turn_counts):
+    """Summarize raw outcome and turn counts for one matchup"""
+    total_turns = 0
+    for turns, count in turn_counts.items():
+        total_turns += turns * count
+    
+    win_rate = outcomes['player'] / n_battles if n_battles else 0.0
+    return {
+        'battles': n_battles,
+        'wins': outcomes['player'],
+        'losses': outcomes['enemy'],
+        'escapes': outcomes['escaped'],
+        'timeouts': outcomes['timeout'],
+        'win_rate': win_rate,
+        'average_turns': total_turns / n_battles if n_battles else 0.0,
+        'turn_counts': turn_counts,
+        'expected_xp': win_rate * enemy['xp_reward'],
+        'expected_gold': win_rate * enemy['gold_reward']
+    }
+
+def _special_damage(character, enemy):
+    """Damage dealt by a successful special ability (0 for healing abilities)"""
+    stat, multiplier, defense_divisor = _ability_profile(character['class'])[:3]
+    return _ability_damage(character, enemy, stat, multiplier, defense_divisor)
+
+def _simulate_sequential(matchups, policy, n_battles, max_turns, seed):
+    """Pure Python simulation, one battle at a time"""
+    rng = BattleRNG(seed)
+    results = []
+    
+    for character, enemy in matchups:
+        player_damage = max(1, character['strength'] - (enemy['strength'] // 4))
+        enemy_damage = max(1, enemy['strength'] - (character['strength'] // 4))
+        special_damage = _special_damage(character, enemy)
+        hit_chance, heal, cooldown, dot_damage, dot_turns = _ability_profile(character['class'])[3:]
+        
+        outcomes = {'player': 0, 'enemy': 0, 'escaped': 0, 'timeout': 0}
+        turn_counts = {}
+        
+        for _ in range(n_battles):
+            character_health = character['health']
+            enemy_health = enemy['health']
+            outcome = 'timeout'
+            turn = max_turns
+            ready_turn = 1
+            burn_left = 0
+            
+            for current_turn in range(1, max_turns + 1):
+                if policy == 'escape':
+                    if rng.random() < ESCAPE_CHANCE:
+                        outcome = 'escaped'
+                        turn = current_turn
+                        break
+                elif policy == 'special' and current_turn >= ready_turn:
+                    ready_turn = current_turn + cooldown + 1
+                    if hit_chance >= 1.0 or rng.random() < hit_chance:
+                        enemy_health -= special_damage
+                        if heal > 0:
+                            character_health += max(0, min(heal, character['max_health'] - character_health))
+                        if dot_damage > 0:
+                            burn_left = dot_turns
+                else:
+                    enemy_health -= player_damage
+                
+                character_health -= enemy_damage
+                
+                if burn_left > 0:
+                    enemy_health -= dot_damage
+                    burn_left -= 1
+                
+                if enemy_health <= 0:
+                    outcome = 'player'
+                    turn = current_turn
+                    break
+                if character_health <= 0:
+                    outcome = 'enemy'
+                    turn = current_turn
+                    break
+            
+            outcomes[outcome] += 1
+            turn_counts[turn] = turn_counts.get(turn, 0) + 1
+        
+        results.append((outcomes, turn_counts))
+    
+    return results
+
+def _simulate_vectorized(matchups, policy, n_battles, max_turns, seed):
+    """NumPy simulation of every battle of every matchup at once"""
+    rng = np.random.default_rng(seed)
+    n_matchups = len(matchups)
+    matchup_index = np.repeat(np.arange(n_matchups), n_battles)
+    
+    def column(values):
+        return np.array(values, dtype=np.int64)[matchup_index]
+    
+    characters = [character for character, enemy in matchups]
+    enemies = [enemy for character, enemy in matchups]
+    
+    character_health = column([c['health'] for c in characters])
+    character_max_health = column([c['max_health'] for c in characters])
+    enemy_health = column([e['health'] for e in enemies])
+    player_damage = column([max(1, c['strength'] - (e['strength'] // 4)) for c, e in matchups])
+    enemy_damage = column([max(1, e['strength'] - (c['strength'] // 4)) for c, e in matchups])
+    special_damage = column([_special_damage(c, e) for c, e in matchups])
+    profiles = [_ability_profile(c['class']) for c in characters]
+    hit_chance = np.array([profile[3] for profile in profiles])[matchup_index]
+    heal = column([profile[4] for profile in profiles])
+    cooldown = column([profile[5] for profile in profiles])
+    dot_damage = column([profile[6] for profile in profiles])
+    dot_turns = column([profile[7] for profile in profiles])
+    ready_turn = np.ones(matchup_index.size, dtype=np.int64)
+    burn_left = np.zeros(matchup_index.size, dtype=np.int64)
+    
+    # Outcome codes: 0 timeout, 1 player, 2 enemy, 3 escaped
+    outcome = np.zeros(matchup_index.size, dtype=np.int8)
+    turns = np.full(matchup_index.size, max_turns, dtype=np.int64)
+    live = np.arange(matchup_index.size)
+    
+    for current_turn in range(1, max_turns + 1):
+        if live.size == 0:
+            break
+        
+        if policy == 'escape':
+            fled = rng.random(live.size) < ESCAPE_CHANCE
+            outcome[live[fled]] = 3
+            turns[live[fled]] = current_turn
+            live = live[~fled]
+        elif policy == 'special':
+            ready = ready_turn[live] <= current_turn
+            attackers = live[~ready]
+            enemy_health[attackers] -= player_damage[attackers]
+            
+            casters = live[ready]
+            ready_turn[casters] = current_turn + cooldown[casters] + 1
+            chances = hit_chance[casters]
+            uncertain = chances < 1.0
+            if uncertain.any():
+                hit = ~uncertain | (rng.random(casters.size) < chances)
+                casters = casters[hit]
+            enemy_health[casters] -= special_damage[casters]
+            healers = casters[heal[casters] > 0]
+            character_health[healers] += np.maximum(0, np.minimum(heal[healers],
+                                                                  character_max_health[healers] - character_health[healers]))
+            burners = casters[dot_damage[casters] > 0]
+            burn_left[burners] = dot_turns[burners]
+        else:
+            enemy_health[live] -= player_damage[live]
+        
+        character_health[live] -= enemy_damage[live]
+        
+        burning = live[burn_left[live] > 0]
+        enemy_health[burning] -= dot_damage[burning]
+        burn_left[burning] -= 1
+        
+        won = enemy_health[live] <= 0
+        lost = ~won & (character_health[live] <= 0)
+        outcome[live[won]] = 1
+        outcome[live[lost]] = 2
+        turns[live[won | lost]] = current_turn
+        live = live[~(won | lost)]
+    
+    outcome_counts = np.bincount(matchup_index * 4 + outcome,
+                                 minlength=n_matchups * 4).reshape(n_matchups, 4)
+    turn_histogram = np.bincount(matchup_index * (max_turns + 1) + turns,
+                                 minlength=n_matchups * (max_turns + 1)).reshape(n_matchups, max_turns + 1)
+    
+    results = []
+    for i in range(n_matchups):
+        outcomes = {
+            'timeout': int(outcome_counts[i, 0]),
+            'player': int(outcome_counts[i, 1]),
+            'enemy': int(outcome_counts[i, 2]),
+            'escaped': int(outcome_counts[i, 3])
+        }
+        turn_counts = {int(t): int(turn_histogram[i, t]) for t in np.flatnonzero(turn_histogram[i])}
+        results.append((outcomes, turn_counts))
+    
+    return results
+
+# ============================================================================
+# AUTO BATTLE
+# ============================================================================
+
+# Menu choice each simulation policy makes on a normal turn
+POLICY_CHOICES = {'attack': '1', 'special': '2', 'escape': '3'}
+
+def auto_battle(character, enemy, policy='special', rng=None, seed=None):
+    """
+    Resolve a battle instantly with a fixed policy
+    
+    Runs a headless SimpleBattle, so the character and enemy are changed
+    exactly as in an interactive fight. Rewards are not applied (see
+    apply_battle_result).
+    
+    Args:
+        character: Character dictionary
+        enemy: Enemy dictionary
+        policy: 'attack', 'special' or 'escape' (see SIMULATION_POLICIES)
+        rng: Random stream for the battle (default: new BattleRNG)
+        seed: Seed for the new BattleRNG when rng is not given
+    
+    Returns: Battle result dictionary (see SimpleBattle.start_battle)
+    Raises:
+        CharacterDeadError if character is already dead
+        ValueError if policy is not recognized
+    """
+    if policy not in POLICY_CHOICES:
+        raise ValueError(f"Unknown simulation policy: {policy}")
+    
+    battle = SimpleBattle(character, enemy, rng=rng, seed=seed, verbose=False)
+    battle.begin()
+    choice = POLICY_CHOICES[policy]
+    ability = character['class']
+    
+    while battle.combat_active:
+        if choice == '2' and battle.effects.cooldown_remaining('player', ability) > 0:
+            battle.take_turn('1')
+        else:
+            battle.take_turn(choice)
+    
+    return battle.result
+
+def apply_battle_result(character, result, enemy=None, quest_data_dict=None):
+    """
+    Apply the outcome of a battle to the character
+    
+    Victory rewards go through character_manager.gain_experience and
+    add_gold; a defeat leaves the character at 0 health. A character who
+    falls to the enemy's last attack in a won battle gets no rewards.
+    
+    When the defeated enemy and quest data are given, a rewarded victory
+    also counts as a 'defeat' event for quest objectives (see
+    quest_handler.record_quest_event). The ids of quests whose objectives
+    it finished are stored in result['quests_finished'].
+    
+    Returns: True if rewards were applied
+    """
+    if result['winner'] == 'player' and can_character_fight(character):
+        character_manager.gain_experience(character, result['xp_gained'])
+        character_manager.add_gold(character, result['gold_gained'])
+        if enemy is not None and quest_data_dict is not None:
+            result['quests_finished'] = quest_handler.record_quest_event(
+                character, 'defeat', [enemy['enemy_id']], quest_data_dict)
+        return True
+    if result['winner'] == 'enemy':
+        character['health'] = 0
+    return False
+
+def auto_explore(character, encounters=1, policy='special', seed=None, quest_data_dict=None):
+    """
+    Fight a series of random encounters without prompting
+    
+    Each enemy is picked for the character's current level, the battle is
+    resolved with auto_battle and its result applied before the next one.
+    Stops early if the character dies. With quest_data_dict, victories
+    count towards quest objectives as in apply_battle_result.
+    
+    Returns: Dictionary with totals:
+            {'battles', 'wins', 'losses', 'escapes', 'xp_gained', 'gold_gained',
+             'quests_finished'}
+    Raises: ValueError if policy is not recognized
+    """
+    rng = BattleRNG(seed)
+    summary = {'battles': 0, 'wins': 0, 'losses': 0, 'escapes': 0,
+               'xp_gained': 0, 'gold_gained': 0, 'quests_finished': []}
+    outcome_keys = {'player': 'wins', 'enemy': 'losses', 'escaped': 'escapes'}
+    
+    for _ in range(encounters):
+        if not can_character_fight(character):
+            break
+        enemy = get_random_enemy_for_level(character['level'], rng)
+        result = auto_battle(character, enemy, policy, rng=rng)
+        
+        summary['battles'] += 1
+        summary[outcome_keys[result['winner']]] += 1
+        if apply_battle_result(character, result, enemy, quest_data_dict):
+            summary['xp_gained'] += result['xp_gained']
+            summary['gold_gained'] += result['gold_gained']
+            summary['quests_finished'].extend(result.get('quests_finished', []))
+    
+    return summary
+
+# ============================================================================
+# TOURNAMENTS
+# ============================================================================
+
+def run_tournament(levels=range(1, 51), character_classes=None, enemy_types=None,
+                   policy='attack', n_battles=100, max_turns=DEFAULT_MAX_TURNS,
+                   seed=None, max_workers=None, on_result=None):
+    """
+    Run a round-robin tournament of every class against every enemy
+    
+    Matchups are sharded across a process pool (see iter_tournament_results)
+    and aggregated as shards finish.
+    
+    Args:
+        levels: Character levels to include (default: 1-50)
+        character_classes: Class names (default: all four classes)
+        enemy_types: Enemy types (default: every registered enemy)
+        policy: Player policy, see simulate_matchups
+        n_battles: Battles simulated per matchup
+        seed: Seed making the whole tournament reproducible
+        max_workers: Worker processes (default: CPU count, 1 runs in-process)
+        on_result: Optional callback(key, statistics) called as results stream in
+    
+    Returns: Dictionary with:
+            'matchups': {(level, character_class, enemy_type): statistics}
+            'classes': {character_class: summary}
+            'enemies': {enemy_type: summary}
+            where summary is {'battles', 'wins', 'win_rate',
+                              'average_xp', 'average_gold'}
+    """
+    matchups = {}
+    classes = {}
+    enemies = {}
+    
+    for key, statistics in iter_tournament_results(levels, character_classes, enemy_types,
+                                                   policy, n_battles, max_turns,
+                                                   seed, max_workers):
+        matchups[key] = statistics
+        level, character_class, enemy_type = key
+        _add_to_summary(classes, character_class, statistics)
+        _add_to_summary(enemies, enemy_type, statistics)
+        if on_result is not None:
+            on_result(key, statistics)
+    
+    for summary in list(classes.values()) + list(enemies.values()):
+        battles = summary['battles']
+        summary['win_rate'] = summary['wins'] / battles if battles else 0.0
+        summary['average_xp'] = summary.pop('total_xp') / battles if battles else 0.0
+        summary['average_gold'] = summary.pop('total_gold') / battles if battles else 0.0
+    
+    return {'matchups': matchups, 'classes': classes, 'enemies': enemies}
+
+def iter_tournament_results(levels=range(1, 51), character_classes=None, enemy_types=None,
+                            policy='attack', n_battles=100, max_turns=DEFAULT_MAX_TURNS,
+                            seed=None, max_workers=None):
+    """
+    Simulate tournament matchups in worker processes and yield results
+    
+    Matchups are sharded by level. Each shard gets its own seed derived
+    from seed and its level, so results do not depend on the number of
+    workers or on scheduling. Results are yielded shard by shard in
+    completion order.
+    
+    Arguments are checked when this is called, not when the returned
+    iterator is first advanced.
+    
+    Returns: Iterator of ((level, character_class, enemy_type), statistics)
+    Raises: ValueError if policy is not recognized
+            InvalidTargetError if an enemy type is not registered
+    """
+    if policy not in SIMULATION_POLICIES:
+        raise ValueError(f"Unknown simulation policy: {policy}")
+    if character_classes is None:
+        character_classes = ['Warrior', 'Mage', 'Rogue', 'Cleric']
+    if enemy_types is None:
+        enemy_types = get_enemy_types()
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    
+    # Workers receive plain enemy data so they do not depend on registry state
+    enemy_data = [create_enemy(enemy_type) for enemy_type in enemy_types]
+    shards = []
+    for level in levels:
+        entries = []
+        for character_class in character_classes:
+            for enemy in enemy_data:
+                entries.append((level, character_class, enemy))
+        shards.append((entries, policy, n_battles, max_turns, derive_seed(seed, level)))
+    
+    return _iter_tournament_shards(shards, max_workers)
+
+def _iter_tournament_shards(shards, max_workers):
+    """Run tournament shards in-process or in a process pool, yielding results"""
+    if max_workers <= 1:
+        for shard in shards:
+            yield from _run_tournament_shard(*shard)
+        return
+    
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_tournament_shard, *shard) for shard in shards]
+        for future in concurrent.futures.as_completed(futures):
+            yield from future.result()
+
+def _run_tournament_shard(entries, policy, n_battles, max_turns, seed):
+    """Worker: simulate one shard of (level, class, enemy data) entries"""
+    matchups = []
+    keys = []
+    characters = {}
+    
+    for level, character_class, enemy in entries:
+        if (character_class, level) not in characters:
+            characters[(character_class, level)] = build_character_at_level(character_class, level)
+        matchups.append((characters[(character_class, level)], dict(enemy)))
+        keys.append((level, character_class, enemy['enemy_id']))
+    
+    statistics = simulate_matchups(matchups, policy, n_battles, max_turns, seed)
+    return list(zip(keys, statistics))
+
+def _add_to_summary(summaries, name, statistics):
+    """Accumulate one matchup's results into a running summary"""
+    summary = summaries.setdefault(name, {'battles': 0, 'wins': 0,
+                                          'total_xp': 0.0, 'total_gold': 0.0})
+    summary['battles'] += statistics['battles']
+    summary['wins'] += statistics['wins']
+    summary['total_xp'] += statistics['expected_xp'] * statistics['battles']
+    summary['total_gold'] += statistics['expected_gold'] * statistics['battles']
+
+# ============================================================================
+# BATTLE PREDICTION
+# ============================================================================
+
+# Number of distinct stat tuples kept in the prediction cache
+PREDICTION_CACHE_SIZE = 65536
+
+def predict_battle(character, enemy, policy='attack', max_turns=DEFAULT_MAX_TURNS):
+    """
+    Predict the exact outcome distribution of a battle without running it
+    
+    Damage is deterministic, so the only randomness comes from the Rogue
+    Critical Strike and escape attempts. For attack and escape policies
+    the turn on which the player succeeds follows a negative binomial
+    distribution that is computed in closed form. The special policy
+    (special when ready, otherwise attack) tracks the exact probability of
+    every (health, enemy health, cooldown, damage over time) state turn by
+    turn. Results are
+    memoized on the stat tuple and ability data, so repeated predictions
+    are cheap and stay correct when abilities are reloaded.
+    
+    Args:
+        character: Character dictionary (not modified)
+        enemy: Enemy dictionary (not modified)
+        policy: 'attack', 'special' or 'escape' - the action taken every turn
+        max_turns: Turn limit before a battle counts as a timeout
+    
+    Returns: Dictionary with prediction:
+            {'winner': most likely result ('player'|'enemy'|'escaped'|'timeout'),
+             'win_probability', 'loss_probability', 'escape_probability',
+             'timeout_probability', 'expected_turns',
+             'turn_distribution': {turns: probability},
+             'expected_xp', 'expected_gold'}
+    Raises:
+        CharacterDeadError if character is already dead
+        ValueError if policy is not recognized
+    """
+    if character['health'] <= 0:
+        raise CharacterDeadError("Character is dead")
+    if policy not in SIMULATION_POLICIES:
+        raise ValueError(f"Unknown simulation policy: {policy}")
+    
+    win, loss, escape, timeout, distribution = _predict_outcome(
+        _ability_profile(character['class']), character['health'], character['max_health'],
+        character['strength'], character['magic'],
+        enemy['health'], enemy['strength'], policy, max_turns)
+    
+    probabilities = {'player': win, 'enemy': loss, 'escaped': escape, 'timeout': timeout}
+    winner = max(probabilities, key=probabilities.get)
+    
+    turn_distribution = {}
+    expected_turns = 0.0
+    for turns, probability in distribution:
+        turn_distribution[turns] = turn_distribution.get(turns, 0.0) + probability
+        expected_turns += turns * probability
+    
+    return {
+        'winner': winner,
+        'win_probability': win,
+        'loss_probability': loss,
+        'escape_probability': escape,
+        'timeout_probability': timeout,
+        'expected_turns': expected_turns,
+        'turn_distribution': turn_distribution,
+        'expected_xp': win * enemy.get('xp_reward', 0),
+        'expected_gold': win * enemy.get('gold_reward', 0)
+    }
+
+def clear_prediction_cache():
+    """Forget all memoized battle predictions"""
+    _predict_outcome.cache_clear()
+
+@functools.lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def _predict_outcome(ability_profile, health, max_health, strength, magic,
+                     enemy_health, enemy_strength, policy, max_turns):
+    """
+    Memoized core of predict_battle
+    
+    Returns: Tuple (win, loss, escape, timeout, ((turns, probability), ...))
+    """
+    enemy_damage = max(1, enemy_strength - (strength // 4))
+    player_damage = max(1, strength - (enemy_strength // 4))
+    
+    if policy == 'special':
+        stat, multiplier, defense_divisor = ability_profile[:3]
+        special_damage = _ability_damage({'strength': strength, 'magic': magic},
+                                         {'strength': enemy_strength},
+                                         stat, multiplier, defense_divisor)
+        return _predict_special(ability_profile, health, max_health, enemy_health,
+                                player_damage, special_damage, enemy_damage, max_turns)
+    
+    # Enemy attacks every turn, so the character falls on a fixed turn
+    death_turn = -(-health // enemy_damage)
+    
+    if policy == 'escape':
+        hits_needed, chance, result = 1, ESCAPE_CHANCE, 'escaped'
+    else:
+        hits_needed, chance, result = max(1, -(-enemy_health // player_damage)), 1.0, 'player'
+    
+    return _predict_race(hits_needed, chance, result, death_turn, max_turns)
+
+def _predict_race(hits_needed, chance, result, death_turn, max_turns):
+    """
+    Race the player's successes against the enemy's fixed kill turn
+    
+    The player's hits_needed-th success lands on turn t with probability
+    C(t-1, hits_needed-1) * chance^hits_needed * (1-chance)^(t-hits_needed).
+    A success on the kill turn still counts because the player acts first.
+    """
+    last_turn = min(death_turn, max_turns)
+    distribution = []
+    success = 0.0
+    
+    if hits_needed is not None and hits_needed <= last_turn:
+        miss = 1.0 - chance
+        for turn in range(hits_needed, last_turn + 1):
+            probability = (math.comb(turn - 1, hits_needed - 1) *
+                           chance ** hits_needed * miss ** (turn - hits_needed))
+            if probability > 0:
+                distribution.append((turn, probability))
+                success += probability
+    
+    remaining = max(0.0, 1.0 - success)
+    loss = timeout = 0.0
+    if remaining > 0:
+        if death_turn <= max_turns:
+            loss = remaining
+            distribution.append((death_turn, remaining))
+        else:
+            timeout = remaining
+            distribution.append((max_turns, remaining))
+    
+    win = success if result == 'player' else 0.0
+    escape = success if result == 'escaped' else 0.0
+    return (win, loss, escape, timeout, tuple(distribution))
+
+def _predict_special(ability_profile, health, max_health, enemy_health,
+                     player_damage, special_damage, enemy_damage, max_turns, waiting=0, burning=0):
+    """
+    Exact outcome distribution for the special-when-ready policy
+    
+    Keeps the probability of every (health, enemy_health, cooldown,
+    burning) state and advances all of them one turn at a time. Only
+    abilities with a hit chance below 1 branch, so the number of live
+    states stays small. waiting is the number of turns before the ability
+    is first ready and burning the number of damage over time ticks the
+    enemy still takes.
+    """
+    chance, heal, cooldown, dot_damage, dot_turns = ability_profile[3:]
+    
+    states = {(health, enemy_health, waiting, burning): 1.0}
+    distribution = {}
+    win = loss = 0.0
+    
+    for turn in range(1, max_turns + 1):
+        next_states = {}
+        for (current_health, current_enemy_health, waiting, burning), probability in states.items():
+            if waiting > 0:
+                branches = [(probability, current_health, current_enemy_health - player_damage,
+                             waiting - 1, burning)]
+            else:
+                healed = current_health + max(0, min(heal, max_health - current_health))
+                branches = [(probability * chance, healed, current_enemy_health - special_damage,
+                             cooldown, dot_turns if dot_damage > 0 else burning)]
+                if chance < 1.0:
+                    branches.append((probability * (1.0 - chance), current_health,
+                                     current_enemy_health, cooldown, burning))
+            
+            for branch_probability, branch_health, branch_enemy_health, branch_waiting, branch_burning in branches:
+                branch_health -= enemy_damage
+                if branch_burning > 0:
+                    branch_enemy_health -= dot_damage
+                    branch_burning -= 1
+                if branch_enemy_health <= 0:
+                    win += branch_probability
+                elif branch_health <= 0:
+                    loss += branch_probability
+                else:
+                    key = (branch_health, branch_enemy_health, branch_waiting, branch_burning)
+                    next_states[key] = next_states.get(key, 0.0) + branch_probability
+                    continue
+                distribution[turn] = distribution.get(turn, 0.0) + branch_probability
+        
+        states = next_states
+        if not states:
+            break
+    
+    timeout = sum(states.values())
+    if timeout > 0:
+        distribution[max_turns] = distribution.get(max_turns, 0.0) + timeout
+    
+    return (win, loss, 0.0, timeout, tuple(sorted(distribution.items())))
+
 # ============================================================================
 # TESTING
 # ============================================================================
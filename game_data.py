@@ -20,6 +20,22 @@ from custom_exceptions import (
 # DATA LOADING FUNCTIONS
 # ============================================================================
 
+# Goes up whenever quest data is loaded or edited in place, so indexes
+# built from older quest data are rebuilt (see quest_handler)
+quest_data_version = 0
+
+def mark_quest_data_changed():
+    """
+    Record that quest data was loaded or edited in place
+    
+    Call after changing a quest's PREREQUISITE or REQUIRED_LEVEL directly.
+    
+    Returns: The new quest_data_version
+    """
+    global quest_data_version
+    quest_data_version += 1
+    return quest_data_version
+
 def load_quests(filename="data/quests.txt"):
     """
     Load quest data from file
@@ -33,6 +49,14 @@ def load_quests(filename="data/quests.txt"):
     REQUIRED_LEVEL: 1
     PREREQUISITE: previous_quest_id (or NONE)
     
+    PREREQUISITE may also combine quest ids: "a & b" needs both,
+    "a | b" needs either, and "a & (b | c)" needs a and one of b or c.
+    Alternatives must be in parentheses when mixed with "&".
+    
+    Optional line:
+    OBJECTIVES: defeat goblin 3, buy weapon|armor 1
+    Each objective is "<event> <target> <count>" (see parse_objectives).
+    
     Returns: Dictionary of quests {quest_id: quest_data_dict}
     Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
     """
@@ -58,6 +82,7 @@ def load_quests(filename="data/quests.txt"):
         except (KeyError, ValueError) as e:
             raise InvalidDataFormatError(f"Invalid quest format: {e}")
     
+    mark_quest_data_changed()
     return quests
 
 def load_items(filename="data/items.txt"):
@@ -71,6 +96,7 @@ def load_items(filename="data/items.txt"):
     EFFECT: stat_name:value (e.g., strength:5 or health:20)
     COST: 100
     DESCRIPTION: Item description
+    STACK_SIZE: 10          (optional, copies that share an inventory slot)
     
     Returns: Dictionary of items {item_id: item_data_dict}
     Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
@@ -99,6 +125,96 @@ def load_items(filename="data/items.txt"):
     
     return items
 
+def load_enemies(filename="data/enemies.txt"):
+    """
+    Load enemy data from file
+    
+    Expected format per enemy (separated by blank lines):
+    ENEMY_ID: unique_enemy_name
+    NAME: Enemy Display Name
+    HEALTH: 50
+    STRENGTH: 8
+    MAGIC: 2
+    XP_REWARD: 25
+    GOLD_REWARD: 10
+    MIN_LEVEL: 1        (optional, default 1)
+    MAX_LEVEL: 2        (optional, default no upper limit)
+    SPAWN_WEIGHT: 1     (optional, default 1)
+    
+    Returns: Dictionary of enemies {enemy_id: enemy_data_dict}
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Enemy file not found: {filename}")
+    
+    try:
+        with open(filename, 'r') as f:
+            content = f.read()
+    except Exception:
+        raise CorruptedDataError(f"Cannot read enemy file: {filename}")
+    
+    enemies = {}
+    blocks = content.strip().split('\n\n')
+    
+    for block in blocks:
+        if not block.strip():
+            continue
+        
+        try:
+            enemy = parse_enemy_block(block.strip().split('\n'))
+            validate_enemy_data(enemy)
+            enemies[enemy['enemy_id']] = enemy
+        except (KeyError, ValueError) as e:
+            raise InvalidDataFormatError(f"Invalid enemy format: {e}")
+    
+    return enemies
+
+def load_abilities(filename="data/abilities.txt"):
+    """
+    Load special ability data from file
+    
+    Expected format per ability (separated by blank lines):
+    CLASS: Character class that owns the ability
+    NAME: Ability Display Name
+    STAT: strength|magic|NONE (stat scaled by MULTIPLIER)
+    MULTIPLIER: 2           (0 for abilities that deal no damage)
+    DEFENSE_DIVISOR: 4      (subtract enemy strength // divisor, 0 ignores defense)
+    HIT_CHANCE: 1.0
+    HEAL: 0
+    COOLDOWN: 1             (turns to wait before using it again)
+    MESSAGE: Text shown on use, may contain {name}, {damage} and {healed}
+    MISS_MESSAGE: Text shown on a miss (optional)
+    DOT_DAMAGE: 5           (optional damage over time at the end of each turn)
+    DOT_TURNS: 2            (optional, turns the damage over time lasts)
+    
+    Returns: Dictionary of abilities {class: ability_data_dict}
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Ability file not found: {filename}")
+    
+    try:
+        with open(filename, 'r') as f:
+            content = f.read()
+    except Exception:
+        raise CorruptedDataError(f"Cannot read ability file: {filename}")
+    
+    abilities = {}
+    blocks = content.strip().split('\n\n')
+    
+    for block in blocks:
+        if not block.strip():
+            continue
+        
+        try:
+            ability = parse_ability_block(block.strip().split('\n'))
+            validate_ability_data(ability)
+            abilities[ability['class']] = ability
+        except (KeyError, ValueError) as e:
+            raise InvalidDataFormatError(f"Invalid ability format: {e}")
+    
+    return abilities
+
 def validate_quest_data(quest_dict):
     """
     Validate that quest dictionary has all required fields
@@ -148,6 +264,100 @@ def validate_item_data(item_dict):
     if not isinstance(item_dict['cost'], int):
         raise InvalidDataFormatError("cost must be integer")
     
+    if 'stack_size' in item_dict and (not isinstance(item_dict['stack_size'], int) or
+                                      item_dict['stack_size'] < 1):
+        raise InvalidDataFormatError("stack_size must be a positive integer")
+    
+    return True
+
+def validate_enemy_data(enemy_dict):
+    """
+    Validate that enemy dictionary has all required fields
+    
+    Required fields: enemy_id, name, health, strength, magic,
+                    xp_reward, gold_reward
+    
+    Returns: True if valid
+    Raises: InvalidDataFormatError if missing required fields or invalid stats
+    """
+    required = ['enemy_id', 'name', 'health', 'strength', 'magic',
+                'xp_reward', 'gold_reward']
+    
+    for field in required:
+        if field not in enemy_dict:
+            raise InvalidDataFormatError(f"Missing field: {field}")
+    
+    for field in required[2:]:
+        if not isinstance(enemy_dict[field], int):
+            raise InvalidDataFormatError(f"{field} must be integer")
+    
+    if enemy_dict['health'] <= 0:
+        raise InvalidDataFormatError("health must be positive")
+    
+    for field in ['min_level', 'max_level', 'spawn_weight']:
+        if enemy_dict.get(field) is not None and not isinstance(enemy_dict[field], int):
+            raise InvalidDataFormatError(f"{field} must be integer")
+    
+    if enemy_dict.get('spawn_weight', 1) < 0:
+        raise InvalidDataFormatError("spawn_weight cannot be negative")
+    
+    if (enemy_dict.get('max_level') is not None and
+            enemy_dict['max_level'] < enemy_dict.get('min_level', 1)):
+        raise InvalidDataFormatError("max_level cannot be below min_level")
+    
+    return True
+
+def validate_ability_data(ability_dict):
+    """
+    Validate that ability dictionary has all required fields
+    
+    Required fields: class, name, stat, multiplier, defense_divisor,
+                    hit_chance, heal, cooldown, message
+    Optional fields: dot_damage, dot_turns (both default to 0)
+    Valid stats: strength, magic, NONE (only when multiplier is 0)
+    Damage over time must wear off before the ability is ready again
+    (dot_turns <= cooldown + 1), so it never stacks on itself.
+    message may only use {name}, {damage} and {healed}, and miss_message
+    only {name}, so a bad placeholder fails here instead of mid-battle.
+    
+    Returns: True if valid
+    Raises: InvalidDataFormatError if missing required fields or invalid values
+    """
+    required = ['class', 'name', 'stat', 'multiplier', 'defense_divisor',
+                'hit_chance', 'heal', 'cooldown', 'message']
+    
+    for field in required:
+        if field not in ability_dict:
+            raise InvalidDataFormatError(f"Missing field: {field}")
+    
+    for field in ['multiplier', 'defense_divisor', 'heal', 'cooldown']:
+        if not isinstance(ability_dict[field], int) or ability_dict[field] < 0:
+            raise InvalidDataFormatError(f"{field} must be a non-negative integer")
+    
+    if not 0.0 <= ability_dict['hit_chance'] <= 1.0:
+        raise InvalidDataFormatError("hit_chance must be between 0 and 1")
+    
+    if ability_dict['multiplier'] > 0 and ability_dict['stat'] not in ['strength', 'magic']:
+        raise InvalidDataFormatError(f"Invalid stat: {ability_dict['stat']}")
+    
+    for field in ['dot_damage', 'dot_turns']:
+        value = ability_dict.get(field, 0)
+        if not isinstance(value, int) or value < 0:
+            raise InvalidDataFormatError(f"{field} must be a non-negative integer")
+    if ability_dict.get('dot_damage', 0) > 0:
+        if not 1 <= ability_dict.get('dot_turns', 0) <= ability_dict['cooldown'] + 1:
+            raise InvalidDataFormatError("dot_turns must be between 1 and cooldown + 1")
+    
+    messages = [('message', {'name': '', 'damage': 0, 'healed': 0}),
+                ('miss_message', {'name': ''})]
+    for field, values in messages:
+        if field not in ability_dict:
+            continue
+        try:
+            ability_dict[field].format(**values)
+        except (KeyError, IndexError, ValueError, AttributeError) as e:
+            raise InvalidDataFormatError(f"Invalid placeholder in {field}: {e}")
+    
     return True
 
 def create_default_data_files():
@@ -190,11 +400,103 @@ def parse_quest_block(lines):
                 quest[key] = int(value)
             except ValueError:
                 raise InvalidDataFormatError(f"Cannot convert {key} to int: {value}")
+        elif key == 'prerequisite':
+            quest[key] = format_prerequisites(parse_prerequisites(value))
+        elif key == 'objectives':
+            quest[key] = parse_objectives(value)
         else:
             quest[key] = value
     
     return quest
 
+def parse_prerequisites(value):
+    """
+    Parse a PREREQUISITE value into groups of quest ids
+    
+    Groups are joined by "&" and the ids inside a group by "|". Every
+    group needs at least one of its quests completed. A group of
+    alternatives must be wrapped in parentheses when "&" is also used,
+    so there is no operator precedence to get wrong.
+    Example: "a & (b | c)" -> [['a'], ['b', 'c']]
+    
+    Args:
+        value: PREREQUISITE text, "NONE" for no prerequisites
+    
+    Returns: List of groups (lists of quest ids), empty for NONE
+    Raises: InvalidDataFormatError if a group or quest id is empty, or if
+            "&" and "|" are mixed without parentheses
+    """
+    value = value.strip()
+    if value in ('', 'NONE'):
+        return []
+    if '&' not in value and '|' not in value and '(' not in value:
+        return [[value]]
+    
+    mixed = '&' in value
+    groups = []
+    for group_text in value.split('&'):
+        group_text = group_text.strip()
+        if group_text.startswith('(') and group_text.endswith(')'):
+            group_text = group_text[1:-1]
+        elif mixed and '|' in group_text:
+            raise InvalidDataFormatError(
+                f"Prerequisite mixes '&' and '|' without parentheses: {value}")
+        group = [quest_id.strip() for quest_id in group_text.split('|')]
+        for quest_id in group:
+            if quest_id in ('', 'NONE') or '(' in quest_id or ')' in quest_id:
+                raise InvalidDataFormatError(f"Invalid prerequisite: {value}")
+        groups.append(group)
+    return groups
+
+# Events quest objectives can count (see quest_handler.record_quest_event)
+OBJECTIVE_EVENTS = ['defeat', 'buy']
+
+def parse_objectives(value):
+    """
+    Parse an OBJECTIVES value into objective dictionaries
+    
+    Objectives are separated by commas. Each is "<event> <target> <count>"
+    where event is one of OBJECTIVE_EVENTS, target is an enemy id, item id
+    or item type ("any" matches everything, "|" lists alternatives) and
+    count defaults to 1.
+    Example: "defeat goblin 3" -> [{'event': 'defeat', 'targets': ['goblin'], 'count': 3}]
+    
+    Returns: List of objective dictionaries
+    Raises: InvalidDataFormatError if an objective can't be parsed
+    """
+    objectives = []
+    for text in value.split(','):
+        parts = text.split()
+        if not parts:
+            continue
+        if len(parts) not in (2, 3) or parts[0] not in OBJECTIVE_EVENTS:
+            raise InvalidDataFormatError(f"Invalid objective: {text.strip()}")
+        
+        try:
+            count = int(parts[2]) if len(parts) == 3 else 1
+        except ValueError:
+            raise InvalidDataFormatError(f"Cannot convert objective count to int: {parts[2]}")
+        targets = parts[1].split('|')
+        if count < 1 or '' in targets:
+            raise InvalidDataFormatError(f"Invalid objective: {text.strip()}")
+        
+        objectives.append({'event': parts[0], 'targets': targets, 'count': count})
+    return objectives
+
+def format_prerequisites(groups):
+    """
+    Turn prerequisite groups back into PREREQUISITE text
+    
+    Returns: "NONE", a single quest id, or ids joined by " | " and " & "
+             (alternatives are parenthesized when there are several groups)
+    """
+    if not groups:
+        return 'NONE'
+    if len(groups) == 1:
+        return ' | '.join(groups[0])
+    return ' & '.join(f"({' | '.join(group)})" if len(group) > 1 else group[0]
+                      for group in groups)
+
 def parse_item_block(lines):
     """
     Parse a block of lines into an item dictionary
@@ -215,16 +517,84 @@ def parse_item_block(lines):
         key = key.strip().lower()
         value = value.strip()
         
-        if key == 'cost':
+        if key in ['cost', 'stack_size']:
             try:
                 item[key] = int(value)
             except ValueError:
-                raise InvalidDataFormatError(f"Cannot convert cost to int: {value}")
+                raise InvalidDataFormatError(f"Cannot convert {key} to int: {value}")
         else:
             item[key] = value
     
     return item
 
+def parse_enemy_block(lines):
+    """
+    Parse a block of lines into an enemy dictionary
+    
+    Args:
+        lines: List of strings representing one enemy
+    
+    Returns: Dictionary with enemy data
+    Raises: InvalidDataFormatError if parsing fails
+    """
+    enemy = {}
+    
+    for line in lines:
+        if ':' not in line:
+            continue
+        
+        key, value = line.split(':', 1)
+        key = key.strip().lower()
+        value = value.strip()
+        
+        if key in ['health', 'strength', 'magic', 'xp_reward', 'gold_reward',
+                   'min_level', 'max_level', 'spawn_weight']:
+            try:
+                enemy[key] = int(value)
+            except ValueError:
+                raise InvalidDataFormatError(f"Cannot convert {key} to int: {value}")
+        elif key == 'enemy_id':
+            enemy[key] = value.lower()
+        else:
+            enemy[key] = value
+    
+    return enemy
+
+def parse_ability_block(lines):
+    """
+    Parse a block of lines into an ability dictionary
+    
+    Args:
+        lines: List of strings representing one ability
+    
+    Returns: Dictionary with ability data
+    Raises: InvalidDataFormatError if parsing fails
+    """
+    ability = {}
+    
+    for line in lines:
+        if ':' not in line:
+            continue
+        
+        key, value = line.split(':', 1)
+        key = key.strip().lower()
+        value = value.strip()
+        
+        if key in ['multiplier', 'defense_divisor', 'heal', 'cooldown', 'dot_damage', 'dot_turns']:
+            try:
+                ability[key] = int(value)
+            except ValueError:
+                raise InvalidDataFormatError(f"Cannot convert {key} to int: {value}")
+        elif key == 'hit_chance':
+            try:
+                ability[key] = float(value)
+            except ValueError:
+                raise InvalidDataFormatError(f"Cannot convert hit_chance to float: {value}")
+        else:
+            ability[key] = value
+    
+    return ability
+
 # ============================================================================
 # TESTING
 # ============================================================================
@@ -247,3 +617,19 @@ if __name__ == "__main__":
         print("Item file not found")
     except InvalidDataFormatError as e:
         print(f"Invalid item format: {e}")
+    
+    try:
+        enemies = load_enemies()
+        print(f"Loaded {len(enemies)} enemies")
+    except MissingDataFileError:
+        print("Enemy file not found")
+    except InvalidDataFormatError as e:
+        print(f"Invalid enemy format: {e}")
+    
+    try:
+        abilities = load_abilities()
+        print(f"Loaded {len(abilities)} abilities")
+    except MissingDataFileError:
+        print("Ability file not found")
+    except InvalidDataFormatError as e:
+        print(f"Invalid ability format: {e}")
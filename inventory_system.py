@@ -15,52 +15,357 @@ from custom_exceptions import (
     InsufficientResourcesError,
     InvalidItemTypeError
 )
+import collections.abc
+import itertools
 
-# Maximum inventory size
+# Maximum inventory size in slots; a slot holds one stack of a single item
 MAX_INVENTORY_SIZE = 20
 
+# Copies of an item that share a slot, by item type (STACK_SIZE in
+# items.txt overrides it per item)
+DEFAULT_STACK_SIZES = {'weapon': 1, 'armor': 1, 'consumable': 10}
+
+# ============================================================================
+# INVENTORY STORAGE
+# ============================================================================
+
+def get_stack_size(item_id, item_data_dict=None):
+    """
+    Return how many copies of an item fit in one slot
+    
+    Args:
+        item_id: Item to look up
+        item_data_dict: Dictionary of all item data. Items without a
+                        stack_size use DEFAULT_STACK_SIZES for their type;
+                        items missing from it (or with no dictionary at
+                        all) take one slot per copy.
+    """
+    item = item_data_dict.get(item_id) if item_data_dict else None
+    if item is None:
+        return 1
+    return item.get('stack_size', DEFAULT_STACK_SIZES.get(item.get('type'), 1))
+
+def slots_for(item_id, count, item_data_dict=None):
+    """Return the slots count copies of an item take up (see get_stack_size)"""
+    return -(-count // get_stack_size(item_id, item_data_dict))
+
+class Inventory(collections.abc.MutableSequence):
+    """
+    Counted multiset of item ids that reads like a list
+    
+    counts maps item_id -> quantity in the order items were first added
+    and is the only storage: each item is kept once however many copies
+    there are, and add(), remove(), `in` and count() are O(1). The list
+    view (iteration, len, indexing, ==, ','.join) is built from counts,
+    so copies of an item sit next to each other in first-added order:
+    Inventory(['a', 'b', 'a']) == ['a', 'a', 'b']. Reading or replacing
+    by position walks the items (O(distinct items)), except at the end.
+    
+    slots holds the slots each item takes up under item_data_dict (see
+    slots_for) and used_slots their total. Both are updated in O(1) on
+    every change; measuring against a different item_data_dict recounts
+    them once (set_item_data). Functions in this module accept either an
+    Inventory or a plain list.
+    """
+    
+    def __init__(self, items=(), item_data_dict=None):
+        """Create an inventory from any iterable of item ids"""
+        self.item_data_dict = item_data_dict
+        self.clear()
+        self.extend(items)
+    
+    @classmethod
+    def from_counts(cls, counts, item_data_dict=None):
+        """Create an inventory from {item_id: quantity}, without expanding copies"""
+        inventory = cls(item_data_dict=item_data_dict)
+        for item_id, quantity in counts.items():
+            inventory.add(item_id, quantity)
+        return inventory
+    
+    def set_item_data(self, item_data_dict):
+        """Measure slots against item_data_dict from now on, recounting if it changed"""
+        if item_data_dict is self.item_data_dict:
+            return
+        self.item_data_dict = item_data_dict
+        self.slots = {}
+        self.used_slots = 0
+        for item_id, count in self.counts.items():
+            self._count_slots(item_id, count)
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        for item_id, count in self.counts.items():
+            yield from itertools.repeat(item_id, count)
+    
+    def __reversed__(self):
+        for item_id, count in reversed(self.counts.items()):
+            yield from itertools.repeat(item_id, count)
+    
+    def __contains__(self, item_id):
+        return item_id in self.counts
+    
+    def __eq__(self, other):
+        if isinstance(other, Inventory):
+            return list(self.counts.items()) == list(other.counts.items())
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"Inventory({list(self)!r})"
+    
+    def count(self, item_id):
+        """Return how many of item_id the inventory holds"""
+        return self.counts.get(item_id, 0)
+    
+    def add(self, item_id, quantity=1):
+        """Add quantity copies of an item"""
+        count = self.counts.get(item_id, 0) + quantity
+        self.counts[item_id] = count
+        self.size += quantity
+        self._count_slots(item_id, count)
+    
+    def append(self, item_id):
+        self.add(item_id)
+    
+    def extend(self, items):
+        if isinstance(items, Inventory):
+            items = list(items.counts.items())
+        else:
+            items = [(item_id, 1) for item_id in items]
+        for item_id, quantity in items:
+            self.add(item_id, quantity)
+    
+    def insert(self, index, item_id):
+        """
+        Add an item at a list position
+        
+        Copies of an item already held join its group, and anything at or
+        past the end is added last. Otherwise the new item goes in front
+        of the group at index (O(distinct items)).
+        """
+        if item_id in self.counts or index >= self.size:
+            self.add(item_id)
+            return
+        before = self._item_at(max(index, -self.size))
+        self.add(item_id)
+        entries = []
+        for held_id, count in self.counts.items():
+            if held_id == before:
+                entries.append((item_id, 1))
+            if held_id != item_id:
+                entries.append((held_id, count))
+        self.counts = dict(entries)
+    
+    def remove(self, item_id, quantity=1):
+        """
+        Remove quantity copies of an item
+        
+        Raises: ValueError if fewer copies are held (like list.remove)
+        """
+        count = self.counts.get(item_id, 0)
+        if count < quantity:
+            raise ValueError(f"{item_id!r} is not in inventory")
+        if count == quantity:
+            del self.counts[item_id]
+        else:
+            self.counts[item_id] = count - quantity
+        self.size -= quantity
+        self._count_slots(item_id, count - quantity)
+    
+    def pop(self, index=-1):
+        item_id = self._item_at(index)
+        self.remove(item_id)
+        return item_id
+    
+    def clear(self):
+        self.counts = {}
+        self.size = 0
+        self.slots = {}
+        self.used_slots = 0
+    
+    def reverse(self):
+        self.counts = dict(reversed(self.counts.items()))
+    
+    def sort(self, key=None, reverse=False):
+        """Sort the items; copies of an item stay together"""
+        order = sorted(self.counts, key=key, reverse=reverse)
+        self.counts = {item_id: self.counts[item_id] for item_id in order}
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Inventory(list(self)[index])
+        return self._item_at(index)
+    
+    def __setitem__(self, index, item_id):
+        if isinstance(index, slice):
+            items = list(self)
+            items[index] = item_id
+            self._reset(items)
+            return
+        held_id = self._item_at(index)
+        if held_id != item_id:
+            self.remove(held_id)
+            self.insert(index, item_id)
+    
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            items = list(self)
+            del items[index]
+            self._reset(items)
+        else:
+            self.remove(self._item_at(index))
+    
+    def copy(self):
+        return Inventory.from_counts(self.counts, self.item_data_dict)
+    
+    def __reduce__(self):
+        return (Inventory.from_counts, (dict(self.counts), self.item_data_dict))
+    
+    def _item_at(self, index):
+        """Return the item at a list position (O(1) at the end)"""
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("inventory index out of range")
+        if index == self.size - 1:
+            return next(reversed(self.counts))
+        for item_id, count in self.counts.items():
+            if index < count:
+                return item_id
+            index -= count
+    
+    def _count_slots(self, item_id, count):
+        """Update slots and used_slots now that count copies of item_id are held"""
+        slots = slots_for(item_id, count, self.item_data_dict) if count else 0
+        self.used_slots += slots - self.slots.get(item_id, 0)
+        if slots:
+            self.slots[item_id] = slots
+        else:
+            self.slots.pop(item_id, None)
+    
+    def _reset(self, items):
+        """Recount the inventory from a list of item ids"""
+        self.clear()
+        self.extend(items)
+
+def item_counts(inventory):
+    """
+    Get {item_id: quantity} for an Inventory or a plain list
+    
+    Returns: The Inventory's own counts (don't modify) or a new dictionary
+    """
+    if isinstance(inventory, Inventory):
+        return inventory.counts
+    counts = {}
+    for item_id in inventory:
+        counts[item_id] = counts.get(item_id, 0) + 1
+    return counts
+
+def format_inventory(inventory):
+    """
+    Write an inventory for a save file, one entry per run of copies
+    
+    Runs of the same item are written once with their length, so the
+    list order is kept exactly; an Inventory writes its counts directly.
+    Example: ['potion', 'potion', 'sword'] -> "potion*2,sword"
+    """
+    if isinstance(inventory, Inventory):
+        runs = inventory.counts.items()
+    else:
+        runs = ((item_id, sum(1 for _ in run)) for item_id, run in itertools.groupby(inventory))
+    return ','.join(item_id if count == 1 else f"{item_id}*{count}" for item_id, count in runs)
+
+def parse_inventory(text):
+    """
+    Read an inventory written by format_inventory (plain "a,a,b" lists too)
+    
+    Returns: Inventory
+    Raises: ValueError if a count isn't a positive integer
+    """
+    inventory = Inventory()
+    for entry in (text.split(',') if text else []):
+        item_id, _, count = entry.partition('*')
+        quantity = int(count) if count else 1
+        if quantity < 1:
+            raise ValueError(f"Invalid item count: {entry}")
+        inventory.add(item_id, quantity)
+    return inventory
+
 # ============================================================================
 # INVENTORY MANAGEMENT
 # ============================================================================
 
-def add_item_to_inventory(character, item_id):
+def add_item_to_inventory(character, item_id, quantity=1, item_data_dict=None):
     """
     Add an item to character's inventory
     
+    Copies fill the item's last stack before starting a new slot. An
+    Inventory stores the item once with its new quantity, in O(1) when
+    it was last measured against the same item_data_dict.
+    
     Args:
         character: Character dictionary
         item_id: Unique item identifier
+        quantity: Number of copies to add
+        item_data_dict: Dictionary of all item data, for stack sizes
+                        (default: one slot per copy)
     
     Returns: True if added successfully
-    Raises: InventoryFullError if inventory is at max capacity
+    Raises:
+        InventoryFullError if the copies need more slots than are free
+        ValueError if quantity is less than 1
     """
-    if len(character['inventory']) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full")
+    if quantity < 1:
+        raise ValueError("Quantity must be at least 1")
     
-    character['inventory'].append(item_id)
+    check_inventory_room(character, item_id, quantity, item_data_dict)
+    
+    inventory = character['inventory']
+    if isinstance(inventory, Inventory):
+        inventory.add(item_id, quantity)
+    else:
+        inventory.extend([item_id] * quantity)
     return True
 
-def remove_item_from_inventory(character, item_id):
+def remove_item_from_inventory(character, item_id, quantity=1):
     """
     Remove an item from character's inventory
     
+    O(1) for an Inventory.
+    
     Args:
         character: Character dictionary
         item_id: Item to remove
+        quantity: Number of copies to remove
     
     Returns: True if removed successfully
-    Raises: ItemNotFoundError if item not in inventory
+    Raises: ItemNotFoundError if fewer than quantity copies are in inventory
     """
-    if item_id not in character['inventory']:
+    inventory = character['inventory']
+    count = inventory.count(item_id)
+    if count == 0:
         raise ItemNotFoundError(f"Item not found: {item_id}")
+    if count < quantity:
+        raise ItemNotFoundError(f"Only {count} {item_id} in inventory")
     
-    character['inventory'].remove(item_id)
+    if isinstance(inventory, Inventory):
+        inventory.remove(item_id, quantity)
+    else:
+        for _ in range(quantity):
+            inventory.remove(item_id)
     return True
 
 def has_item(character, item_id):
     """
     Check if character has a specific item
     
+    O(1) for an Inventory.
+    
     Returns: True if item in inventory, False otherwise
     """
     return item_id in character['inventory']
@@ -69,17 +374,64 @@ def count_item(character, item_id):
     """
     Count how many of a specific item the character has
     
+    O(1) for an Inventory.
+    
     Returns: Integer count of item
     """
     return character['inventory'].count(item_id)
 
-def get_inventory_space_remaining(character):
+def get_inventory_space_remaining(character, item_data_dict=None):
     """
-    Calculate how many more items can fit in inventory
+    Calculate how many more item stacks can fit in inventory
+    
+    Args:
+        item_data_dict: Dictionary of all item data, for stack sizes
+                        (default: one slot per copy)
     
     Returns: Integer representing available slots
     """
-    return MAX_INVENTORY_SIZE - len(character['inventory'])
+    return MAX_INVENTORY_SIZE - get_used_slots(character, item_data_dict)
+
+def get_used_slots(character, item_data_dict=None):
+    """
+    Count the slots the character's items take up
+    
+    An Inventory keeps the total up to date, so this is O(1) unless it
+    was last measured against another item_data_dict; a plain list is
+    counted item by item.
+    
+    Args:
+        item_data_dict: Dictionary of all item data, for stack sizes
+                        (default: one slot per copy)
+    
+    Returns: Integer number of slots
+    """
+    inventory = character['inventory']
+    if isinstance(inventory, Inventory):
+        inventory.set_item_data(item_data_dict)
+        return inventory.used_slots
+    return sum(slots_for(item_id, count, item_data_dict)
+               for item_id, count in item_counts(inventory).items())
+
+def check_inventory_room(character, item_id, quantity=1, item_data_dict=None):
+    """
+    Check that quantity more copies of an item fit in the inventory
+    
+    O(1) for an Inventory (see get_used_slots).
+    
+    Args:
+        item_data_dict: Dictionary of all item data, for stack sizes
+                        (default: one slot per copy)
+    
+    Returns: True if they fit
+    Raises: InventoryFullError if they need more slots than are free
+    """
+    count = character['inventory'].count(item_id)
+    needed = (slots_for(item_id, count + quantity, item_data_dict) -
+              slots_for(item_id, count, item_data_dict))
+    if needed and get_used_slots(character, item_data_dict) + needed > MAX_INVENTORY_SIZE:
+        raise InventoryFullError("Inventory is full")
+    return True
 
 def clear_inventory(character):
     """
@@ -87,8 +439,11 @@ def clear_inventory(character):
     
     Returns: List of removed items
     """
-    removed = character['inventory'].copy()
-    character['inventory'] = []
+    removed = list(character['inventory'])
+    if isinstance(character['inventory'], Inventory):
+        character['inventory'] = Inventory()
+    else:
+        character['inventory'] = []
     return removed
 
 # ============================================================================
@@ -209,40 +564,44 @@ def equip_armor(character, item_id, item_data):
     
     return f"Equipped {item_data['name']}"
 
-def unequip_weapon(character):
+def unequip_weapon(character, item_data_dict=None):
     """
     Remove equipped weapon and return it to inventory
     
+    item_data_dict gives stack sizes for the room check (default: one
+    slot per copy).
+    
     Returns: Item ID that was unequipped, or None if no weapon equipped
     Raises: InventoryFullError if inventory is full
     """
     if not character.get('equipped_weapon'):
         return None
     
-    if len(character['inventory']) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full")
-    
     weapon_id = character['equipped_weapon']
+    check_inventory_room(character, weapon_id, 1, item_data_dict)
+    
     character['strength'] -= 5
     character['inventory'].append(weapon_id)
     character['equipped_weapon'] = None
     
     return weapon_id
 
-def unequip_armor(character):
+def unequip_armor(character, item_data_dict=None):
     """
     Remove equipped armor and return it to inventory
     
+    item_data_dict gives stack sizes for the room check (default: one
+    slot per copy).
+    
     Returns: Item ID that was unequipped, or None if no armor equipped
     Raises: InventoryFullError if inventory is full
     """
     if not character.get('equipped_armor'):
         return None
     
-    if len(character['inventory']) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full")
-    
     armor_id = character['equipped_armor']
+    check_inventory_room(character, armor_id, 1, item_data_dict)
+    
     character['max_health'] -= 10
     character['inventory'].append(armor_id)
     character['equipped_armor'] = None
@@ -253,7 +612,7 @@ def unequip_armor(character):
 # SHOP SYSTEM
 # ============================================================================
 
-def purchase_item(character, item_id, item_data):
+def purchase_item(character, item_id, item_data, item_data_dict=None):
     """
     Purchase an item from a shop
     
@@ -261,6 +620,11 @@ def purchase_item(character, item_id, item_data):
         character: Character dictionary
         item_id: Item to purchase
         item_data: Item information with 'cost' field
+        item_data_dict: Dictionary of all item data, for stack sizes.
+                        Without it every item, this one included, takes
+                        one slot per copy, like the other inventory
+                        functions, so the room check matches
+                        get_used_slots(character).
     
     Returns: True if purchased successfully
     Raises:
@@ -270,8 +634,7 @@ def purchase_item(character, item_id, item_data):
     if character['gold'] < item_data['cost']:
         raise InsufficientResourcesError("Insufficient gold")
     
-    if len(character['inventory']) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full")
+    check_inventory_room(character, item_id, 1, item_data_dict)
     
     character['gold'] -= item_data['cost']
     character['inventory'].append(item_id)
@@ -346,13 +709,8 @@ def display_inventory(character, item_data_dict):
         return
     
     print("\n=== INVENTORY ===")
-    item_counts = {}
-    for item_id in character['inventory']:
-        if item_id not in item_counts:
-            item_counts[item_id] = 0
-        item_counts[item_id] += 1
-    
-    for item_id, count in item_counts.items():
+    print(f"Slots: {get_used_slots(character, item_data_dict)}/{MAX_INVENTORY_SIZE}")
+    for item_id, count in item_counts(character['inventory']).items():
         if item_id in item_data_dict:
             item = item_data_dict[item_id]
             print(f"{item['name']} ({item['type']}) x{count}")
@@ -125,6 +125,7 @@ def load_game():
     
     try:
         current_character = character_manager.load_character(saved[idx])
+        quest_handler.verify_quest_rewards(current_character, all_quests)
         print(f"Loaded: {current_character['name']}")
         game_loop()
     except CharacterNotFoundError:
@@ -238,16 +239,18 @@ def quest_menu():
         print("4. Accept Quest")
         print("5. Abandon Quest")
         print("6. Complete Quest (Testing)")
-        print("7. Back")
+        print("7. Plan Route to Quest")
+        print("8. Back")
         
-        choice = input("Choose option (1-7): ").strip()
+        choice = input("Choose option (1-8): ").strip()
         
         if choice == '1':
             active = quest_handler.get_active_quests(current_character, all_quests)
             if active:
                 print("\nActive Quests:")
                 for q in active:
-                    print(f"- {q['title']}")
+                    progress = quest_handler.describe_objectives(current_character, q)
+                    print(f"- {q['title']}" + (f" ({progress})" if progress else ""))
             else:
                 print("No active quests.")
         
@@ -315,6 +318,17 @@ def quest_menu():
                 print("No active quests to complete.")
         
         elif choice == '7':
+            quest_id = input("Quest ID: ").strip()
+            try:
+                route = quest_handler.plan_quest_route(current_character, quest_id, all_quests)
+                print("\nRoute:")
+                for i, (qid, extra) in enumerate(zip(route['quests'], route['extra_xp']), 1):
+                    note = f" (earn {extra} XP first)" if extra else ""
+                    print(f"{i}. {all_quests[qid]['title']}{note}")
+            except (QuestNotFoundError, QuestAlreadyCompletedError, InvalidDataFormatError) as e:
+                print(f"Cannot plan route: {e}")
+        
+        elif choice == '8':
             break
 
 def explore():
@@ -328,20 +342,25 @@ def explore():
     print("\nYou venture out to explore...")
     enemy = combat_system.get_random_enemy_for_level(current_character['level'])
     print(f"You encounter a {enemy['name']}!")
+    print("1. Fight")
+    print("2. Auto-battle")
+    
+    choice = input("Choose option (1-2): ").strip()
     
-    battle = combat_system.SimpleBattle(current_character, enemy)
     try:
-        result = battle.start_battle()
+        if choice == '2':
+            result = combat_system.auto_battle(current_character, enemy)
+        else:
+            battle = combat_system.SimpleBattle(current_character, enemy)
+            result = battle.start_battle()
         
-        if result['winner'] == 'player':
+        if combat_system.apply_battle_result(current_character, result, enemy, all_quests):
             print(f"\nVictory! Gained {result['xp_gained']} XP and {result['gold_gained']} Gold!")
-            character_manager.gain_experience(current_character, result['xp_gained'])
-            character_manager.add_gold(current_character, result['gold_gained'])
-        elif result['winner'] == 'enemy':
-            print("\nYou were defeated!")
-            current_character['health'] = 0
-        else:
+            hand_in_quests(result['quests_finished'])
+        elif result['winner'] == 'escaped':
             print("\nYou escaped!")
+        else:
+            print("\nYou were defeated!")
     except CharacterDeadError:
         print("You are too weak to fight!")
 
@@ -367,8 +386,9 @@ def shop():
                 idx = int(input("Select item (1-...): ")) - 1
                 if 0 <= idx < len(items_list):
                     iid, item = items_list[idx]
-                    inventory_system.purchase_item(current_character, iid, item)
+                    inventory_system.purchase_item(current_character, iid, item, all_items)
                     print(f"Purchased {item['name']}!")
+                    record_quest_progress('buy', [iid, item['type']])
             except (ValueError, IndexError, InsufficientResourcesError, InventoryFullError) as e:
                 print(f"Cannot purchase: {e}")
         
@@ -407,6 +427,24 @@ def save_game():
         except Exception as e:
             print(f"Error saving game: {e}")
 
+def record_quest_progress(event, targets):
+    """Count an event towards quest objectives and hand in finished quests"""
+    global current_character, all_quests
+    
+    hand_in_quests(quest_handler.record_quest_event(current_character, event, targets, all_quests))
+
+def hand_in_quests(quest_ids):
+    """Complete quests whose objectives are done (not while dead)"""
+    global current_character, all_quests
+    
+    for quest_id in quest_ids:
+        if current_character['health'] <= 0:
+            print(f"Objectives done for '{all_quests[quest_id]['title']}'.")
+            continue
+        rewards = quest_handler.complete_quest(current_character, quest_id, all_quests)
+        print(f"Quest '{all_quests[quest_id]['title']}' completed! "
+              f"+{rewards['xp']} XP, +{rewards['gold']} Gold")
+
 def load_game_data():
     """Load all quest and item data from files"""
     global all_quests, all_items
@@ -427,6 +465,12 @@ def load_game_data():
     except InvalidDataFormatError as e:
         print(f"Error loading game data: {e}")
         raise
+    
+    try:
+        quest_handler.validate_quest_graph(all_quests)
+    except InvalidDataFormatError as e:
+        print(f"Error loading game data: {e}")
+        raise
 
 def display_welcome():
     """Display welcome message"""
@@ -14,9 +14,19 @@ from custom_exceptions import (
     QuestRequirementsNotMetError,
     QuestAlreadyCompletedError,
     QuestNotActiveError,
-    InsufficientLevelError
+    InsufficientLevelError,
+    InvalidDataFormatError
 )
+import bisect
+import heapq
+import itertools
 import character_manager
+import game_data
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # ============================================================================
 # QUEST MANAGEMENT
@@ -33,7 +43,7 @@ def accept_quest(character, quest_id, quest_data_dict):
     
     Requirements to accept quest:
     - Character level >= quest required_level
-    - Prerequisite quest completed (if any)
+    - Prerequisite quests completed (if any, see prerequisites_met)
     - Quest not already completed
     - Quest not already active
     
@@ -42,6 +52,7 @@ def accept_quest(character, quest_id, quest_data_dict):
         QuestNotFoundError if quest_id not in quest_data_dict
         InsufficientLevelError if character level too low
         QuestRequirementsNotMetError if prerequisite not completed
+            (the message lists the prerequisite groups still unmet)
         QuestAlreadyCompletedError if quest already done
     """
     if quest_id not in quest_data_dict:
@@ -52,8 +63,12 @@ def accept_quest(character, quest_id, quest_data_dict):
     if character['level'] < quest['required_level']:
         raise InsufficientLevelError(f"Level {quest['required_level']} required")
     
-    if quest['prerequisite'] != 'NONE' and quest['prerequisite'] not in character['completed_quests']:
-        raise QuestRequirementsNotMetError(f"Prerequisite not completed: {quest['prerequisite']}")
+    if not prerequisites_met(character, quest_id, quest_data_dict):
+        completed = character['completed_quests']
+        unmet = [group for group in get_quest_graph(quest_data_dict).requirements.get(quest_id, [])
+                 if not any(parent_id in completed for parent_id in group)]
+        raise QuestRequirementsNotMetError(
+            f"Prerequisite not completed: {game_data.format_prerequisites(unmet)}")
     
     if quest_id in character['completed_quests']:
         raise QuestAlreadyCompletedError(f"Quest already completed: {quest_id}")
@@ -61,7 +76,16 @@ def accept_quest(character, quest_id, quest_data_dict):
     if quest_id in character['active_quests']:
         raise QuestRequirementsNotMetError(f"Quest already active: {quest_id}")
     
+    index, tracker, _ = _current_indexes(character, quest_data_dict)
     character['active_quests'].append(quest_id)
+    
+    if quest.get('objectives'):
+        character.setdefault('quest_progress', {})[quest_id] = [0] * len(quest['objectives'])
+    
+    if index is not None:
+        index.quest_accepted(quest_id)
+    if tracker is not None:
+        tracker.quest_accepted(quest_id)
     return True
 
 def complete_quest(character, quest_id, quest_data_dict):
@@ -89,6 +113,7 @@ def complete_quest(character, quest_id, quest_data_dict):
         raise QuestNotActiveError(f"Quest not active: {quest_id}")
     
     quest = quest_data_dict[quest_id]
+    index, tracker, completed_bits = _current_indexes(character, quest_data_dict)
     
     # Remove from active
     character['active_quests'].remove(quest_id)
@@ -96,10 +121,25 @@ def complete_quest(character, quest_id, quest_data_dict):
     # Add to completed
     character['completed_quests'].append(quest_id)
     
+    character.get('quest_progress', {}).pop(quest_id, None)
+    
+    if completed_bits is not None:
+        completed_bits.quest_completed(quest_id)
+    if index is not None:
+        index.quest_completed(quest_id)
+    if tracker is not None:
+        tracker.quest_removed(quest_id)
+    
     # Grant rewards
     character_manager.gain_experience(character, quest['reward_xp'])
     character_manager.add_gold(character, quest['reward_gold'])
     
+    totals = character.get('quest_rewards')
+    if totals is not None and totals['count'] == len(character['completed_quests']) - 1:
+        totals['total_xp'] += quest['reward_xp']
+        totals['total_gold'] += quest['reward_gold']
+        totals['count'] += 1
+    
     return {
         'xp': quest['reward_xp'],
         'gold': quest['reward_gold']
@@ -109,15 +149,43 @@ def abandon_quest(character, quest_id):
     """
     Remove a quest from active quests without completing it
     
+    Objective progress is dropped, so a quest accepted again starts over.
+    
     Returns: True if abandoned
     Raises: QuestNotActiveError if quest not active
     """
     if quest_id not in character['active_quests']:
         raise QuestNotActiveError(f"Quest not active: {quest_id}")
     
+    index, tracker, _ = _current_indexes(character)
     character['active_quests'].remove(quest_id)
+    character.get('quest_progress', {}).pop(quest_id, None)
+    
+    if index is not None:
+        index.quest_abandoned(quest_id)
+    if tracker is not None:
+        tracker.quest_removed(quest_id)
     return True
 
+def _current_indexes(character, quest_data_dict=None):
+    """
+    Get the character's quest_index, objective_index and quest_bits if they
+    still match its quest lists (and quest_data_dict, when given)
+    
+    Called before a quest action changes the lists. A stale index is left
+    alone instead of updated, so it is rebuilt on its next lookup.
+    
+    Returns: Tuple (QuestAvailability or None, QuestObjectiveTracker or None,
+                    CompletedQuestBits or None)
+    """
+    current = []
+    for key in ['quest_index', 'objective_index', 'quest_bits']:
+        index = character.get(key)
+        if index is not None and not index.is_current(character, quest_data_dict or index.quest_data_dict):
+            index = None
+        current.append(index)
+    return tuple(current)
+
 def get_active_quests(character, quest_data_dict):
     """
     Get full data for all active quests
@@ -146,18 +214,16 @@ def get_available_quests(character, quest_data_dict):
     """
     Get quests that character can currently accept
     
-    Available = meets level req + prerequisite done + not completed + not active
+    Available = meets level req + prerequisites done + not completed + not active
+    
+    Uses the character's QuestAvailability index, so repeated calls cost
+    time proportional to the number of available quests.
     
     Returns: List of quest dictionaries
     """
-    available = []
-    for quest_id, quest in quest_data_dict.items():
-        if (character['level'] >= quest['required_level'] and
-            (quest['prerequisite'] == 'NONE' or quest['prerequisite'] in character['completed_quests']) and
-            quest_id not in character['completed_quests'] and
-            quest_id not in character['active_quests']):
-            available.append(quest)
-    return available
+    index = get_quest_availability(character, quest_data_dict)
+    return [quest_data_dict[quest_id] for quest_id in index.available_ids(character)
+            if quest_id in quest_data_dict]
 
 # ============================================================================
 # QUEST TRACKING
@@ -184,7 +250,8 @@ def can_accept_quest(character, quest_id, quest_data_dict):
     Check if character meets all requirements to accept quest
     
     Returns: True if can accept, False otherwise
-    Does NOT raise exceptions - just returns boolean
+    Does NOT raise exceptions - just returns boolean (False when the
+    quest's prerequisite text cannot be parsed)
     """
     if quest_id not in quest_data_dict:
         return False
@@ -194,7 +261,10 @@ def can_accept_quest(character, quest_id, quest_data_dict):
     if character['level'] < quest['required_level']:
         return False
     
-    if quest['prerequisite'] != 'NONE' and quest['prerequisite'] not in character['completed_quests']:
+    try:
+        if not prerequisites_met(character, quest_id, quest_data_dict):
+            return False
+    except InvalidDataFormatError:
         return False
     
     if quest_id in character['completed_quests']:
@@ -205,6 +275,37 @@ def can_accept_quest(character, quest_id, quest_data_dict):
     
     return True
 
+def prerequisites_met(character, quest_id, quest_data_dict):
+    """
+    Check if the character has completed a quest's prerequisites
+    
+    The quest's current PREREQUISITE is compared with the one the cached
+    indexes were built from, and they are rebuilt if it was edited in
+    place. A single prerequisite is then a membership test. Combined
+    prerequisites ("a & b", "a | b") are checked with the quest's
+    precompiled masks against the completed-quest bitset kept in
+    character['quest_bits'] (see get_completed_bits), which is built on
+    first use and then kept up to date by complete_quest.
+    
+    Returns: True if met (always True for quests without prerequisites,
+             False for quests missing from quest_data_dict)
+    Raises: InvalidDataFormatError if an edited prerequisite can't be parsed
+    """
+    if quest_id not in quest_data_dict:
+        return False
+    
+    graph = get_quest_graph(quest_data_dict)
+    if not graph.is_current(quest_data_dict, [quest_id]):
+        graph = rebuild_quest_graph(quest_data_dict)
+    
+    completed = character['completed_quests']
+    parents = graph.parents[quest_id]
+    if len(parents) < 2:
+        return not parents or parents[0] in completed
+    
+    bits = get_quest_bit_index(quest_data_dict)
+    return bits.requirements_met(quest_id, completed, get_completed_bits(character, quest_data_dict).mask)
+
 def get_quest_prerequisite_chain(quest_id, quest_data_dict):
     """
     Get the full chain of prerequisites for a quest
@@ -212,30 +313,977 @@ def get_quest_prerequisite_chain(quest_id, quest_data_dict):
     Returns: List of quest IDs in order [earliest_prereq, ..., quest_id]
     Example: If Quest C requires Quest B, which requires Quest A:
              Returns ["quest_a", "quest_b", "quest_c"]
+    For "a | b" prerequisites only the quest with the shorter chain is
+    included; for "a & b" both chains are.
+    
+    The cached QuestGraph is used when the PREREQUISITE of every quest in
+    the chain is unchanged; a prerequisite edited in place rebuilds it.
     
-    Raises: QuestNotFoundError if quest doesn't exist
+    Raises:
+        QuestNotFoundError if quest doesn't exist
+        InvalidDataFormatError if the prerequisites form a cycle
     """
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest not found: {quest_id}")
     
-    chain = []
-    current_id = quest_id
+    graph = get_quest_graph(quest_data_dict)
+    try:
+        chain = graph.chain(quest_id)
+    except (QuestNotFoundError, InvalidDataFormatError):
+        chain = None
+    if chain is None or not graph.is_current(quest_data_dict, chain):
+        chain = rebuild_quest_graph(quest_data_dict).chain(quest_id)
+    return chain
+
+# ============================================================================
+# QUEST GRAPH
+# ============================================================================
+
+# Quest dictionaries whose indexes are kept by get_quest_graph
+QUEST_GRAPH_CACHE_SIZE = 8
+
+# id(quest_data_dict) -> [quest_data_dict, QuestGraph, QuestLevelIndex,
+#                        QuestBitIndex, QuestRoutePlanner, signature], oldest
+# first; the bit index and route planner stay None until first used
+_quest_graphs = {}
+
+class QuestGraph:
+    """
+    Prerequisite graph of a quest dictionary, built once
+    
+    Attributes:
+        requirements: {quest_id: prerequisite groups, see
+                       game_data.parse_prerequisites}
+        parents: {quest_id: tuple of every quest id it names as a prerequisite}
+        children: {quest_id: [quest ids that name it as a prerequisite]}
+        roots: Quest ids without a prerequisite
+        order: Quest ids in the order they can first be unlocked (each
+               quest comes after one quest of every prerequisite group)
+        depth: {quest_id: rounds of unlocking needed before it, 0 for roots}
+        position: {quest_id: position in the quest dictionary}
+        prerequisite_text: {quest_id: PREREQUISITE text the graph was built from}
+    
+    Quests that can never be unlocked (a missing quest or a cycle in the
+    way) are left out of order and depth.
+    """
+    
+    def __init__(self, quest_data_dict):
+        """Build the graph from a dictionary of all quest data"""
+        self.requirements = {}
+        self.parents = {}
+        self.children = {}
+        self.roots = []
+        self.position = {}
+        self.prerequisite_text = {}
+        
+        for quest_id, quest in quest_data_dict.items():
+            self.position[quest_id] = len(self.position)
+            self.prerequisite_text[quest_id] = quest.get('prerequisite', 'NONE')
+            groups = game_data.parse_prerequisites(self.prerequisite_text[quest_id])
+            self.requirements[quest_id] = groups
+            self.parents[quest_id] = tuple(dict.fromkeys(
+                parent_id for group in groups for parent_id in group))
+            self.children.setdefault(quest_id, [])
+            if not groups:
+                self.roots.append(quest_id)
+            for parent_id in self.parents[quest_id]:
+                self.children.setdefault(parent_id, []).append(quest_id)
+        
+        # A quest unlocks when its last open group gets an unlocked member.
+        # Quests leave the queue in depth order, so that member sets its depth.
+        open_groups = {}
+        self.order = list(self.roots)
+        self.depth = dict.fromkeys(self.roots, 0)
+        for quest_id in self.order:
+            child_depth = self.depth[quest_id] + 1
+            for child_id in self.children[quest_id]:
+                if child_id in self.depth:
+                    continue
+                groups = self.requirements[child_id]
+                if child_id not in open_groups:
+                    open_groups[child_id] = set(range(len(groups)))
+                remaining = open_groups[child_id]
+                for group_number in [number for number in remaining if quest_id in groups[number]]:
+                    remaining.discard(group_number)
+                if not remaining:
+                    self.depth[child_id] = child_depth
+                    self.order.append(child_id)
+    
+    def is_current(self, quest_data_dict, quest_ids):
+        """
+        Check that none of quest_ids was removed from quest_data_dict or had
+        its prerequisite edited since the graph was built
+        
+        Costs O(len(quest_ids)).
+        """
+        prerequisite_text = self.prerequisite_text
+        for quest_id in quest_ids:
+            quest = quest_data_dict.get(quest_id)
+            if quest is None or quest.get('prerequisite', 'NONE') != prerequisite_text.get(quest_id):
+                return False
+        return True
     
-    while current_id is not None:
-        chain.insert(0, current_id)
+    def chain(self, quest_id):
+        """
+        Get the quests needed to unlock a quest, in an order they can be done
+        
+        From each prerequisite group the quest with the shortest route is
+        used, so for single prerequisites this is the plain chain.
+        Costs O(chain length) for single prerequisites.
         
-        if current_id not in quest_data_dict:
-            raise QuestNotFoundError(f"Quest not found: {current_id}")
+        Returns: List of quest IDs [earliest_prereq, ..., quest_id]
+        Raises:
+            QuestNotFoundError if the quest or a prerequisite doesn't exist
+            InvalidDataFormatError if the prerequisites form a cycle
+        """
+        if quest_id not in self.parents:
+            raise QuestNotFoundError(f"Quest not found: {quest_id}")
+        if quest_id not in self.depth:
+            self._raise_broken_chain(quest_id)
+        
+        # Iterative post-order walk: a quest is added after its prerequisites
+        chain = []
+        seen = {quest_id}
+        stack = [(quest_id, iter(self.route_parents(quest_id)))]
+        while stack:
+            current_id, parents = stack[-1]
+            for parent_id in parents:
+                if parent_id not in seen:
+                    seen.add(parent_id)
+                    stack.append((parent_id, iter(self.route_parents(parent_id))))
+                    break
+            else:
+                stack.pop()
+                chain.append(current_id)
+        return chain
+    
+    def route_parents(self, quest_id):
+        """
+        Pick the unlockable quest with the least depth from each prerequisite
+        group of an unlockable quest
+        """
+        route = []
+        for group in self.requirements[quest_id]:
+            candidates = [parent_id for parent_id in group if parent_id in self.depth]
+            route.append(min(candidates, key=lambda parent_id: (self.depth[parent_id],
+                                                                self.position[parent_id])))
+        return route
+    
+    def _raise_broken_chain(self, quest_id):
+        """Report why a quest's prerequisites can never be completed"""
+        seen = {quest_id}
+        stack = [quest_id]
+        while stack:
+            current_id = stack.pop()
+            for group in self.requirements[current_id]:
+                if any(parent_id in self.depth for parent_id in group):
+                    continue
+                for parent_id in group:
+                    if parent_id not in self.parents:
+                        raise QuestNotFoundError(f"Quest not found: {parent_id}")
+                    if parent_id not in seen:
+                        seen.add(parent_id)
+                        stack.append(parent_id)
+        raise InvalidDataFormatError(f"Prerequisite cycle blocks quest: {quest_id}")
+
+class QuestLevelIndex:
+    """
+    Quest ids sorted by required level for O(log n + k) range queries
+    
+    Attributes:
+        levels: Required levels in ascending order
+        quest_ids: Quest ids matching levels (ties keep quest data order)
+    """
+    
+    def __init__(self, quest_data_dict):
+        """Build the index from a dictionary of all quest data"""
+        entries = sorted((quest['required_level'], position, quest_id)
+                         for position, (quest_id, quest) in enumerate(quest_data_dict.items()))
+        self.levels = [entry[0] for entry in entries]
+        self.quest_ids = [entry[2] for entry in entries]
+    
+    def quest_ids_in_range(self, min_level, max_level):
+        """Return ids of quests with min_level <= required_level <= max_level"""
+        start = bisect.bisect_left(self.levels, min_level)
+        end = bisect.bisect_right(self.levels, max_level)
+        return self.quest_ids[start:end]
+    
+    def is_current(self, quest_data_dict, min_level, max_level):
+        """
+        Check that no quest in a level range was removed from quest_data_dict
+        or had its required level changed since the index was built
         
-        current = quest_data_dict[current_id]
-        prerequisite = current.get('prerequisite', 'NONE')
+        Costs O(log n + k) for k quests in the range.
+        """
+        start = bisect.bisect_left(self.levels, min_level)
+        end = bisect.bisect_right(self.levels, max_level)
+        for level, quest_id in zip(self.levels[start:end], self.quest_ids[start:end]):
+            quest = quest_data_dict.get(quest_id)
+            if quest is None or quest['required_level'] != level:
+                return False
+        return True
+
+def get_quest_graph(quest_data_dict):
+    """
+    Get the QuestGraph for a quest dictionary, building it on first use
+    
+    Graphs and level indexes are cached per dictionary. Adding or
+    removing quests and loading quest data is noticed, and prerequisite
+    checks and chains compare the prerequisites they read; call
+    game_data.mark_quest_data_changed after editing a quest's
+    prerequisite or level in place before using the graph directly.
+    """
+    return _get_quest_indexes(quest_data_dict)[1]
+
+def get_quest_level_index(quest_data_dict):
+    """Get the QuestLevelIndex for a quest dictionary, building it on first use"""
+    return _get_quest_indexes(quest_data_dict)[2]
+
+def rebuild_quest_graph(quest_data_dict):
+    """
+    Build a fresh QuestGraph and QuestLevelIndex for a quest dictionary
+    and cache them
+    
+    Returns: QuestGraph
+    """
+    entry = [quest_data_dict, QuestGraph(quest_data_dict), QuestLevelIndex(quest_data_dict), None, None,
+             _quest_data_signature(quest_data_dict)]
+    _quest_graphs.pop(id(quest_data_dict), None)
+    _quest_graphs[id(quest_data_dict)] = entry
+    while len(_quest_graphs) > QUEST_GRAPH_CACHE_SIZE:
+        del _quest_graphs[next(iter(_quest_graphs))]
+    return entry[1]
+
+def _get_quest_indexes(quest_data_dict):
+    """Return the cached [quest_data_dict, QuestGraph, QuestLevelIndex, QuestBitIndex,
+    QuestRoutePlanner] entry"""
+    cached = _quest_graphs.get(id(quest_data_dict))
+    if (cached is None or cached[0] is not quest_data_dict or
+            cached[5] != _quest_data_signature(quest_data_dict)):
+        rebuild_quest_graph(quest_data_dict)
+        cached = _quest_graphs[id(quest_data_dict)]
+    return cached
+
+def _quest_data_signature(quest_data_dict):
+    """
+    Cheap summary of a quest dictionary: game_data.quest_data_version,
+    its size and its last key
+    
+    New keys always go to the end of a dict, so adding a quest, or
+    removing one and adding another, changes the signature in O(1), as
+    does loading quests or game_data.mark_quest_data_changed.
+    """
+    return (game_data.quest_data_version, len(quest_data_dict), next(reversed(quest_data_dict), None))
+
+# ============================================================================
+# QUEST AVAILABILITY
+# ============================================================================
+
+def _list_state(quest_ids):
+    """
+    Value that changes whenever a quest list changes
+    
+    An IndexedList counts its own changes, so this is O(1). Plain lists
+    are copied, so any change to their contents is noticed too.
+    """
+    version = getattr(quest_ids, 'version', None)
+    if version is None:
+        return tuple(quest_ids)
+    return version
+
+class QuestAvailability:
+    """
+    Per-character index of the quests that can be accepted right now
+    
+    Kept in character['quest_index'] (never saved) and shares the
+    character's completed-quest bitset (character['quest_bits']). Quests whose
+    prerequisites are done wait in a heap keyed by required level until the
+    character reaches it. accept_quest, complete_quest and abandon_quest
+    update the index directly; completing a quest only looks at the quests
+    that require it. Level changes are picked up on the next lookup.
+    If the quest lists are replaced or changed outside these functions
+    (see _list_state), the index is rebuilt.
+    """
+    
+    def __init__(self, character, quest_data_dict):
+        """Build the index for a character from a dictionary of all quest data"""
+        self.quest_data_dict = quest_data_dict
+        self.graph = get_quest_graph(quest_data_dict)
+        self.bits = get_quest_bit_index(quest_data_dict)
+        self.rebuild(character)
+    
+    def rebuild(self, character):
+        """Recompute the whole index from the character's quest lists"""
+        self.active_list = character['active_quests']
+        self.completed_list = character['completed_quests']
+        self.active = set(self.active_list)
+        self.completed = set(self.completed_list)
+        self.completed_bits = get_completed_bits(character, self.quest_data_dict)
+        self.states = self._list_states()
+        self.level = character['level']
+        self.available = set()
+        self.waiting = []
+        for quest_id in self.graph.parents:
+            self._consider(quest_id)
+    
+    def is_current(self, character, quest_data_dict):
+        """Return True if the index still describes this character and quest data"""
+        return (quest_data_dict is self.quest_data_dict and
+                get_quest_graph(quest_data_dict) is self.graph and
+                character['active_quests'] is self.active_list and
+                character['completed_quests'] is self.completed_list and
+                character.get('quest_bits') is self.completed_bits and
+                self._list_states() == self.states)
+    
+    def _list_states(self):
+        """_list_state of the active and completed lists"""
+        return (_list_state(self.active_list), _list_state(self.completed_list))
+    
+    def available_ids(self, character):
+        """
+        Get the ids of quests the character can accept, in quest data order
         
-        if prerequisite == 'NONE':
-            current_id = None
+        Costs O(k log k) for k available quests, plus any quests unlocked
+        by levels gained since the last lookup.
+        """
+        if character['level'] < self.level:
+            self.rebuild(character)
+        elif character['level'] > self.level:
+            self.level = character['level']
+            while self.waiting and self.waiting[0][0] <= self.level:
+                self._consider(heapq.heappop(self.waiting)[2])
+        return sorted(self.available, key=self.graph.position.get)
+    
+    def quest_accepted(self, quest_id):
+        """Update the index after quest_id was added to active_quests"""
+        self.active.add(quest_id)
+        self.available.discard(quest_id)
+        self.states = self._list_states()
+    
+    def quest_abandoned(self, quest_id):
+        """Update the index after quest_id was removed from active_quests"""
+        self.active.discard(quest_id)
+        self.states = self._list_states()
+        self._consider(quest_id)
+    
+    def quest_completed(self, quest_id):
+        """Update the index after quest_id moved from active to completed"""
+        self.active.discard(quest_id)
+        self.completed.add(quest_id)
+        self.available.discard(quest_id)
+        self.states = self._list_states()
+        for child_id in self.graph.children.get(quest_id, []):
+            self._consider(child_id)
+    
+    def _consider(self, quest_id):
+        """File a quest as available, waiting for a level, or neither"""
+        if quest_id in self.completed or quest_id in self.active:
+            return
+        if not self.bits.requirements_met(quest_id, self.completed, self.completed_bits.mask):
+            return
+        required_level = self.quest_data_dict[quest_id]['required_level']
+        if required_level <= self.level:
+            self.available.add(quest_id)
         else:
-            current_id = prerequisite
+            heapq.heappush(self.waiting, (required_level, self.graph.position[quest_id], quest_id))
+
+def get_quest_availability(character, quest_data_dict):
+    """
+    Get the character's QuestAvailability index, building it if needed
     
-    return chain
+    Returns: QuestAvailability
+    """
+    index = character.get('quest_index')
+    if index is None or not index.is_current(character, quest_data_dict):
+        index = QuestAvailability(character, quest_data_dict)
+        character['quest_index'] = index
+    return index
+
+# ============================================================================
+# QUEST OBJECTIVES
+# ============================================================================
+
+class QuestObjectiveTracker:
+    """
+    Per-character inverted index from events to active quest objectives
+    
+    Kept in character['objective_index'] (never saved). Every objective of
+    an active quest is filed under an (event, target) key such as
+    ('defeat', 'goblin'), so an event only visits the objectives waiting
+    for it, however many quests are active. Progress counts themselves
+    live in character['quest_progress'] and are saved with the character.
+    """
+    
+    def __init__(self, character, quest_data_dict):
+        """Build the index for a character from a dictionary of all quest data"""
+        self.quest_data_dict = quest_data_dict
+        self.rebuild(character)
+    
+    def rebuild(self, character):
+        """Subscribe the objectives of every active quest"""
+        self.active_list = character['active_quests']
+        self.subscribers = {}
+        for quest_id in self.active_list:
+            self._subscribe(quest_id)
+        self.state = _list_state(self.active_list)
+    
+    def is_current(self, character, quest_data_dict):
+        """Return True if the index still describes this character and quest data"""
+        return (quest_data_dict is self.quest_data_dict and
+                character['active_quests'] is self.active_list and
+                _list_state(self.active_list) == self.state)
+    
+    def subscriptions(self, quest_id):
+        """Yield (key, objective number) for every objective of a quest"""
+        quest = self.quest_data_dict.get(quest_id, {})
+        for number, objective in enumerate(quest.get('objectives', [])):
+            for target in objective['targets']:
+                yield (objective['event'], target), number
+    
+    def quest_accepted(self, quest_id):
+        """Update the index after quest_id was added to active_quests"""
+        self.state = _list_state(self.active_list)
+        self._subscribe(quest_id)
+    
+    def quest_removed(self, quest_id):
+        """Update the index after quest_id left active_quests"""
+        self.state = _list_state(self.active_list)
+        for key, number in self.subscriptions(quest_id):
+            waiting = self.subscribers.get(key)
+            if waiting is not None:
+                waiting.pop((quest_id, number), None)
+                if not waiting:
+                    del self.subscribers[key]
+    
+    def _subscribe(self, quest_id):
+        """File every objective of a quest under its event key"""
+        for key, number in self.subscriptions(quest_id):
+            self.subscribers.setdefault(key, {})[(quest_id, number)] = None
+    
+    def matching(self, event, targets):
+        """
+        Get the (quest_id, objective number) pairs an event counts for
+        
+        Args:
+            event: Event name, e.g. 'defeat'
+            targets: Keys the event matches, e.g. ['goblin']
+        
+        Returns: List of pairs, each objective at most once
+        """
+        found = {}
+        for target in list(targets) + ['any']:
+            found.update(self.subscribers.get((event, target), {}))
+        return list(found)
+
+def get_objective_tracker(character, quest_data_dict):
+    """
+    Get the character's QuestObjectiveTracker, building it if needed
+    
+    Returns: QuestObjectiveTracker
+    """
+    tracker = character.get('objective_index')
+    if tracker is None or not tracker.is_current(character, quest_data_dict):
+        tracker = QuestObjectiveTracker(character, quest_data_dict)
+        character['objective_index'] = tracker
+    return tracker
+
+def record_quest_event(character, event, targets, quest_data_dict):
+    """
+    Count a combat or shop event towards active quest objectives
+    
+    Args:
+        character: Character dictionary
+        event: One of game_data.OBJECTIVE_EVENTS ('defeat', 'buy')
+        targets: What the event was about, e.g. [enemy_id] or
+                 [item_id, item_type]
+        quest_data_dict: Dictionary of all quest data
+    
+    Returns: List of quest ids whose objectives this event finished
+    """
+    tracker = get_objective_tracker(character, quest_data_dict)
+    progress = character.setdefault('quest_progress', {})
+    
+    finished = []
+    for quest_id, number in tracker.matching(event, targets):
+        objectives = quest_data_dict[quest_id]['objectives']
+        counts = progress.setdefault(quest_id, [0] * len(objectives))
+        if counts[number] >= objectives[number]['count']:
+            continue
+        counts[number] += 1
+        if counts[number] == objectives[number]['count'] and objectives_complete(character, quest_id, quest_data_dict):
+            finished.append(quest_id)
+    return finished
+
+def objectives_complete(character, quest_id, quest_data_dict):
+    """
+    Check if every objective of a quest has reached its count
+    
+    Returns: True if complete (always True for quests without objectives)
+    """
+    objectives = quest_data_dict[quest_id].get('objectives', [])
+    counts = character.get('quest_progress', {}).get(quest_id, [])
+    for number, objective in enumerate(objectives):
+        if number >= len(counts) or counts[number] < objective['count']:
+            return False
+    return True
+
+def describe_objectives(character, quest):
+    """
+    Describe a quest's objective progress
+    
+    Returns: Text like "defeat goblin 2/3", empty if the quest has none
+    """
+    counts = character.get('quest_progress', {}).get(quest['quest_id'], [])
+    parts = []
+    for number, objective in enumerate(quest.get('objectives', [])):
+        done = counts[number] if number < len(counts) else 0
+        parts.append(f"{objective['event']} {'|'.join(objective['targets'])} {done}/{objective['count']}")
+    return ", ".join(parts)
+
+# ============================================================================
+# BULK ELIGIBILITY
+# ============================================================================
+
+class QuestBitIndex:
+    """
+    Bit masks over a quest dictionary for checking many characters at once
+    
+    Bit i stands for the i-th quest in the dictionary (QuestGraph.position).
+    Quest ids that are named as prerequisites but missing from the
+    dictionary get the bits after those, so completed-quest bitsets can
+    hold them too. Masks are assembled in bytearrays and turned into ints
+    once, so building one costs O(quests) rather than one big-int
+    operation per bit.
+    
+    Attributes:
+        quest_ids: Quest ids in bit order
+        required_levels: Required level of each quest in bit order
+        bit_position: {quest_id: bit}
+        parents: QuestGraph.parents
+        children: QuestGraph.children
+        roots_bytes: Little-endian bitset of quests without a prerequisite
+        requirement_masks: {quest_id: (mask of quests all required,
+                            [mask of a group needing any one quest, ...])}
+                           for quests naming two or more prerequisites
+        level_thresholds: Distinct required levels, ascending
+        level_masks: level_masks[i] holds every quest with required level
+                     <= level_thresholds[i]
+    """
+    
+    def __init__(self, quest_data_dict, graph, level_index):
+        """Compile the masks from quest data, its QuestGraph and QuestLevelIndex"""
+        self.quest_ids = list(graph.position)
+        self.required_levels = [quest_data_dict[quest_id]['required_level'] for quest_id in self.quest_ids]
+        self.bit_position = dict(graph.position)
+        for parent_id in graph.children:
+            self.bit_position.setdefault(parent_id, len(self.bit_position))
+        self.parents = graph.parents
+        self.children = graph.children
+        
+        roots = bytearray(self.byte_count())
+        for quest_id in graph.roots:
+            bit = self.bit_position[quest_id]
+            roots[bit >> 3] |= 1 << (bit & 7)
+        self.roots_bytes = bytes(roots)
+        
+        self.requirement_masks = {}
+        for quest_id, parents in graph.parents.items():
+            if len(parents) < 2:
+                continue
+            all_mask = 0
+            any_masks = []
+            for group in graph.requirements[quest_id]:
+                mask = self.completed_mask(group)
+                if len(group) == 1:
+                    all_mask |= mask
+                else:
+                    any_masks.append(mask)
+            self.requirement_masks[quest_id] = (all_mask, any_masks)
+        
+        self.level_thresholds = []
+        self.level_masks = []
+        packed = bytearray(self.byte_count())
+        for i, (level, quest_id) in enumerate(zip(level_index.levels, level_index.quest_ids)):
+            bit = self.bit_position[quest_id]
+            packed[bit >> 3] |= 1 << (bit & 7)
+            if i + 1 == len(level_index.levels) or level_index.levels[i + 1] != level:
+                self.level_thresholds.append(level)
+                self.level_masks.append(int.from_bytes(packed, 'little'))
+    
+    def byte_count(self):
+        """Number of bytes needed for one bit per quest"""
+        return (len(self.quest_ids) + 7) // 8
+    
+    def completed_mask(self, quest_ids):
+        """
+        Bitset of the given quest ids, for example a character's
+        completed_quests (ids that no quest refers to are skipped)
+        """
+        bit_position = self.bit_position
+        packed = bytearray((len(bit_position) + 7) // 8)
+        for quest_id in quest_ids:
+            bit = bit_position.get(quest_id)
+            if bit is not None:
+                packed[bit >> 3] |= 1 << (bit & 7)
+        return int.from_bytes(packed, 'little')
+    
+    def requirements_met(self, quest_id, completed, completed_bits):
+        """
+        Check a quest's prerequisites against a character's completed quests
+        
+        A single prerequisite is a membership test on completed. Combined
+        prerequisites are checked with the quest's precompiled masks
+        against completed_bits, so the cost does not grow with the number
+        of prerequisites.
+        
+        Args:
+            quest_id: Quest in the dictionary
+            completed: Completed quest ids (fast membership, e.g. a set)
+            completed_bits: completed_mask(completed)
+        
+        Returns: True if every prerequisite group has a completed quest
+        """
+        masks = self.requirement_masks.get(quest_id)
+        if masks is None:
+            parents = self.parents.get(quest_id, ())
+            return not parents or parents[0] in completed
+        
+        all_mask, any_masks = masks
+        if completed_bits & all_mask != all_mask:
+            return False
+        for mask in any_masks:
+            if not completed_bits & mask:
+                return False
+        return True
+    
+    def level_mask(self, level):
+        """Bitset of every quest a character of this level meets the level for"""
+        index = bisect.bisect_right(self.level_thresholds, level) - 1
+        return self.level_masks[index] if index >= 0 else 0
+    
+    def state_mask(self, character):
+        """
+        Bitset of quests whose prerequisites are done and that are neither
+        completed nor active (ignores required level)
+        
+        Only quests that name a completed quest are looked at, so the cost
+        is O(quests / 8 + completed + active + their dependent quests).
+        """
+        completed = character['completed_quests']
+        completed_bits = self.completed_mask(completed) if self.requirement_masks else 0
+        unlocked = bytearray(self.roots_bytes)
+        bit_position = self.bit_position
+        requirement_masks = self.requirement_masks
+        for quest_id in completed:
+            for child_id in self.children.get(quest_id, ()):
+                if (child_id in requirement_masks and
+                        not self.requirements_met(child_id, completed, completed_bits)):
+                    continue
+                bit = bit_position[child_id]
+                unlocked[bit >> 3] |= 1 << (bit & 7)
+        
+        quest_count = len(self.quest_ids)
+        for quest_id in itertools.chain(completed, character['active_quests']):
+            bit = bit_position.get(quest_id)
+            if bit is not None and bit < quest_count:
+                unlocked[bit >> 3] &= ~(1 << (bit & 7))
+        return int.from_bytes(unlocked, 'little')
+
+def get_quest_bit_index(quest_data_dict):
+    """Get the QuestBitIndex for a quest dictionary, building it on first use"""
+    entry = _get_quest_indexes(quest_data_dict)
+    if entry[3] is None:
+        entry[3] = QuestBitIndex(quest_data_dict, entry[1], entry[2])
+    return entry[3]
+
+class CompletedQuestBits:
+    """
+    A character's completed quests as a QuestBitIndex bitset
+    
+    Kept in character['quest_bits'] (never saved). It is built once with
+    completed_mask and then complete_quest sets one bit per quest, so
+    prerequisite checks do not rebuild the bitset from the whole list.
+    """
+    
+    def __init__(self, character, quest_data_dict):
+        self.quest_data_dict = quest_data_dict
+        self.bits = get_quest_bit_index(quest_data_dict)
+        self.completed_list = character['completed_quests']
+        self.mask = self.bits.completed_mask(self.completed_list)
+        self.state = _list_state(self.completed_list)
+    
+    def is_current(self, character, quest_data_dict):
+        """Return True if the bitset still matches this character and quest data"""
+        return (quest_data_dict is self.quest_data_dict and
+                get_quest_bit_index(quest_data_dict) is self.bits and
+                character['completed_quests'] is self.completed_list and
+                _list_state(self.completed_list) == self.state)
+    
+    def quest_completed(self, quest_id):
+        """Update the bitset after quest_id was added to completed_quests"""
+        bit = self.bits.bit_position.get(quest_id)
+        if bit is not None:
+            self.mask |= 1 << bit
+        self.state = _list_state(self.completed_list)
+
+def get_completed_bits(character, quest_data_dict):
+    """Get the character's CompletedQuestBits, rebuilding it if it is out of date"""
+    completed_bits = character.get('quest_bits')
+    if completed_bits is None or not completed_bits.is_current(character, quest_data_dict):
+        completed_bits = CompletedQuestBits(character, quest_data_dict)
+        character['quest_bits'] = completed_bits
+    return completed_bits
+
+def get_eligibility_bitsets(characters, quest_data_dict):
+    """
+    Work out which quests each character can accept, as bitsets
+    
+    Same rules as can_accept_quest. Bit i of a result is quest i in
+    quest_data_dict order. Each character costs one pass over its own
+    quest lists plus O(quests / 8) byte work, instead of one
+    can_accept_quest call per quest.
+    
+    Returns: List of ints, one per character
+    """
+    bits = get_quest_bit_index(quest_data_dict)
+    return [bits.state_mask(character) & bits.level_mask(character['level'])
+            for character in characters]
+
+def get_eligibility_matrix(characters, quest_data_dict):
+    """
+    Build a characters x quests eligibility matrix
+    
+    matrix[c][q] is True if characters[c] can accept the q-th quest of
+    quest_data_dict (same rules as can_accept_quest). With NumPy
+    installed the level check is vectorized and the result is a boolean
+    array; otherwise it is a list of lists of bools.
+    
+    Returns: Eligibility matrix
+    """
+    bits = get_quest_bit_index(quest_data_dict)
+    quest_count = len(bits.quest_ids)
+    
+    if np is None:
+        matrix = []
+        for eligible in get_eligibility_bitsets(characters, quest_data_dict):
+            # Binary digits come most significant first, so reverse them into bit order
+            digits = format(eligible, 'b').zfill(quest_count)[::-1]
+            matrix.append([digit == '1' for digit in digits])
+        return matrix
+    
+    byte_count = bits.byte_count()
+    packed = np.zeros((len(characters), byte_count), dtype=np.uint8)
+    for row, character in enumerate(characters):
+        state = bits.state_mask(character)
+        packed[row] = np.frombuffer(state.to_bytes(byte_count, 'little'), dtype=np.uint8)
+    
+    state_matrix = np.unpackbits(packed, axis=1, count=quest_count, bitorder='little').astype(bool)
+    levels = np.array([character['level'] for character in characters], dtype=np.int64)
+    required = np.array(bits.required_levels, dtype=np.int64)
+    return state_matrix & (levels[:, None] >= required[None, :])
+
+# ============================================================================
+# QUEST ROUTE PLANNING
+# ============================================================================
+
+def xp_for_level(level):
+    """
+    Total experience needed to climb from level 1 to a level
+    
+    Matches character_manager.gain_experience (level_up_xp = level * 100).
+    """
+    return 50 * level * (level - 1)
+
+class QuestRoutePlanner:
+    """
+    Plans the shortest quest route to a target quest
+    
+    Built once per quest dictionary (see get_quest_route_planner) and
+    reused by every query on it. It memoizes, for each quest that can be
+    unlocked, how many quests its cheapest route takes from scratch; that
+    decides which quest of an OR group a route goes through.
+    
+    Attributes:
+        quest_data_dict: Dictionary of all quest data
+        graph: QuestGraph of the dictionary
+        route_cost: {quest_id: quests on its cheapest route, itself included}
+    """
+    
+    def __init__(self, quest_data_dict, graph):
+        """Memoize route costs in unlock order from the QuestGraph"""
+        self.quest_data_dict = quest_data_dict
+        self.graph = graph
+        self.route_cost = {}
+        for quest_id in graph.order:
+            cost = 1
+            for group in graph.requirements[quest_id]:
+                cost += min(self.route_cost[member] for member in group if member in self.route_cost)
+            self.route_cost[quest_id] = cost
+    
+    def plan(self, character, quest_id):
+        """
+        Plan the quests a character should complete to finish quest_id
+        
+        Quests are picked by walking the prerequisites of quest_id,
+        skipping groups the character has already met and taking the
+        cheapest quest (active quests first) of the others. They are then
+        ordered lowest required level first; when every ready quest is
+        above the character's level, the XP still missing is earned
+        elsewhere (battles) right before it. Doing a quest never hurts a
+        later level gate, so this keeps that extra XP as low as possible.
+        Quests that turn out not to be needed (an OR group met by a quest
+        another group required) are dropped and the rest reordered. The
+        quest count is the minimum when prerequisites are single ids or
+        AND groups; choosing among OR groups exactly is a set cover
+        problem, so there the memoized cheapest branch is used.
+        
+        Returns: Dictionary with:
+            'quests': Quest ids in the order to complete them, ending
+                      with quest_id
+            'extra_xp': XP to earn outside the route before each quest
+            'total_extra_xp': Sum of extra_xp
+            'level': Character level after the route
+        Raises:
+            QuestNotFoundError if a quest on the way doesn't exist
+            QuestAlreadyCompletedError if quest_id is already done
+            InvalidDataFormatError if a prerequisite cycle blocks quest_id
+        """
+        graph = self.graph
+        if quest_id not in graph.parents:
+            raise QuestNotFoundError(f"Quest not found: {quest_id}")
+        completed = character['completed_quests']
+        active = character['active_quests']
+        if quest_id in completed:
+            raise QuestAlreadyCompletedError(f"Quest already completed: {quest_id}")
+        if quest_id not in active and quest_id not in graph.depth:
+            graph._raise_broken_chain(quest_id)
+        
+        chosen = self._choose_quests(quest_id, completed, active)
+        route = self._order(chosen, character)
+        kept = self._prune(quest_id, route['quests'], completed, active)
+        if len(kept) < len(chosen):
+            route = self._order(kept, character)
+        return route
+    
+    def _choose_quests(self, quest_id, completed, active):
+        """Pick the quests to do: quest_id and the cheapest way to meet its prerequisites"""
+        graph = self.graph
+        chosen = {quest_id}
+        stack = [quest_id]
+        while stack:
+            current_id = stack.pop()
+            # Active quests were accepted already, so their prerequisites are skipped
+            if current_id in active:
+                continue
+            for group in graph.requirements[current_id]:
+                if any(member in completed for member in group):
+                    continue
+                choice = min((member for member in group if member in self.route_cost),
+                             key=lambda member: (member not in active, self.route_cost[member],
+                                                 graph.position[member]))
+                if choice not in chosen:
+                    chosen.add(choice)
+                    stack.append(choice)
+        return chosen
+    
+    def _order(self, chosen, character):
+        """Order chosen quests, lowest level gate first, and add up the XP they give"""
+        graph = self.graph
+        completed = character['completed_quests']
+        active = character['active_quests']
+        open_groups = {}
+        ready = []
+        for quest_id in chosen:
+            groups = []
+            if quest_id not in active:
+                groups = [group for group in graph.requirements[quest_id]
+                          if not any(member in completed for member in group)]
+            open_groups[quest_id] = groups
+            if not groups:
+                ready.append((self._gate(quest_id, active), graph.position[quest_id], quest_id))
+        heapq.heapify(ready)
+        
+        level = character['level']
+        experience = character['experience']
+        route = []
+        extra_xp = []
+        while ready:
+            required_level, _, quest_id = heapq.heappop(ready)
+            extra = 0
+            if required_level > level:
+                extra = xp_for_level(required_level) - xp_for_level(level) - experience
+                level, experience = required_level, 0
+            route.append(quest_id)
+            extra_xp.append(extra)
+            
+            experience += self.quest_data_dict[quest_id]['reward_xp']
+            while experience >= level * 100:
+                experience -= level * 100
+                level += 1
+            
+            for child_id in graph.children.get(quest_id, []):
+                groups = open_groups.get(child_id)
+                if not groups:
+                    continue
+                groups[:] = [group for group in groups if quest_id not in group]
+                if not groups:
+                    heapq.heappush(ready, (self._gate(child_id, active), graph.position[child_id], child_id))
+        
+        return {'quests': route, 'extra_xp': extra_xp,
+                'total_extra_xp': sum(extra_xp), 'level': level}
+    
+    def _prune(self, quest_id, route, completed, active):
+        """
+        Keep only the route quests quest_id really needs, walking back from
+        it and meeting each group with a quest done earlier
+        """
+        done_at = {route_id: step for step, route_id in enumerate(route)}
+        kept = {quest_id}
+        for current_id in reversed(route):
+            if current_id not in kept or current_id in active:
+                continue
+            # Groups with a single choice go first so OR groups can reuse it
+            options = []
+            for group in self.graph.requirements[current_id]:
+                if not any(member in completed for member in group):
+                    options.append([member for member in group
+                                    if done_at.get(member, len(route)) < done_at[current_id]])
+            for earlier in sorted(options, key=len):
+                if not any(member in kept for member in earlier):
+                    kept.add(min(earlier, key=done_at.get))
+        return kept
+    
+    def _gate(self, quest_id, active):
+        """Level needed to accept a quest on the route (none if already active)"""
+        if quest_id in active:
+            return 0
+        return self.quest_data_dict[quest_id]['required_level']
+
+def get_quest_route_planner(quest_data_dict):
+    """Get the QuestRoutePlanner for a quest dictionary, building it on first use"""
+    entry = _get_quest_indexes(quest_data_dict)
+    if entry[4] is None:
+        entry[4] = QuestRoutePlanner(quest_data_dict, entry[1])
+    return entry[4]
+
+def plan_quest_route(character, quest_id, quest_data_dict):
+    """
+    Find the fewest quests to complete to finish a target quest
+    
+    Uses the prerequisite graph, required levels and reward XP (see
+    QuestRoutePlanner.plan). Route costs are memoized per quest dictionary,
+    so repeated queries on the same catalog only walk the target's
+    prerequisites.
+    
+    Returns: Route dictionary ('quests', 'extra_xp', 'total_extra_xp', 'level')
+    Raises:
+        QuestNotFoundError if quest doesn't exist
+        QuestAlreadyCompletedError if the quest is already completed
+        InvalidDataFormatError if a prerequisite cycle blocks the quest
+    """
+    if quest_id not in quest_data_dict:
+        raise QuestNotFoundError(f"Quest not found: {quest_id}")
+    return get_quest_route_planner(quest_data_dict).plan(character, quest_id)
 
 # ============================================================================
 # QUEST STATISTICS
@@ -245,6 +1293,8 @@ def get_quest_completion_percentage(character, quest_data_dict):
     """
     Calculate what percentage of all quests have been completed
     
+    O(1): only the lengths of completed_quests and quest_data_dict are used.
+    
     Returns: Float between 0 and 100
     """
     total_quests = len(quest_data_dict)
@@ -258,8 +1308,24 @@ def get_total_quest_rewards_earned(character, quest_data_dict):
     """
     Calculate total XP and gold earned from completed quests
     
+    Reads the running totals complete_quest keeps in
+    character['quest_rewards']. They are rebuilt first if missing (legacy
+    saves) or if completed_quests changed outside complete_quest.
+    
     Returns: Dictionary with 'total_xp' and 'total_gold'
     """
+    totals = character.get('quest_rewards')
+    if totals is None or totals['count'] != len(character['completed_quests']):
+        totals = rebuild_quest_rewards(character, quest_data_dict)
+    
+    return {'total_xp': totals['total_xp'], 'total_gold': totals['total_gold']}
+
+def rebuild_quest_rewards(character, quest_data_dict):
+    """
+    Recompute the running quest reward totals from completed_quests
+    
+    Returns: The new character['quest_rewards'] dictionary
+    """
     total_xp = 0
     total_gold = 0
     
@@ -269,19 +1335,83 @@ def get_total_quest_rewards_earned(character, quest_data_dict):
             total_xp += quest.get('reward_xp', 0)
             total_gold += quest.get('reward_gold', 0)
     
-    return {'total_xp': total_xp, 'total_gold': total_gold}
+    totals = {'total_xp': total_xp, 'total_gold': total_gold,
+              'count': len(character['completed_quests'])}
+    character['quest_rewards'] = totals
+    return totals
+
+def verify_quest_rewards(character, quest_data_dict):
+    """
+    Check the stored quest reward totals against completed_quests
+    
+    Totals that are missing or wrong are rebuilt.
+    
+    Returns: True if the stored totals were already correct
+    """
+    stored = character.get('quest_rewards')
+    rebuilt = rebuild_quest_rewards(character, quest_data_dict)
+    return stored == rebuilt
 
 def get_quests_by_level(quest_data_dict, min_level, max_level):
     """
     Get all quests within a level range
     
-    Returns: List of quest dictionaries
+    Uses the quest level index, so the cost is O(log n + k) for k results.
+    
+    Returns: List of quest dictionaries, lowest required level first
     """
-    quests = []
-    for quest in quest_data_dict.values():
-        if min_level <= quest['required_level'] <= max_level:
-            quests.append(quest)
-    return quests
+    quest_ids = _quest_ids_in_level_range(quest_data_dict, min_level, max_level)
+    return [quest_data_dict[quest_id] for quest_id in quest_ids]
+
+def _quest_ids_in_level_range(quest_data_dict, min_level, max_level):
+    """Read a level range from the level index, rebuilding it first if it is stale"""
+    index = get_quest_level_index(quest_data_dict)
+    if not index.is_current(quest_data_dict, min_level, max_level):
+        rebuild_quest_graph(quest_data_dict)
+        index = get_quest_level_index(quest_data_dict)
+    return index.quest_ids_in_range(min_level, max_level)
+
+def get_quest_board(character, quest_data_dict, min_level=None, max_level=None,
+                    min_xp=0, min_gold=0, prerequisites_met=True):
+    """
+    Get quests for the quest board, filtered in one pass over a level range
+    
+    Args:
+        character: Character dictionary
+        quest_data_dict: Dictionary of all quest data
+        min_level: Lowest required level shown (default: no limit)
+        max_level: Highest required level shown (default: character level)
+        min_xp: Only quests rewarding at least this much XP
+        min_gold: Only quests rewarding at least this much gold
+        prerequisites_met: Only quests whose prerequisites are completed
+    
+    Completed and active quests are never shown.
+    
+    Returns: List of quest dictionaries, lowest required level first
+    """
+    if min_level is None:
+        min_level = float('-inf')
+    if max_level is None:
+        max_level = character['level']
+    
+    quest_ids = _quest_ids_in_level_range(quest_data_dict, min_level, max_level)
+    completed = character['completed_quests']
+    active = character['active_quests']
+    bits = get_quest_bit_index(quest_data_dict)
+    completed_bits = 0
+    if prerequisites_met and bits.requirement_masks:
+        completed_bits = get_completed_bits(character, quest_data_dict).mask
+    board = []
+    for quest_id in quest_ids:
+        quest = quest_data_dict[quest_id]
+        if quest['reward_xp'] < min_xp or quest['reward_gold'] < min_gold:
+            continue
+        if quest_id in completed or quest_id in active:
+            continue
+        if prerequisites_met and not bits.requirements_met(quest_id, completed, completed_bits):
+            continue
+        board.append(quest)
+    return board
 
 # ============================================================================
 # DISPLAY FUNCTIONS
@@ -297,6 +1427,8 @@ def display_quest_info(quest_data):
     print(f"Description: {quest_data['description']}")
     print(f"Required Level: {quest_data['required_level']}")
     print(f"Rewards: {quest_data['reward_xp']} XP, {quest_data['reward_gold']} Gold")
+    for objective in quest_data.get('objectives', []):
+        print(f"Objective: {objective['event']} {' or '.join(objective['targets'])} x{objective['count']}")
 
 def display_quest_list(quest_list):
     """
@@ -339,10 +1471,124 @@ def validate_quest_prerequisites(quest_data_dict):
     Returns: True if all valid
     Raises: QuestNotFoundError if invalid prerequisite found
     """
-    for quest_id, quest in quest_data_dict.items():
-        prerequisite = quest.get('prerequisite', 'NONE')
-        if prerequisite != 'NONE' and prerequisite not in quest_data_dict:
-            raise QuestNotFoundError(f"Invalid prerequisite: {prerequisite}")
+    for quest_id, parents in get_quest_graph(quest_data_dict).parents.items():
+        for prerequisite in parents:
+            if prerequisite not in quest_data_dict:
+                raise QuestNotFoundError(f"Invalid prerequisite: {prerequisite}")
+    
+    return True
+
+def check_quest_graph(quest_data_dict):
+    """
+    Find every problem in the quest prerequisite graph in linear time
+    
+    Quests that can never be unlocked are split into cycles (strongly
+    connected groups among the prerequisites holding them back), quests
+    naming a missing prerequisite, and the quests stuck behind those.
+    
+    Returns: Dictionary report:
+            {'cycles': [[quest ids in the cycle], ...],
+             'dangling': [(quest_id, missing prerequisite id), ...],
+             'unreachable': [quest ids that depend on a cycle or a
+                             missing prerequisite]}
+    """
+    graph = get_quest_graph(quest_data_dict)
+    parents = graph.parents
+    
+    dangling = [(quest_id, parent_id) for quest_id, quest_parents in parents.items()
+                for parent_id in quest_parents if parent_id not in parents]
+    
+    # Edges of a locked quest lead to the members of its groups that have
+    # no unlocked quest; every such member is locked as well
+    blocking = {}
+    for quest_id in parents:
+        if quest_id not in graph.depth:
+            blocking[quest_id] = [parent_id for group in graph.requirements[quest_id]
+                                  if not any(member in graph.depth for member in group)
+                                  for parent_id in group if parent_id in parents]
+    
+    cycles = []
+    for component in _strongly_connected(blocking):
+        if len(component) > 1 or component[0] in blocking[component[0]]:
+            cycles.append(sorted(component, key=graph.position.get))
+    cycles.sort(key=lambda cycle: graph.position[cycle[0]])
+    
+    reported = {quest_id for cycle in cycles for quest_id in cycle}
+    reported.update(quest_id for quest_id, _ in dangling)
+    unreachable = [quest_id for quest_id in blocking if quest_id not in reported]
+    
+    return {'cycles': cycles, 'dangling': dangling, 'unreachable': unreachable}
+
+def _strongly_connected(edges):
+    """
+    Tarjan's strongly connected components, without recursion
+    
+    Args:
+        edges: {node: [nodes it points to]}, every target is also a key
+    
+    Returns: List of components (lists of nodes)
+    """
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    
+    for start in edges:
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(edges[start]))]
+        while work:
+            node, targets = work[-1]
+            for target in targets:
+                if target not in index:
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(edges[target])))
+                    break
+                if target in on_stack:
+                    low[node] = min(low[node], index[target])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+def validate_quest_graph(quest_data_dict):
+    """
+    Validate the whole quest prerequisite graph after loading quests
+    
+    Returns: True if every quest can be reached from a quest without
+             prerequisites
+    Raises: InvalidDataFormatError listing every cycle, missing
+            prerequisite and unreachable quest
+    """
+    report = check_quest_graph(quest_data_dict)
+    
+    problems = []
+    for cycle in report['cycles']:
+        problems.append("Prerequisite cycle between: " + ", ".join(cycle))
+    for quest_id, prerequisite in report['dangling']:
+        problems.append(f"Missing prerequisite: {quest_id} requires {prerequisite}")
+    for quest_id in report['unreachable']:
+        problems.append(f"Unreachable quest: {quest_id}")
+    
+    if problems:
+        raise InvalidDataFormatError("Invalid quest prerequisites:\n" + "\n".join(problems))
     
     return True
 
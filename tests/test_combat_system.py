@@ -0,0 +1,774 @@
+"""
+Test Combat System
+Tests for battle simulation and combat extensions
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import character_manager
+import combat_system
+
+# ============================================================================
+# BATTLE SIMULATION TESTS
+# ============================================================================
+
+def test_simulate_attack_only_battle_is_deterministic():
+    """Test that attack-only battles always end the same way"""
+    char = character_manager.create_character("SimTest", "Warrior")
+    enemy = combat_system.create_enemy("goblin")
+
+    stats = combat_system.simulate_battles(char, enemy, 'attack', n_battles=50, seed=1)
+
+    # Warrior deals 15 - 8 // 4 = 13 damage, goblin has 50 health
+    assert stats['wins'] == 50
+    assert stats['win_rate'] == 1.0
+    assert stats['turn_counts'] == {4: 50}
+    assert stats['expected_xp'] == enemy['xp_reward']
+    assert char['health'] == char['max_health']  # Inputs not modified
+
+def test_simulate_pure_python_fallback(monkeypatch):
+    """Test that the simulator works without NumPy"""
+    monkeypatch.setattr(combat_system, 'np', None)
+    char = character_manager.create_character("SimTest", "Rogue")
+    enemy = combat_system.create_enemy("orc")
+
+    stats = combat_system.simulate_battles(char, enemy, 'escape', n_battles=200, seed=1)
+
+    assert stats['escapes'] + stats['losses'] + stats['timeouts'] == 200
+    assert stats['wins'] == 0
+    assert sum(stats['turn_counts'].values()) == 200
+
+def test_simulate_balance_grid_keys():
+    """Test that the balance grid covers every level/class/enemy"""
+    grid = combat_system.simulate_balance_grid([1, 5], n_battles=10, seed=1)
+
+    assert len(grid) == 2 * 4 * 3
+    assert (5, 'Cleric', 'dragon') in grid
+
+def test_simulate_invalid_policy():
+    """Test that unknown policies are rejected"""
+    char = character_manager.create_character("SimTest", "Mage")
+    enemy = combat_system.create_enemy("goblin")
+
+    with pytest.raises(ValueError):
+        combat_system.simulate_battles(char, enemy, 'dance')
+
+# ============================================================================
+# BATTLE PREDICTION TESTS
+# ============================================================================
+
+def test_predict_attack_only_battle():
+    """Test closed-form prediction of a deterministic battle"""
+    char = character_manager.create_character("PredictTest", "Warrior")
+    enemy = combat_system.create_enemy("goblin")
+
+    prediction = combat_system.predict_battle(char, enemy, 'attack')
+
+    assert prediction['winner'] == 'player'
+    assert prediction['win_probability'] == 1.0
+    assert prediction['turn_distribution'] == {4: 1.0}
+
+def test_predict_rogue_critical_strike_distribution():
+    """Test that the Rogue crit distribution is exact and sums to one"""
+    char = character_manager.create_character("PredictTest", "Rogue")
+    enemy = combat_system.create_enemy("goblin")
+
+    prediction = combat_system.predict_battle(char, enemy, 'special')
+
+    # Critical Strike deals 12 * 3 - 2 = 34 damage, so two hits are needed
+    assert prediction['turn_distribution'][2] == 0.25
+    assert sum(prediction['turn_distribution'].values()) == pytest.approx(1.0)
+    assert prediction['win_probability'] + prediction['loss_probability'] == pytest.approx(1.0)
+
+def test_predict_escape_matches_simulation():
+    """Test that predicted escape odds agree with the simulator"""
+    char = character_manager.create_character("PredictTest", "Mage")
+    enemy = combat_system.create_enemy("dragon")
+
+    prediction = combat_system.predict_battle(char, enemy, 'escape')
+    stats = combat_system.simulate_battles(char, enemy, 'escape', n_battles=20000, seed=7)
+
+    assert prediction['win_probability'] == 0.0
+    assert prediction['escape_probability'] == pytest.approx(stats['escapes'] / 20000, abs=0.02)
+
+# ============================================================================
+# ENEMY REGISTRY TESTS
+# ============================================================================
+
+def test_enemy_registry_loaded_from_data_file():
+    """Test that the required enemies are registered at import"""
+    for enemy_type in ['goblin', 'orc', 'dragon']:
+        assert enemy_type in combat_system.get_enemy_types()
+
+    enemy = combat_system.create_enemy("DRAGON")
+    assert enemy['name'] == "Dragon"
+    assert enemy['health'] == enemy['max_health']
+
+def test_create_enemy_returns_independent_copies():
+    """Test that damaging one enemy does not change the template"""
+    first = combat_system.create_enemy("goblin")
+    first['health'] = 0
+
+    second = combat_system.create_enemy("goblin")
+    assert second['health'] == 50
+
+def test_enemy_registry_custom_file(tmp_path):
+    """Test rebuilding the registry from another enemy file"""
+    enemy_file = tmp_path / "enemies.txt"
+    enemy_file.write_text("ENEMY_ID: Slime\nNAME: Slime\nHEALTH: 10\nSTRENGTH: 1\n"
+                          "MAGIC: 0\nXP_REWARD: 5\nGOLD_REWARD: 1\n")
+    try:
+        combat_system.load_enemy_registry(str(enemy_file))
+        assert combat_system.get_enemy_types() == ['slime']
+        assert combat_system.create_enemy("slime")['max_health'] == 10
+    finally:
+        combat_system.load_enemy_registry()
+
+    assert 'slime' not in combat_system.get_enemy_types()
+
+def test_enemy_registry_rejects_invalid_data():
+    """Test that enemies with missing stats are rejected"""
+    from custom_exceptions import InvalidDataFormatError
+
+    with pytest.raises(InvalidDataFormatError):
+        combat_system.register_enemy({'enemy_id': 'ghost', 'name': 'Ghost'})
+
+# ============================================================================
+# ENEMY SPAWNING TESTS
+# ============================================================================
+
+def test_random_enemy_level_bands():
+    """Test that the default level bands are respected"""
+    assert combat_system.get_random_enemy_for_level(1)['name'] == "Goblin"
+    assert combat_system.get_random_enemy_for_level(2)['name'] == "Goblin"
+    assert combat_system.get_random_enemy_for_level(3)['name'] == "Orc"
+    assert combat_system.get_random_enemy_for_level(5)['name'] == "Orc"
+    assert combat_system.get_random_enemy_for_level(6)['name'] == "Dragon"
+    assert combat_system.get_random_enemy_for_level(100)['name'] == "Dragon"
+
+def test_weighted_spawn_chances():
+    """Test that overlapping bands are weighted by spawn_weight"""
+    wolf = {'enemy_id': 'wolf', 'name': 'Wolf', 'health': 40, 'strength': 9,
+            'magic': 0, 'xp_reward': 20, 'gold_reward': 5,
+            'min_level': 2, 'max_level': 4, 'spawn_weight': 3}
+    try:
+        combat_system.register_enemy(wolf)
+        chances = combat_system.get_eligible_enemies(3)
+        assert chances['wolf'] == pytest.approx(0.75)
+        assert chances['orc'] == pytest.approx(0.25)
+        assert combat_system.get_eligible_enemies(5) == {'orc': 1.0}
+        assert combat_system.get_random_enemy_for_level(3)['name'] in ["Wolf", "Orc"]
+    finally:
+        combat_system.load_enemy_registry()
+
+def test_alias_table_preserves_weights():
+    """Test that alias tables reproduce the input distribution"""
+    weights = [1, 2, 3, 4]
+    probabilities, aliases = combat_system.build_alias_table(weights)
+
+    chances = [0.0] * len(weights)
+    for column in range(len(weights)):
+        chances[column] += probabilities[column] / len(weights)
+        chances[aliases[column]] += (1 - probabilities[column]) / len(weights)
+
+    assert chances == pytest.approx([0.1, 0.2, 0.3, 0.4])
+
+# ============================================================================
+# RANDOM STREAM TESTS
+# ============================================================================
+
+def test_battle_rng_replays_exactly():
+    """Test that battles with the same seed make the same random choices"""
+    char = character_manager.create_character("ReplayTest", "Rogue")
+
+    first = combat_system.SimpleBattle(char, combat_system.create_enemy("orc"), seed=99)
+    second = combat_system.SimpleBattle(char, combat_system.create_enemy("orc"), seed=99)
+
+    first_escapes = [first.attempt_escape() for _ in range(20)]
+    second_escapes = [second.attempt_escape() for _ in range(20)]
+    assert first_escapes == second_escapes
+
+def test_battle_records_seed():
+    """Test that unseeded battles still record a seed for replay"""
+    char = character_manager.create_character("ReplayTest", "Mage")
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"))
+
+    replay = combat_system.BattleRNG(battle.rng.seed)
+    assert [battle.rng.random() for _ in range(5)] == [replay.random() for _ in range(5)]
+
+def test_battle_rng_spawn_is_deterministic():
+    """Test that child streams are independent and reproducible"""
+    children = combat_system.BattleRNG(7).spawn(3)
+    again = combat_system.BattleRNG(7).spawn(3)
+
+    assert [c.seed for c in children] == [c.seed for c in again]
+    assert len(set(c.seed for c in children)) == 3
+
+def test_rogue_critical_strike_uses_stream():
+    """Test that the Rogue ability draws from the given stream"""
+    char = character_manager.create_character("ReplayTest", "Rogue")
+    results = []
+    for _ in range(2):
+        rng = combat_system.BattleRNG(3)
+        enemy = combat_system.create_enemy("dragon")
+        results.append([combat_system.use_special_ability(char, enemy, rng) for _ in range(10)])
+
+    assert results[0] == results[1]
+
+# ============================================================================
+# TOURNAMENT TESTS
+# ============================================================================
+
+def test_tournament_results_independent_of_workers():
+    """Test that the tournament gives the same results in-process and in a pool"""
+    serial = combat_system.run_tournament(levels=[1, 4], policy='special', n_battles=50,
+                                          seed=11, max_workers=1)
+    pooled = combat_system.run_tournament(levels=[1, 4], policy='special', n_battles=50,
+                                          seed=11, max_workers=2)
+
+    assert serial['matchups'] == pooled['matchups']
+    assert len(serial['matchups']) == 2 * 4 * 3
+
+def test_tournament_aggregates_and_streams():
+    """Test class summaries and incremental result callbacks"""
+    streamed = []
+    results = combat_system.run_tournament(levels=[1], character_classes=['Warrior'],
+                                           enemy_types=['goblin'], n_battles=10,
+                                           seed=1, max_workers=1,
+                                           on_result=lambda key, stats: streamed.append(key))
+
+    assert streamed == [(1, 'Warrior', 'goblin')]
+    summary = results['classes']['Warrior']
+    assert summary['battles'] == 10
+    assert summary['win_rate'] == 1.0
+    assert summary['average_xp'] == 25
+
+def test_tournament_validates_arguments_eagerly():
+    """Test that bad tournament arguments fail before iteration starts"""
+    with pytest.raises(ValueError):
+        combat_system.iter_tournament_results(levels=[1], policy='dance')
+    with pytest.raises(combat_system.InvalidTargetError):
+        combat_system.iter_tournament_results(levels=[1], enemy_types=['unicorn'])
+
+# ============================================================================
+# BATTLE SCHEDULER TESTS
+# ============================================================================
+
+def test_take_turn_without_input():
+    """Test that battles can be played turn by turn without prompting"""
+    char = character_manager.create_character("TurnTest", "Warrior")
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"), verbose=False)
+
+    battle.begin()
+    results = [battle.take_turn('1') for _ in range(4)]
+
+    assert results[:3] == [None, None, None]
+    assert results[3]['winner'] == 'player'
+    assert battle.turn_counter == 4
+    assert not battle.combat_active
+
+def test_scheduler_runs_many_battles():
+    """Test that one event loop drives many battles with submitted actions"""
+    import asyncio
+
+    async def run():
+        scheduler = combat_system.BattleScheduler(turn_timeout=5)
+        battle_ids = []
+        for i in range(50):
+            char = character_manager.create_character(f"Sched{i}", "Warrior")
+            enemy = combat_system.create_enemy("goblin")
+            battle_ids.append(scheduler.start(combat_system.SimpleBattle(char, enemy, verbose=False)))
+        for _ in range(4):
+            for battle_id in battle_ids:
+                scheduler.submit_action(battle_id, '1')
+        return await scheduler.wait_all()
+
+    results = asyncio.run(run())
+
+    assert len(results) == 50
+    assert all(result['winner'] == 'player' for result in results.values())
+
+def test_scheduler_turn_timeout_uses_default_action():
+    """Test that a player who never answers gets the default action"""
+    import asyncio
+
+    async def run():
+        scheduler = combat_system.BattleScheduler(turn_timeout=0.01, default_action='1')
+        char = character_manager.create_character("Idle", "Warrior")
+        battle_id = scheduler.start(combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"),
+                                                               verbose=False))
+        return await scheduler.wait(battle_id)
+
+    assert asyncio.run(run())['winner'] == 'player'
+
+# ============================================================================
+# BATTLE EVENT LOG TESTS
+# ============================================================================
+
+def test_battle_records_structured_events():
+    """Test that each action is recorded as a structured event"""
+    char = character_manager.create_character("LogTest", "Warrior")
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"), verbose=False)
+
+    battle.begin()
+    battle.take_turn('1')
+
+    assert battle.events.to_dicts() == [
+        {'turn': 1, 'actor': 'player', 'action': 'attack', 'damage': 13, 'remaining_health': 37},
+        {'turn': 1, 'actor': 'enemy', 'action': 'attack', 'damage': 5, 'remaining_health': 115}
+    ]
+
+def test_special_events_come_from_ability_result():
+    """Test that heals are logged as heals even when nothing was restored"""
+    char = character_manager.create_character("HealLog", "Cleric")
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"), verbose=False)
+    battle.begin()
+    battle.take_turn('2')
+
+    assert battle.events.to_dicts()[0] == {'turn': 1, 'actor': 'player', 'action': 'heal',
+                                           'damage': 0, 'remaining_health': 100}
+
+    drain = {'class': 'Paladin', 'name': 'Drain', 'stat': 'strength',
+             'multiplier': 1, 'defense_divisor': 0, 'hit_chance': 1.0, 'heal': 10,
+             'cooldown': 0, 'message': "{name} drains {damage}!"}
+    paladin = {'name': 'Hero', 'class': 'Paladin', 'health': 50, 'max_health': 100,
+               'strength': 12, 'magic': 0}
+    try:
+        combat_system.register_ability(drain)
+        battle = combat_system.SimpleBattle(paladin, combat_system.create_enemy("goblin"), verbose=False)
+        battle.begin()
+        battle.perform_action('2')
+    finally:
+        combat_system.load_ability_registry()
+
+    assert [(event['action'], event['damage']) for event in battle.events.to_dicts()] == [
+        ('special', 12), ('heal', -10)]
+
+def test_ability_messages_formatted_only_when_described():
+    """Test that ability outcomes carry a template instead of a built string"""
+    char = character_manager.create_character("Quiet", "Mage")
+    outcome = combat_system.resolve_special_ability(char, combat_system.create_enemy("orc"))
+
+    assert outcome['template'] == "Mage casts Fireball for {damage} damage!"
+    assert outcome['values']['damage'] == 40
+    assert combat_system.describe_outcome(outcome) == "Mage casts Fireball for 40 damage!"
+
+def test_battle_log_ring_buffer_drops_oldest():
+    """Test that the event buffer keeps only the newest events"""
+    log = combat_system.BattleLog(capacity=3)
+    for turn in range(1, 6):
+        log.record(turn, 'enemy', 'attack', 1, 100 - turn)
+
+    assert [event['turn'] for event in log.to_dicts()] == [3, 4, 5]
+    assert log.dropped() == 2
+
+def test_battle_log_exports(tmp_path):
+    """Test JSON-lines and binary exports round-trip the events"""
+    import json
+
+    log = combat_system.BattleLog()
+    log.record(1, 'player', 'special', 30, 20)
+    log.record(1, 'enemy', 'attack', 8, 72)
+    log.record(2, 'player', 'heal', -30, 100)
+
+    json_file = tmp_path / "battle.jsonl"
+    binary_file = tmp_path / "battle.bin"
+    log.export_json_lines(str(json_file))
+    log.export_binary(str(binary_file))
+
+    lines = json_file.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == log.to_dicts()
+    assert combat_system.load_binary_log(str(binary_file)) == log.to_dicts()
+
+def test_load_binary_log_rejects_bad_file(tmp_path):
+    """Test that non-log files raise CorruptedDataError"""
+    from custom_exceptions import CorruptedDataError
+
+    bad_file = tmp_path / "bad.bin"
+    bad_file.write_bytes(b"not a log")
+
+    with pytest.raises(CorruptedDataError):
+        combat_system.load_binary_log(str(bad_file))
+
+# ============================================================================
+# COOLDOWN AND EFFECT TESTS
+# ============================================================================
+
+def test_special_ability_cooldown_enforced_in_battle():
+    """Test that AbilityOnCooldownError is raised when reusing an ability too soon"""
+    from custom_exceptions import AbilityOnCooldownError
+
+    char = character_manager.create_character("CooldownTest", "Cleric")
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("dragon"), verbose=False)
+    battle.begin()
+
+    battle.take_turn('2')
+    with pytest.raises(AbilityOnCooldownError):
+        battle.take_turn('2')
+    battle.take_turn('1')
+    battle.take_turn('1')
+    battle.take_turn('2')  # Cleric cooldown of 2 turns has passed
+
+def test_special_ability_without_tracker_has_no_cooldown():
+    """Test that use_special_ability outside battle keeps working every call"""
+    char = character_manager.create_character("CooldownTest", "Warrior")
+    enemy = combat_system.create_enemy("dragon")
+
+    combat_system.use_special_ability(char, enemy)
+    combat_system.use_special_ability(char, enemy)
+
+    assert enemy['health'] == 200 - 2 * (30 - 6)
+
+def test_damage_over_time_ticks_and_expires():
+    """Test that damage over time hits once per turn for its duration"""
+    enemy = combat_system.create_enemy("orc")
+    effects = combat_system.EffectTracker()
+    effects.register('enemy', enemy)
+
+    effects.add_damage_over_time('enemy', 5, 3)
+    effects.add_damage_over_time('enemy', 2, 1)
+    assert effects.damage_over_time_remaining('enemy') == 3
+    ticks = [effects.advance_turn() for _ in range(4)]
+
+    assert ticks == [[('enemy', 7)], [('enemy', 5)], [('enemy', 5)], []]
+    assert enemy['health'] == 80 - 17
+    assert effects.damage_over_time_remaining('enemy') == 0
+
+def test_fireball_burns_enemy_after_hit():
+    """Test that Fireball's damage over time ticks twice in battle and then stops"""
+    char = combat_system.build_character_at_level('Mage', 3)
+    enemy = combat_system.create_enemy("dragon")
+    battle = combat_system.SimpleBattle(char, enemy, verbose=False)
+    battle.begin()
+
+    battle.take_turn('2')
+    battle.take_turn('1')
+    battle.take_turn('1')
+
+    ticks = [(event['turn'], event['damage']) for event in battle.events.to_dicts()
+             if event['action'] == 'damage_over_time']
+    assert ticks == [(1, 5), (2, 5)]
+    assert battle.effects.damage_over_time_remaining('enemy') == 0
+
+def test_predict_fireball_burn_matches_simulation(monkeypatch):
+    """Test that the predictor and both simulators count the Fireball burn"""
+    # Without the burn this Mage falls to the dragon on turn 6
+    char = combat_system.build_character_at_level('Mage', 5)
+    enemy = combat_system.create_enemy("dragon")
+
+    prediction = combat_system.predict_battle(char, enemy, 'special')
+    stats = combat_system.simulate_battles(char, enemy, 'special', n_battles=50, seed=2)
+    monkeypatch.setattr(combat_system, 'np', None)
+    fallback = combat_system.simulate_battles(char, enemy, 'special', n_battles=50, seed=2)
+
+    battle = combat_system.SimpleBattle(char, enemy, seed=2, verbose=False)
+    battle.begin()
+    while battle.combat_active:
+        battle.take_turn('1' if battle.effects.cooldown_remaining('player', 'Mage') else '2')
+
+    assert prediction['win_probability'] == stats['win_rate'] == fallback['win_rate'] == 1.0
+    assert prediction['expected_turns'] == stats['average_turns'] == fallback['average_turns']
+    assert battle.turn_counter == stats['average_turns'] == 5
+    assert battle.result['winner'] == 'player'
+
+def test_shield_absorbs_damage_until_expired():
+    """Test that shields absorb damage and expire without touching the combatant"""
+    char = character_manager.create_character("ShieldTest", "Warrior")
+    effects = combat_system.EffectTracker()
+    effects.register('player', char)
+
+    effects.add_shield('player', 10, 2)
+    assert effects.apply_damage(char, 4) == 0
+    assert effects.shield('player') == 6
+
+    effects.advance_turn()
+    effects.advance_turn()
+    assert effects.shield('player') == 0
+    assert effects.apply_damage(char, 4) == 4
+    assert 'shield' not in char
+
+def test_special_ability_on_cooldown_reprompts(monkeypatch, capsys):
+    """Test that the interactive loop asks again instead of attacking"""
+    char = character_manager.create_character("PromptTest", "Cleric")
+    enemy = combat_system.create_enemy("dragon")
+    battle = combat_system.SimpleBattle(char, enemy, verbose=False)
+    battle.begin()
+    battle.take_turn('2')
+
+    answers = iter(['2', '3'])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    battle.player_turn()
+
+    assert "choose another action" in capsys.readouterr().out
+    assert [event['action'] for event in battle.events.to_dicts()][-1].startswith('escape')
+    assert enemy['health'] == 200
+
+def test_predict_special_with_cooldown_matches_simulation():
+    """Test that the predictor models special-when-ready with cooldowns"""
+    char = combat_system.build_character_at_level('Cleric', 4)
+    enemy = combat_system.create_enemy("orc")
+
+    prediction = combat_system.predict_battle(char, enemy, 'special')
+    stats = combat_system.simulate_battles(char, enemy, 'special', n_battles=500, seed=2)
+
+    assert prediction['win_probability'] == stats['win_rate']
+    assert prediction['expected_turns'] == pytest.approx(stats['average_turns'])
+
+# ============================================================================
+# ABILITY REGISTRY TESTS
+# ============================================================================
+
+def test_abilities_loaded_for_every_class():
+    """Test that each class has a data-driven special ability"""
+    for character_class in ['Warrior', 'Mage', 'Rogue', 'Cleric']:
+        assert character_class in combat_system.ABILITY_TEMPLATES
+
+    char = character_manager.create_character("AbilityTest", "Mage")
+    enemy = combat_system.create_enemy("orc")
+    assert combat_system.use_special_ability(char, enemy) == "Mage casts Fireball for 40 damage!"
+    assert enemy['health'] == 40
+
+def test_register_ability_for_new_class():
+    """Test that a new class ability works without code changes"""
+    paladin = {'class': 'Paladin', 'name': 'Smite', 'stat': 'strength',
+               'multiplier': 1, 'defense_divisor': 0, 'hit_chance': 1.0, 'heal': 10,
+               'cooldown': 0, 'message': "{name} smites for {damage} and heals {healed}!"}
+    char = {'name': 'Hero', 'class': 'Paladin', 'health': 50, 'max_health': 100,
+            'strength': 12, 'magic': 0}
+    enemy = combat_system.create_enemy("goblin")
+    try:
+        combat_system.register_ability(paladin)
+        result = combat_system.use_special_ability(char, enemy)
+        prediction = combat_system.predict_battle(char, combat_system.create_enemy("goblin"), 'special')
+    finally:
+        combat_system.load_ability_registry()
+
+    assert result == "Hero smites for 12 and heals 10!"
+    assert enemy['health'] == 38
+    assert char['health'] == 60
+    assert prediction['turn_distribution'] == {5: 1.0}
+    assert 'Paladin' not in combat_system.ABILITY_TEMPLATES
+
+def test_invalid_ability_data_rejected():
+    """Test that abilities scaling an unknown stat are rejected"""
+    from custom_exceptions import InvalidDataFormatError
+
+    bad = {'class': 'Bard', 'name': 'Song', 'stat': 'charisma', 'multiplier': 2,
+           'defense_divisor': 0, 'hit_chance': 1.0, 'heal': 0, 'cooldown': 0,
+           'message': "{damage}"}
+    with pytest.raises(InvalidDataFormatError):
+        combat_system.register_ability(bad)
+
+    # Damage over time lasting past the cooldown would stack on itself
+    stacking = dict(combat_system.ABILITY_TEMPLATES['Mage'], dot_turns=3)
+    with pytest.raises(InvalidDataFormatError):
+        combat_system.register_ability(stacking)
+
+    # Placeholders are checked when the ability is loaded, not when it is used
+    for field, message in [('message', "{name} hits for {dmg}!"),
+                           ('message', "{name} hits for {0}!"),
+                           ('miss_message', "{name} missed for {damage}!"),
+                           ('miss_message', "{name missed!")]:
+        typo = dict(combat_system.ABILITY_TEMPLATES['Rogue'], **{field: message})
+        with pytest.raises(InvalidDataFormatError):
+            combat_system.register_ability(typo)
+    assert combat_system.ABILITY_TEMPLATES['Rogue']['miss_message'] == "Rogue's attack missed!"
+
+# ============================================================================
+# PARTY BATTLE TESTS
+# ============================================================================
+
+def test_target_index_tracks_updates():
+    """Test that the target index returns the current lowest score"""
+    index = combat_system.TargetIndex()
+    index.update('a', 30)
+    index.update('b', 20)
+    index.update('b', 50)
+    index.update('c', 40)
+    assert index.best() == 'a'
+    index.remove('a')
+    assert index.best() == 'c'
+    for health in range(100):
+        index.update('c', health + 1000)
+    assert index.best() == 'b'
+    assert len(index.heap) <= 4 * len(index.scores) + 16
+
+def test_party_targets_lowest_health_enemy():
+    """Test that party members focus the weakest enemy"""
+    party = [combat_system.build_character_at_level("Warrior", 1)]
+    enemies = [combat_system.create_enemy("orc"), combat_system.create_enemy("goblin")]
+    battle = combat_system.PartyBattle(party, enemies, seed=3)
+    assert battle.choose_target('enemies') == 'enemies:1'
+    enemies[0]['health'] = 10
+    battle._health_changed('enemies:0')
+    assert battle.choose_target('enemies') == 'enemies:0'
+
+def test_enemies_target_highest_threat():
+    """Test that enemies focus the party member who dealt the most damage"""
+    party = [combat_system.build_character_at_level("Warrior", 1, "Tank"),
+             combat_system.build_character_at_level("Mage", 1, "Caster")]
+    enemies = [combat_system.create_enemy("dragon")]
+    battle = combat_system.PartyBattle(party, enemies, seed=3)
+    battle.begin()
+    battle._act('party:1')
+    assert battle.choose_target('party') == 'party:1'
+
+def test_party_battle_is_reproducible():
+    """Test that large party battles finish and repeat under a seed"""
+    def run():
+        party = [combat_system.build_character_at_level(c, 10)
+                 for c in ["Warrior", "Mage", "Rogue", "Cleric"] * 5]
+        enemies = [combat_system.create_enemy(e) for e in ["goblin", "orc", "dragon"] * 8]
+        battle = combat_system.PartyBattle(party, enemies, seed=11)
+        return battle.start_battle(), [c['health'] for c in party]
+
+    first = run()
+    assert first == run()
+    assert first[0]['winner'] in ('player', 'enemy', 'timeout')
+
+def test_party_battle_rewards_and_validation():
+    """Test rewards from a won group fight and rejected setups"""
+    party = [combat_system.build_character_at_level("Warrior", 20)]
+    enemies = [combat_system.create_enemy("goblin") for _ in range(3)]
+    result = combat_system.PartyBattle(party, enemies, seed=1).start_battle()
+    assert result['winner'] == 'player'
+    assert result['xp_gained'] == 75
+    assert result['gold_gained'] == 30
+
+    from custom_exceptions import InvalidTargetError
+    with pytest.raises(InvalidTargetError):
+        combat_system.PartyBattle(party, [])
+    with pytest.raises(InvalidTargetError):
+        combat_system.PartyBattle(party, enemies, party_targeting='random')
+
+# ============================================================================
+# ENEMY AI TESTS
+# ============================================================================
+
+class AlwaysGuard:
+    """Enemy AI stub that asks to guard every turn"""
+
+    def choose_action(self, battle):
+        return 'guard'
+
+def play_special_policy(battle):
+    """Play a started battle with special-when-ready until it ends"""
+    while battle.combat_active:
+        try:
+            battle.take_turn('2')
+        except combat_system.AbilityOnCooldownError:
+            battle.take_turn('1')
+    return battle.result
+
+def test_guard_blocks_and_alternates():
+    """Test that guarding shields the enemy and cannot be repeated"""
+    char = combat_system.build_character_at_level("Warrior", 1)
+    enemy = combat_system.create_enemy("orc")
+    battle = combat_system.SimpleBattle(char, enemy, seed=1, verbose=False, enemy_ai=AlwaysGuard())
+    battle.begin()
+    battle.take_turn('1')
+    health = enemy['health']
+    battle.take_turn('1')
+    assert enemy['health'] == health - max(0, battle.calculate_damage(char, enemy) - enemy['strength'])
+
+    actions = [event['action'] for event in battle.events.to_dicts() if event['actor'] == 'enemy']
+    assert actions == ['guard', 'attack']
+
+def test_expectimax_ai_presses_harder():
+    """Test that the searching AI leaves the player no better off than attacking"""
+    outcomes = []
+    for enemy_ai in [None, combat_system.ExpectimaxAI(time_budget=None)]:
+        char = combat_system.build_character_at_level("Cleric", 7)
+        enemy = combat_system.create_enemy("orc")
+        battle = combat_system.SimpleBattle(char, enemy, seed=0, verbose=False, enemy_ai=enemy_ai)
+        battle.begin()
+        outcomes.append((play_special_policy(battle)['winner'], char['health']))
+
+    assert outcomes[0][0] == outcomes[1][0] == 'player'
+    assert outcomes[1][1] < outcomes[0][1]
+
+def test_expectimax_ai_respects_time_budget():
+    """Test that an exhausted budget falls back to a basic attack"""
+    char = combat_system.build_character_at_level("Rogue", 6)
+    enemy = combat_system.create_enemy("dragon")
+    battle = combat_system.SimpleBattle(char, enemy, seed=0, verbose=False)
+    battle.begin()
+
+    ai = combat_system.ExpectimaxAI(time_budget=0)
+    assert ai.choose_action(battle) == 'attack'
+    assert ai.depth_reached == 0
+
+    ai = combat_system.ExpectimaxAI(max_depth=3, time_budget=None)
+    ai.choose_action(battle)
+    assert ai.depth_reached == 3
+    assert len(ai.table) > 0
+
+# ============================================================================
+# AUTO BATTLE TESTS
+# ============================================================================
+
+def test_auto_battle_matches_prediction():
+    """Test that auto-resolved battles follow the normal battle rules"""
+    char = combat_system.build_character_at_level("Mage", 3)
+    enemy = combat_system.create_enemy("orc")
+    prediction = combat_system.predict_battle(char, enemy, 'special')
+
+    result = combat_system.auto_battle(char, enemy, 'special', seed=5)
+    assert result['winner'] == prediction['winner'] == 'player'
+    assert enemy['health'] <= 0
+
+    with pytest.raises(ValueError):
+        combat_system.auto_battle(char, combat_system.create_enemy("orc"), 'dance')
+
+def test_apply_battle_result_uses_character_rewards():
+    """Test that victory rewards level the character through character_manager"""
+    char = character_manager.create_character("Hero", "Warrior")
+    applied = combat_system.apply_battle_result(
+        char, {'winner': 'player', 'xp_gained': 150, 'gold_gained': 40})
+    assert applied
+    assert char['level'] == 2
+    assert char['gold'] == 140
+
+    char['health'] = 0
+    assert not combat_system.apply_battle_result(
+        char, {'winner': 'player', 'xp_gained': 150, 'gold_gained': 40})
+    assert char['gold'] == 140
+
+def test_auto_explore_is_reproducible_and_stops_on_death():
+    """Test that grinding repeats under a seed and ends when the character dies"""
+    summaries = []
+    for _ in range(2):
+        char = character_manager.create_character("Bot", "Warrior")
+        summaries.append((combat_system.auto_explore(char, 500, seed=9), char['health'], char['level']))
+
+    assert summaries[0] == summaries[1]
+    summary, health, level = summaries[0]
+    assert summary['battles'] < 500
+    assert health == 0
+    assert summary['battles'] == summary['wins'] + summary['losses'] + summary['escapes']
+    assert level > 1
+
+def test_auto_explore_counts_quest_objectives():
+    """Test that headless grinding advances defeat objectives"""
+    import game_data
+    import quest_handler
+
+    quests = {'grind': game_data.parse_quest_block([
+        "QUEST_ID: grind", "TITLE: Grind", "DESCRIPTION: Win twice", "REWARD_XP: 10",
+        "REWARD_GOLD: 10", "REQUIRED_LEVEL: 1", "PREREQUISITE: NONE",
+        "OBJECTIVES: defeat any 2"])}
+    char = character_manager.create_character("Bot", "Warrior")
+    quest_handler.accept_quest(char, 'grind', quests)
+
+    summary = combat_system.auto_explore(char, 2, seed=3, quest_data_dict=quests)
+
+    assert summary['wins'] == 2
+    assert char['quest_progress']['grind'] == [2]
+    assert summary['quests_finished'] == ['grind']
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,173 @@
+"""
+Test Inventory System
+Tests for inventory storage extensions
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory_system
+import character_manager
+from custom_exceptions import ItemNotFoundError, InventoryFullError
+
+@pytest.fixture
+def items():
+    """Item data with an explicit, a default and a single-slot stack size"""
+    return {'potion': {'type': 'consumable', 'cost': 10, 'stack_size': 5},
+            'elixir': {'type': 'consumable', 'cost': 10},
+            'sword': {'type': 'weapon', 'cost': 10}}
+
+# ============================================================================
+# INVENTORY STORAGE TESTS
+# ============================================================================
+
+def test_inventory_is_a_counted_list():
+    """Test the counted inventory stores each item once and reads like a list"""
+    inventory = inventory_system.Inventory(['potion', 'sword', 'potion'])
+
+    assert inventory.counts == {'potion': 2, 'sword': 1} and len(inventory) == 3
+    assert inventory == ['potion', 'potion', 'sword']
+    assert inventory != ['potion', 'sword', 'potion']
+    assert inventory.count('potion') == 2 and 'sword' in inventory
+    assert inventory.index('sword') == 2 and inventory[-1] == 'sword'
+    assert ','.join(inventory) == "potion,potion,sword"
+
+    inventory.insert(0, 'shield')
+    inventory[1] = 'elixir'
+    assert inventory == ['shield', 'elixir', 'potion', 'sword']
+    assert inventory.pop() == 'sword'
+    inventory += ['sword', 'shield']
+    assert inventory == ['shield', 'shield', 'elixir', 'potion', 'sword']
+    del inventory[:2]
+    assert inventory.counts == {'elixir': 1, 'potion': 1, 'sword': 1}
+    inventory.sort(reverse=True)
+    assert inventory == ['sword', 'potion', 'elixir']
+    with pytest.raises(ValueError):
+        inventory.remove('shield')
+
+def test_inventory_adds_and_removes_quantities():
+    """Test quantities change one count, and copies keep the counts"""
+    import pickle
+
+    inventory = inventory_system.Inventory.from_counts({'potion': 1000, 'sword': 1})
+    inventory.add('potion', 500)
+    inventory.remove('potion', 1499)
+    assert inventory.counts == {'potion': 1, 'sword': 1} and len(inventory) == 2
+    with pytest.raises(ValueError):
+        inventory.remove('potion', 2)
+
+    copied = pickle.loads(pickle.dumps(inventory))
+    assert copied == inventory and copied.counts is not inventory.counts
+    assert inventory.copy() == inventory
+
+def test_inventory_functions_work_on_both_types():
+    """Test inventory functions give the same answers for Inventory and lists"""
+    for inventory in (inventory_system.Inventory(), []):
+        char = {'inventory': inventory, 'health': 50, 'max_health': 100}
+        inventory_system.add_item_to_inventory(char, 'health_potion')
+        inventory_system.add_item_to_inventory(char, 'health_potion')
+        assert inventory_system.count_item(char, 'health_potion') == 2
+        assert inventory_system.get_inventory_space_remaining(char) == inventory_system.MAX_INVENTORY_SIZE - 2
+
+        item = {'name': 'Health Potion', 'type': 'consumable', 'effect': 'health:20'}
+        inventory_system.use_item(char, 'health_potion', item)
+        assert char['health'] == 70
+        assert inventory_system.has_item(char, 'health_potion')
+        assert inventory_system.clear_inventory(char) == ['health_potion']
+        assert type(char['inventory']) is type(inventory) and not char['inventory']
+        with pytest.raises(ItemNotFoundError):
+            inventory_system.remove_item_from_inventory(char, 'health_potion')
+
+def test_inventory_survives_save_and_load(tmp_path):
+    """Test characters keep a counted inventory through saving"""
+    char = character_manager.create_character("Packer", "Warrior")
+    for item_id in ['potion', 'sword', 'potion']:
+        inventory_system.add_item_to_inventory(char, item_id)
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("Packer", str(tmp_path))
+    assert isinstance(loaded['inventory'], inventory_system.Inventory)
+    assert loaded['inventory'] == ['potion', 'potion', 'sword']
+
+# ============================================================================
+# ITEM STACK TESTS
+# ============================================================================
+
+def test_stacks_share_slots(items):
+    """Test copies of an item fill a stack before taking a new slot"""
+    assert [inventory_system.get_stack_size(item_id, items) for item_id in items] == [5, 10, 1]
+    assert inventory_system.get_stack_size('potion') == 1
+    char = {'inventory': inventory_system.Inventory(), 'gold': 0}
+
+    inventory_system.add_item_to_inventory(char, 'potion', 12, items)
+    inventory_system.add_item_to_inventory(char, 'sword', 2, items)
+    assert inventory_system.get_used_slots(char, items) == 3 + 2
+    assert inventory_system.get_used_slots(char) == 12 + 2
+    assert inventory_system.count_item(char, 'potion') == 12
+
+    inventory_system.remove_item_from_inventory(char, 'potion', 7)
+    assert inventory_system.get_inventory_space_remaining(char, items) == inventory_system.MAX_INVENTORY_SIZE - 3
+    with pytest.raises(ItemNotFoundError):
+        inventory_system.remove_item_from_inventory(char, 'potion', 6)
+    with pytest.raises(ValueError):
+        inventory_system.add_item_to_inventory(char, 'potion', 0, items)
+
+def test_full_inventory_still_tops_up_stacks(items):
+    """Test a full inventory accepts copies that fit in an open stack"""
+    char = {'inventory': inventory_system.Inventory(['sword'] * 19), 'gold': 30}
+    inventory_system.add_item_to_inventory(char, 'potion', 3, items)
+    assert inventory_system.get_used_slots(char, items) == inventory_system.MAX_INVENTORY_SIZE
+
+    inventory_system.purchase_item(char, 'potion', items['potion'], items)
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_item_to_inventory(char, 'potion', 2, items)
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_item_to_inventory(char, 'unknown_item', 1, items)
+    assert inventory_system.count_item(char, 'potion') == 4
+
+def test_purchase_without_item_data_counts_one_slot_per_copy(items):
+    """Test purchases without the item catalog use the same slots as get_used_slots"""
+    char = {'inventory': inventory_system.Inventory(['potion'] * 20), 'gold': 30}
+    assert inventory_system.get_used_slots(char, items) == 4
+
+    with pytest.raises(InventoryFullError):
+        inventory_system.purchase_item(char, 'potion', items['potion'])
+    assert char['gold'] == 30
+    inventory_system.purchase_item(char, 'potion', items['potion'], items)
+    assert inventory_system.count_item(char, 'potion') == 21
+
+def test_used_slots_follow_each_change(items):
+    """Test the stored slot counts match a recount after every kind of change"""
+    inventory = inventory_system.Inventory(item_data_dict=items)
+    char = {'inventory': inventory}
+    inventory_system.add_item_to_inventory(char, 'potion', 6, items)
+    inventory.append('sword')
+    inventory.insert(0, 'elixir')
+    inventory.remove('potion')
+    inventory[-1] = 'potion'
+    assert inventory.counts == {'elixir': 1, 'potion': 6}
+    assert inventory.slots == {'elixir': 1, 'potion': 2} and inventory.used_slots == 3
+
+    assert inventory_system.get_used_slots(char) == 7
+    assert inventory_system.get_used_slots(char, items) == 3
+    inventory.clear()
+    assert inventory.used_slots == 0 and not inventory.slots
+
+def test_stacks_are_saved_compactly(items, tmp_path):
+    """Test save files store each run of copies once with its count"""
+    char = character_manager.create_character("Hoarder", "Rogue")
+    inventory_system.add_item_to_inventory(char, 'potion', 15, items)
+    inventory_system.add_item_to_inventory(char, 'sword', 1, items)
+    character_manager.save_character(char, str(tmp_path))
+
+    assert "INVENTORY: potion*15,sword\n" in (tmp_path / "Hoarder_save.txt").read_text()
+    loaded = character_manager.load_character("Hoarder", str(tmp_path))
+    assert loaded['inventory'].counts == {'potion': 15, 'sword': 1}
+    assert inventory_system.get_used_slots(loaded, items) == 4
+    assert inventory_system.parse_inventory("a,b,a").counts == {'a': 2, 'b': 1}
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,597 @@
+"""
+Test Quest Handler
+Tests for quest indexes and prerequisite graph extensions
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quest_handler
+from custom_exceptions import InvalidDataFormatError, QuestNotFoundError
+
+def make_quest(quest_id, prerequisite='NONE', required_level=1, reward_xp=50, reward_gold=25):
+    """Build a minimal quest dictionary"""
+    return {'quest_id': quest_id, 'title': quest_id.title(), 'description': '',
+            'reward_xp': reward_xp, 'reward_gold': reward_gold,
+            'required_level': required_level, 'prerequisite': prerequisite}
+
+def make_quests(*quests):
+    """Build a quest data dictionary from quest dictionaries"""
+    return {quest['quest_id']: quest for quest in quests}
+
+# ============================================================================
+# QUEST GRAPH TESTS
+# ============================================================================
+
+def test_quest_graph_order_and_depth():
+    """Test that the graph orders prerequisites before the quests needing them"""
+    quests = make_quests(make_quest('c', 'b'), make_quest('b', 'a'),
+                         make_quest('a'), make_quest('side', 'a'))
+    graph = quest_handler.get_quest_graph(quests)
+
+    assert graph.roots == ['a']
+    assert graph.depth == {'a': 0, 'b': 1, 'side': 1, 'c': 2}
+    assert sorted(graph.children['a']) == ['b', 'side']
+    position = {quest_id: i for i, quest_id in enumerate(graph.order)}
+    for quest_id, parents in graph.parents.items():
+        for parent in parents:
+            assert position[parent] < position[quest_id]
+
+def test_prerequisite_chain_for_long_chains():
+    """Test chain lookups on a deep prerequisite chain"""
+    quests = make_quests(*[make_quest(f"q{i}", f"q{i - 1}" if i else 'NONE') for i in range(3000)])
+    chain = quest_handler.get_quest_prerequisite_chain('q2999', quests)
+    assert chain == [f"q{i}" for i in range(3000)]
+    assert quest_handler.get_quest_graph(quests) is quest_handler.get_quest_graph(quests)
+
+def test_prerequisite_chain_reports_broken_data():
+    """Test missing prerequisites and cycles raise instead of looping"""
+    quests = make_quests(make_quest('a', 'b'), make_quest('b', 'a'), make_quest('lost', 'ghost'))
+
+    with pytest.raises(InvalidDataFormatError):
+        quest_handler.get_quest_prerequisite_chain('a', quests)
+    with pytest.raises(QuestNotFoundError):
+        quest_handler.get_quest_prerequisite_chain('lost', quests)
+    with pytest.raises(QuestNotFoundError):
+        quest_handler.get_quest_prerequisite_chain('nowhere', quests)
+
+    quests['a']['prerequisite'] = 'NONE'
+    quest_handler.rebuild_quest_graph(quests)
+    assert quest_handler.get_quest_prerequisite_chain('b', quests) == ['a', 'b']
+
+def test_prerequisite_chain_notices_edited_prerequisites():
+    """Test that a prerequisite edited in place is not hidden by the cached graph"""
+    quests = make_quests(make_quest('a'), make_quest('b'), make_quest('c', 'b'))
+    assert quest_handler.get_quest_prerequisite_chain('c', quests) == ['b', 'c']
+
+    quests['b']['prerequisite'] = 'a'
+    assert quest_handler.get_quest_prerequisite_chain('b', quests) == ['a', 'b']
+    assert quest_handler.get_quest_prerequisite_chain('c', quests) == ['a', 'b', 'c']
+
+    quests['a']['prerequisite'] = 'c'
+    with pytest.raises(InvalidDataFormatError):
+        quest_handler.get_quest_prerequisite_chain('c', quests)
+
+# ============================================================================
+# QUEST GRAPH VALIDATION TESTS
+# ============================================================================
+
+def test_check_quest_graph_reports_every_problem():
+    """Test that cycles, missing prerequisites and unreachable quests are all found"""
+    quests = make_quests(make_quest('a', 'c'), make_quest('b', 'a'), make_quest('c', 'b'),
+                         make_quest('below', 'a'), make_quest('lost', 'ghost'),
+                         make_quest('after_lost', 'lost'), make_quest('self', 'self'),
+                         make_quest('fine'))
+    report = quest_handler.check_quest_graph(quests)
+
+    assert sorted(map(sorted, report['cycles'])) == [['a', 'b', 'c'], ['self']]
+    assert report['dangling'] == [('lost', 'ghost')]
+    assert report['unreachable'] == ['below', 'after_lost']
+
+    with pytest.raises(InvalidDataFormatError) as error:
+        quest_handler.validate_quest_graph(quests)
+    assert "ghost" in str(error.value)
+    assert "after_lost" in str(error.value)
+
+def test_shipped_quests_pass_graph_validation():
+    """Test that the bundled quest file has a valid prerequisite graph"""
+    import game_data
+
+    quests = game_data.load_quests(os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), "data", "quests.txt"))
+    assert quest_handler.validate_quest_graph(quests) == True
+
+# ============================================================================
+# QUEST AVAILABILITY TESTS
+# ============================================================================
+
+def available_ids(character, quests):
+    """Ids of the quests get_available_quests returns"""
+    return [quest['quest_id'] for quest in quest_handler.get_available_quests(character, quests)]
+
+def test_available_quests_follow_quest_actions():
+    """Test that the availability index tracks accept, complete, abandon and level-ups"""
+    import character_manager
+
+    quests = make_quests(make_quest('a'), make_quest('b', 'a'), make_quest('c', 'a', required_level=2),
+                         make_quest('d', required_level=3))
+    char = character_manager.create_character("Indexed", "Warrior")
+
+    assert available_ids(char, quests) == ['a']
+    quest_handler.accept_quest(char, 'a', quests)
+    assert available_ids(char, quests) == []
+    quest_handler.abandon_quest(char, 'a')
+    assert available_ids(char, quests) == ['a']
+
+    quest_handler.accept_quest(char, 'a', quests)
+    quest_handler.complete_quest(char, 'a', quests)
+    assert available_ids(char, quests) == ['b']
+
+    character_manager.gain_experience(char, 100 + 200)
+    assert char['level'] == 3
+    assert available_ids(char, quests) == ['b', 'c', 'd']
+
+def test_available_quests_notice_outside_changes():
+    """Test that editing the quest lists directly rebuilds the index"""
+    import character_manager
+
+    quests = make_quests(make_quest('a'), make_quest('b', 'a'))
+    char = character_manager.create_character("Direct", "Mage")
+    assert available_ids(char, quests) == ['a']
+
+    char['completed_quests'].append('a')
+    assert available_ids(char, quests) == ['b']
+
+    char['completed_quests'] = []
+    assert available_ids(char, quests) == ['a']
+
+def test_available_quests_notice_same_length_changes():
+    """Test that swapping a quest id in place is noticed, with or without IndexedList"""
+    import character_manager
+
+    quests = make_quests(make_quest('a'), make_quest('b'), make_quest('after_a', 'a'),
+                         make_quest('after_b', 'b'))
+    indexed = character_manager.create_character("Swapper", "Rogue")
+    plain = {'level': 1, 'active_quests': [], 'completed_quests': []}
+
+    for char in [indexed, plain]:
+        char['completed_quests'].append('a')
+        assert available_ids(char, quests) == ['b', 'after_a']
+
+        char['completed_quests'][0] = 'b'
+        assert available_ids(char, quests) == ['a', 'after_b']
+
+        # A quest action on a stale index must not hide the outside change
+        char['completed_quests'].remove('b')
+        quest_handler.accept_quest(char, 'a', quests)
+        assert available_ids(char, quests) == ['b']
+
+# ============================================================================
+# QUEST STATE TESTS
+# ============================================================================
+
+def test_indexed_quest_lists_behave_like_lists():
+    """Test that quest lists keep list behaviour with counted membership"""
+    import character_manager
+
+    char = character_manager.create_character("Veteran", "Cleric")
+    completed = char['completed_quests']
+
+    completed.extend(f"q{i}" for i in range(5000))
+    completed.remove('q10')
+    del completed[0]
+    completed[0] = 'renamed'
+    assert 'q10' not in completed
+    assert 'q0' not in completed and 'q1' not in completed
+    assert 'renamed' in completed and 'q4999' in completed
+    assert completed.counts == {quest_id: 1 for quest_id in completed}
+    assert completed[:3] == ['renamed', 'q2', 'q3'] and completed[-1] == 'q4999'
+    assert completed.pop() == 'q4999' and len(completed) == 4997
+    assert character_manager.validate_character_data(char) == True
+
+def test_indexed_list_removes_first_copy_in_list_order():
+    """Test duplicates, inserts and replacements keep list semantics"""
+    import character_manager
+
+    values = character_manager.IndexedList(['a', 'b', 'a'])
+    values.insert(0, 'b')
+    values[2] = 'b'
+    assert values == ['b', 'a', 'b', 'a']
+
+    values.remove('b')
+    values.remove('a')
+    assert values == ['b', 'a'] and values.count('b') == 1
+    values += ['c']
+    values.reverse()
+    assert values == ['c', 'a', 'b'] and values.index('b') == 2
+
+def test_indexed_quest_lists_survive_save_and_load(tmp_path):
+    """Test that saving and loading keeps quest order and the index"""
+    import character_manager
+
+    quests = make_quests(make_quest('a'), make_quest('b'), make_quest('c'))
+    char = character_manager.create_character("Saver", "Rogue")
+    for quest_id in ['c', 'a', 'b']:
+        quest_handler.accept_quest(char, quest_id, quests)
+    quest_handler.complete_quest(char, 'a', quests)
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("Saver", str(tmp_path))
+
+    assert loaded['active_quests'] == ['c', 'b']
+    assert loaded['completed_quests'] == ['a']
+    assert isinstance(loaded['active_quests'], character_manager.IndexedList)
+    assert quest_handler.is_quest_active(loaded, 'b')
+    assert quest_handler.is_quest_completed(loaded, 'a')
+
+# ============================================================================
+# QUEST LEVEL INDEX TESTS
+# ============================================================================
+
+def test_get_quests_by_level_uses_sorted_index():
+    """Test level range queries return matching quests lowest level first"""
+    quests = make_quests(make_quest('high', required_level=9), make_quest('low', required_level=1),
+                         make_quest('mid', required_level=5), make_quest('mid2', required_level=5))
+
+    found = quest_handler.get_quests_by_level(quests, 2, 9)
+    assert [quest['quest_id'] for quest in found] == ['mid', 'mid2', 'high']
+    assert quest_handler.get_quests_by_level(quests, 6, 8) == []
+
+def test_level_queries_notice_swapped_quests():
+    """Test that swapping one quest for another of the same count rebuilds the indexes"""
+    import character_manager
+
+    quests = make_quests(make_quest('a'), make_quest('old', required_level=2), make_quest('z', required_level=3))
+    char = character_manager.create_character("Swap", "Warrior")
+    char['level'] = 3
+    assert [quest['quest_id'] for quest in quest_handler.get_quests_by_level(quests, 1, 3)] == ['a', 'old', 'z']
+    assert available_ids(char, quests) == ['a', 'old', 'z']
+
+    del quests['old']
+    quests['new'] = make_quest('new', required_level=2)
+    assert available_ids(char, quests) == ['a', 'z', 'new']
+    assert [quest['quest_id'] for quest in quest_handler.get_quests_by_level(quests, 1, 3)] == ['a', 'new', 'z']
+
+    quests['a']['required_level'] = 5
+    assert [quest['quest_id'] for quest in quest_handler.get_quests_by_level(quests, 1, 3)] == ['new', 'z']
+
+def test_quest_board_combines_filters():
+    """Test the quest board filters by level, prerequisites, rewards and state"""
+    import character_manager
+
+    quests = make_quests(make_quest('intro'),
+                         make_quest('rich', 'intro', required_level=2, reward_gold=500),
+                         make_quest('poor', 'intro', required_level=2, reward_gold=5),
+                         make_quest('locked', 'rich', required_level=2, reward_gold=500),
+                         make_quest('later', required_level=8, reward_gold=500))
+    char = character_manager.create_character("Board", "Warrior")
+    char['level'] = 3
+
+    board = quest_handler.get_quest_board(char, quests)
+    assert [quest['quest_id'] for quest in board] == ['intro']
+
+    char['completed_quests'].append('intro')
+    board = quest_handler.get_quest_board(char, quests, min_gold=100)
+    assert [quest['quest_id'] for quest in board] == ['rich']
+
+    board = quest_handler.get_quest_board(char, quests, max_level=10, min_gold=100,
+                                          prerequisites_met=False)
+    assert [quest['quest_id'] for quest in board] == ['rich', 'locked', 'later']
+
+# ============================================================================
+# QUEST REWARD TOTAL TESTS
+# ============================================================================
+
+def test_quest_reward_totals_are_kept_by_complete_quest():
+    """Test that completing quests keeps running reward totals"""
+    import character_manager
+
+    quests = make_quests(make_quest('a', reward_xp=40, reward_gold=10),
+                         make_quest('b', reward_xp=30, reward_gold=5))
+    char = character_manager.create_character("Earner", "Mage")
+    for quest_id in quests:
+        quest_handler.accept_quest(char, quest_id, quests)
+        quest_handler.complete_quest(char, quest_id, quests)
+
+    assert char['quest_rewards'] == {'total_xp': 70, 'total_gold': 15, 'count': 2}
+    assert quest_handler.get_total_quest_rewards_earned(char, quests) == {'total_xp': 70, 'total_gold': 15}
+    assert quest_handler.verify_quest_rewards(char, quests) == True
+
+    char['quest_rewards']['total_gold'] = 999
+    assert quest_handler.verify_quest_rewards(char, quests) == False
+    assert char['quest_rewards']['total_gold'] == 15
+
+def test_quest_reward_totals_rebuilt_for_legacy_saves(tmp_path):
+    """Test that saves without reward totals are rebuilt on first use"""
+    import character_manager
+
+    quests = make_quests(make_quest('a', reward_xp=40, reward_gold=10))
+    char = character_manager.create_character("Legacy", "Warrior")
+    char['completed_quests'].append('a')
+    character_manager.save_character(char, str(tmp_path))
+
+    save_file = tmp_path / "Legacy_save.txt"
+    lines = [line for line in save_file.read_text().splitlines() if not line.startswith("QUEST_REWARDS")]
+    save_file.write_text("\n".join(lines) + "\n")
+
+    loaded = character_manager.load_character("Legacy", str(tmp_path))
+    assert 'quest_rewards' not in loaded
+    assert quest_handler.get_total_quest_rewards_earned(loaded, quests) == {'total_xp': 40, 'total_gold': 10}
+
+    character_manager.save_character(loaded, str(tmp_path))
+    reloaded = character_manager.load_character("Legacy", str(tmp_path))
+    assert reloaded['quest_rewards'] == {'total_xp': 40, 'total_gold': 10, 'count': 1}
+
+# ============================================================================
+# BULK ELIGIBILITY TESTS
+# ============================================================================
+
+def make_party_of_questers(quests):
+    """Characters in a spread of quest states"""
+    import character_manager
+
+    fresh = character_manager.create_character("Fresh", "Warrior")
+    busy = character_manager.create_character("Busy", "Mage")
+    busy['active_quests'].append('a')
+    veteran = character_manager.create_character("Veteran", "Rogue")
+    veteran['level'] = 5
+    veteran['completed_quests'].extend(['a', 'ghost'])
+    return [fresh, busy, veteran]
+
+def test_eligibility_bitsets_match_can_accept_quest():
+    """Test bulk bitsets agree with can_accept_quest for every pair"""
+    quests = make_quests(make_quest('a'), make_quest('b', 'a'), make_quest('c', 'a', required_level=6),
+                         make_quest('d', required_level=4), make_quest('lost', 'ghost'))
+    characters = make_party_of_questers(quests)
+
+    bitsets = quest_handler.get_eligibility_bitsets(characters, quests)
+    for character, eligible in zip(characters, bitsets):
+        expected = [quest_handler.can_accept_quest(character, quest_id, quests) for quest_id in quests]
+        assert [bool(eligible >> bit & 1) for bit in range(len(quests))] == expected
+    assert bitsets == [0b00001, 0b00000, 0b11010]
+
+def test_eligibility_matrix_with_and_without_numpy(monkeypatch):
+    """Test the matrix is the same with NumPy and with the pure Python fallback"""
+    quests = make_quests(*[make_quest(f"q{i}", f"q{i - 1}" if i % 3 else 'NONE', required_level=1 + i % 4)
+                           for i in range(20)])
+    characters = make_party_of_questers(quests)
+    characters[2]['completed_quests'].extend(['q0', 'q1', 'q3'])
+    expected = [[quest_handler.can_accept_quest(character, quest_id, quests) for quest_id in quests]
+                for character in characters]
+
+    matrix = quest_handler.get_eligibility_matrix(characters, quests)
+    assert [[bool(value) for value in row] for row in matrix] == expected
+
+    monkeypatch.setattr(quest_handler, "np", None)
+    assert quest_handler.get_eligibility_matrix(characters, quests) == expected
+    assert quest_handler.get_eligibility_matrix([], quests) == []
+
+# ============================================================================
+# MULTI-PREREQUISITE TESTS
+# ============================================================================
+
+def test_parse_prerequisites_formats():
+    """Test NONE, single, AND and OR prerequisite text"""
+    import game_data
+
+    assert game_data.parse_prerequisites("NONE") == []
+    assert game_data.parse_prerequisites("first_steps") == [['first_steps']]
+    assert game_data.parse_prerequisites("a | b") == [['a', 'b']]
+    assert game_data.parse_prerequisites("a & (b|c)") == [['a'], ['b', 'c']]
+    assert game_data.parse_quest_block(["PREREQUISITE: a&(b | c)"])['prerequisite'] == "a & (b | c)"
+    with pytest.raises(InvalidDataFormatError):
+        game_data.parse_prerequisites("a & ")
+    with pytest.raises(InvalidDataFormatError):
+        game_data.parse_prerequisites("(a & b)")
+
+def test_mixed_prerequisite_operators_need_parentheses():
+    """Test that '&' and '|' cannot be mixed without explicit grouping"""
+    import game_data
+
+    for value in ["a & b | c", "a | b & c", "(a | b) & c | d"]:
+        with pytest.raises(InvalidDataFormatError):
+            game_data.parse_prerequisites(value)
+
+def test_accept_quest_with_and_or_prerequisites():
+    """Test quests needing all of, or any of, several quests"""
+    import character_manager
+    from custom_exceptions import QuestRequirementsNotMetError
+
+    quests = make_quests(make_quest('a'), make_quest('b'), make_quest('c'),
+                         make_quest('both', 'a & b'), make_quest('either', 'b | c'),
+                         make_quest('mixed', 'a & (b | c)'))
+    char = character_manager.create_character("Planner", "Warrior")
+
+    quest_handler.accept_quest(char, 'a', quests)
+    quest_handler.complete_quest(char, 'a', quests)
+    assert not quest_handler.can_accept_quest(char, 'both', quests)
+    assert not quest_handler.can_accept_quest(char, 'either', quests)
+    with pytest.raises(QuestRequirementsNotMetError, match=r"not completed: b \| c$"):
+        quest_handler.accept_quest(char, 'mixed', quests)
+    with pytest.raises(QuestRequirementsNotMetError, match=r"not completed: b$"):
+        quest_handler.accept_quest(char, 'both', quests)
+
+    quest_handler.accept_quest(char, 'c', quests)
+    quest_handler.complete_quest(char, 'c', quests)
+    assert available_ids(char, quests) == ['b', 'either', 'mixed']
+    assert quest_handler.accept_quest(char, 'mixed', quests) == True
+
+    quest_handler.accept_quest(char, 'b', quests)
+    quest_handler.complete_quest(char, 'b', quests)
+    assert available_ids(char, quests) == ['both', 'either']
+
+def test_completed_quest_bits_kept_on_character():
+    """Test that combined prerequisites reuse one bitset that complete_quest updates"""
+    import character_manager
+
+    quests = make_quests(make_quest('a'), make_quest('b'), make_quest('both', 'a & b'))
+    char = character_manager.create_character("Reader", "Mage")
+    char['completed_quests'].append('a')
+    char['active_quests'].append('b')
+
+    assert not quest_handler.can_accept_quest(char, 'both', quests)
+    completed_bits = char['quest_bits']
+    assert 'quest_index' not in char
+
+    quest_handler.complete_quest(char, 'b', quests)
+    assert char['quest_bits'] is completed_bits
+    assert completed_bits.mask == completed_bits.bits.completed_mask(char['completed_quests'])
+    assert quest_handler.can_accept_quest(char, 'both', quests)
+    assert char['quest_bits'] is completed_bits
+
+def test_prerequisite_checks_read_edited_quests():
+    """Test that prerequisite edits in place are honoured and never raise"""
+    import character_manager
+    import game_data
+
+    quests = make_quests(make_quest('a'), make_quest('b'), make_quest('c', 'a'))
+    char = character_manager.create_character("Editor", "Warrior")
+    char['completed_quests'].append('a')
+    assert quest_handler.can_accept_quest(char, 'c', quests)
+
+    quests['c']['prerequisite'] = 'b'
+    assert not quest_handler.can_accept_quest(char, 'c', quests)
+    quests['c']['prerequisite'] = 'a & b'
+    assert not quest_handler.can_accept_quest(char, 'c', quests)
+    quests['c']['prerequisite'] = 'a | b'
+    assert quest_handler.can_accept_quest(char, 'c', quests)
+    quests['c']['prerequisite'] = 'a & b | oops'
+    assert not quest_handler.can_accept_quest(char, 'c', quests)
+
+    quests['c']['prerequisite'] = 'a'
+    graph = quest_handler.get_quest_graph(quests)
+    quests['b']['required_level'] = 4
+    game_data.mark_quest_data_changed()
+    assert quest_handler.get_quest_graph(quests) is not graph
+    assert [quest['quest_id'] for quest in quest_handler.get_quests_by_level(quests, 4, 4)] == ['b']
+
+def test_quest_graph_with_multiple_prerequisites():
+    """Test chains and validation when quests name several prerequisites"""
+    quests = make_quests(make_quest('a'), make_quest('b', 'a'), make_quest('c'),
+                         make_quest('final', 'b & c'), make_quest('loop', 'a | loop_back'),
+                         make_quest('loop_back', 'loop'), make_quest('stuck', 'x & y'),
+                         make_quest('x', 'y'), make_quest('y', 'x'))
+
+    assert quest_handler.get_quest_prerequisite_chain('final', quests) == ['a', 'b', 'c', 'final']
+    assert quest_handler.get_quest_prerequisite_chain('loop_back', quests) == ['a', 'loop', 'loop_back']
+
+    report = quest_handler.check_quest_graph(quests)
+    assert report['cycles'] == [['x', 'y']]
+    assert report['dangling'] == []
+    assert report['unreachable'] == ['stuck']
+
+# ============================================================================
+# QUEST OBJECTIVE TESTS
+# ============================================================================
+
+def test_parse_objectives_formats():
+    """Test objective text parses into event, targets and count"""
+    import game_data
+
+    assert game_data.parse_objectives("defeat goblin 3, buy weapon|armor") == [
+        {'event': 'defeat', 'targets': ['goblin'], 'count': 3},
+        {'event': 'buy', 'targets': ['weapon', 'armor'], 'count': 1}]
+    for bad in ["dance goblin 3", "defeat goblin many", "defeat goblin 0", "defeat"]:
+        with pytest.raises(InvalidDataFormatError):
+            game_data.parse_objectives(bad)
+
+def test_events_only_reach_subscribed_objectives():
+    """Test combat and shop events count towards the matching active quests"""
+    import character_manager
+    import game_data
+
+    quests = make_quests(make_quest('hunt'), make_quest('gear'), make_quest('first'), make_quest('plain'))
+    quests['hunt']['objectives'] = game_data.parse_objectives("defeat goblin 2, defeat orc 1")
+    quests['gear']['objectives'] = game_data.parse_objectives("buy weapon|armor 1")
+    quests['first']['objectives'] = game_data.parse_objectives("defeat any 1")
+    char = character_manager.create_character("Tracker", "Warrior")
+    for quest_id in quests:
+        quest_handler.accept_quest(char, quest_id, quests)
+
+    tracker = quest_handler.get_objective_tracker(char, quests)
+    assert sorted(tracker.subscribers) == [('buy', 'armor'), ('buy', 'weapon'), ('defeat', 'any'),
+                                           ('defeat', 'goblin'), ('defeat', 'orc')]
+
+    assert quest_handler.record_quest_event(char, 'defeat', ['goblin'], quests) == ['first']
+    assert quest_handler.record_quest_event(char, 'buy', ['health_potion', 'consumable'], quests) == []
+    assert quest_handler.record_quest_event(char, 'buy', ['iron_sword', 'weapon'], quests) == ['gear']
+    assert quest_handler.record_quest_event(char, 'defeat', ['orc'], quests) == []
+    assert quest_handler.describe_objectives(char, quests['hunt']) == "defeat goblin 1/2, defeat orc 1/1"
+    assert quest_handler.record_quest_event(char, 'defeat', ['goblin'], quests) == ['hunt']
+    assert quest_handler.objectives_complete(char, 'plain', quests)
+
+    quest_handler.complete_quest(char, 'hunt', quests)
+    assert 'hunt' not in char['quest_progress']
+    assert ('defeat', 'goblin') not in tracker.subscribers
+
+def test_objective_progress_survives_save_and_abandon(tmp_path):
+    """Test progress is saved with the character and reset by abandoning"""
+    import character_manager
+    import game_data
+
+    quests = make_quests(make_quest('hunt'))
+    quests['hunt']['objectives'] = game_data.parse_objectives("defeat goblin 3")
+    char = character_manager.create_character("Keeper", "Rogue")
+    quest_handler.accept_quest(char, 'hunt', quests)
+    quest_handler.record_quest_event(char, 'defeat', ['goblin'], quests)
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("Keeper", str(tmp_path))
+    assert loaded['quest_progress'] == {'hunt': [1]}
+    quest_handler.record_quest_event(loaded, 'defeat', ['goblin'], quests)
+    assert quest_handler.describe_objectives(loaded, quests['hunt']) == "defeat goblin 2/3"
+
+    quest_handler.abandon_quest(loaded, 'hunt')
+    quest_handler.accept_quest(loaded, 'hunt', quests)
+    assert loaded['quest_progress'] == {'hunt': [0]}
+
+# ============================================================================
+# QUEST ROUTE PLANNER TESTS
+# ============================================================================
+
+def test_plan_quest_route_orders_by_level_and_counts_extra_xp():
+    """Test the route covers prerequisites, level gates and XP from quests"""
+    import character_manager
+
+    quests = make_quests(make_quest('a', reward_xp=100), make_quest('b', 'a', required_level=3, reward_xp=100),
+                         make_quest('c', required_level=2, reward_xp=50), make_quest('goal', 'b & c'),
+                         make_quest('side', 'a', reward_xp=1000))
+    char = character_manager.create_character("Router", "Mage")
+
+    route = quest_handler.plan_quest_route(char, 'goal', quests)
+    # 'a' reaches level 2, 'c' leaves 50 of the 200 XP level 3 needs
+    assert route['quests'] == ['a', 'c', 'b', 'goal']
+    assert route['extra_xp'] == [0, 0, 150, 0]
+    assert route['total_extra_xp'] == 150
+    assert route['level'] == 3
+
+    char['completed_quests'].append('a')
+    char['active_quests'].append('b')
+    assert quest_handler.plan_quest_route(char, 'goal', quests)['quests'] == ['b', 'c', 'goal']
+
+def test_plan_quest_route_picks_fewest_quests():
+    """Test OR groups take the shorter branch and redundant quests are dropped"""
+    import character_manager
+    from custom_exceptions import QuestAlreadyCompletedError
+
+    quests = make_quests(make_quest('long1'), make_quest('long2', 'long1'), make_quest('short'),
+                         make_quest('goal', 'long2 | short'),
+                         make_quest('mid'), make_quest('pricey', 'mid'),
+                         make_quest('both', '(short | pricey) & pricey'))
+    char = character_manager.create_character("Shortcut", "Rogue")
+
+    assert quest_handler.plan_quest_route(char, 'goal', quests)['quests'] == ['short', 'goal']
+    assert quest_handler.plan_quest_route(char, 'both', quests)['quests'] == ['mid', 'pricey', 'both']
+    assert quest_handler.get_quest_route_planner(quests) is quest_handler.get_quest_route_planner(quests)
+
+    char['completed_quests'].append('short')
+    with pytest.raises(QuestAlreadyCompletedError):
+        quest_handler.plan_quest_route(char, 'short', quests)
+    with pytest.raises(QuestNotFoundError):
+        quest_handler.plan_quest_route(char, 'nowhere', quests)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])